@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import apply_patch
+
+def block(search, replace):
+    return f"<<<<<<< SEARCH\n{search}=======\n{replace}>>>>>>> REPLACE\n"
+
+class TestApplyPatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        Path("a.c").write_text("int a = 1;\nint b = 2;\n")
+        Path("b.c").write_text("void f(void);\n")
+        os.chmod("b.c", 0o755)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_single_block_compat(self):
+        with patch("builtins.print"):
+            self.assertTrue(apply_patch.apply_patch("a.c\n" + block("int a = 1;\n", "int a = 10;\n")))
+        self.assertEqual(Path("a.c").read_text(), "int a = 10;\nint b = 2;\n")
+
+    def test_many_blocks_many_files(self):
+        stream = ("a.c\n" + block("int a = 1;\n", "int a = 10;\n") + block("int b = 2;\n", "int b = 20;\n")
+                  + "\n```\nb.c\n" + block("void f(void);\n", "void g(void);\n") + "```\n")
+        report = apply_patch.apply_patches(stream)
+        self.assertTrue(report["ok"], report)
+        self.assertEqual([b["status"] for b in report["blocks"]], ["applied"] * 3)
+        self.assertEqual(report["files"], ["a.c", "b.c"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 10;\nint b = 20;\n")
+        self.assertEqual(Path("b.c").read_text(), "void g(void);\n")
+        self.assertEqual(os.stat("b.c").st_mode & 0o777, 0o755)
+        # Later blocks see earlier ones
+        report = apply_patch.apply_patches("a.c\n" + block("int a = 10;\n", "int a = 11;\n")
+                                           + block("int a = 11;\n", "int a = 12;\n"))
+        self.assertTrue(report["ok"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 12;\nint b = 20;\n")
+
+    def test_failed_block_changes_nothing(self):
+        stream = ("a.c\n" + block("int a = 1;\n", "int a = 10;\n")
+                  + "b.c\n" + block("missing\n", "x\n") + "c.c\n" + block("x\n", "y\n"))
+        report = apply_patch.apply_patches(stream)
+        self.assertFalse(report["ok"])
+        self.assertEqual([b["status"] for b in report["blocks"]], ["applied", "not_found", "error"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 1;\nint b = 2;\n")
+        self.assertEqual(Path("b.c").read_text(), "void f(void);\n")
+
+    def test_write_failure_rolls_back(self):
+        stream = "a.c\n" + block("int a = 1;\n", "int a = 10;\n") + "b.c\n" + block("void f(void);\n", "x\n")
+        real = apply_patch._write_atomic
+        def flaky(path, content):
+            if os.path.basename(path) == "b.c" and content == "x\n":
+                raise OSError("disk full")
+            real(path, content)
+        with patch.object(apply_patch, "_write_atomic", side_effect=flaky):
+            report = apply_patch.apply_patches(stream)
+        self.assertFalse(report["ok"])
+        self.assertIn("disk full", report["error"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 1;\nint b = 2;\n")
+        self.assertEqual(sorted(os.listdir(".")), ["a.c", "b.c"])
+
+    def test_failed_write_leaves_no_temp_file(self):
+        # A lone surrogate cannot be encoded: the write itself fails
+        with self.assertRaises(UnicodeEncodeError):
+            apply_patch._write_atomic("a.c", "int a = \ud800;\n")
+        self.assertEqual(sorted(os.listdir(".")), ["a.c", "b.c"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 1;\nint b = 2;\n")
+
+    def test_same_file_spelled_differently(self):
+        stream = ("a.c\n" + block("int a = 1;\n", "int a = 10;\n")
+                  + "./a.c\n" + block("int b = 2;\n", "int b = 20;\n"))
+        report = apply_patch.apply_patches(stream)
+        self.assertTrue(report["ok"], report)
+        self.assertEqual(report["files"], ["a.c"])
+        self.assertEqual(Path("a.c").read_text(), "int a = 10;\nint b = 20;\n")
+
+    def test_writes_through_symlinks(self):
+        os.symlink("b.c", "link.c")
+        report = apply_patch.apply_patches("link.c\n" + block("void f(void);\n", "void h(void);\n"))
+        self.assertTrue(report["ok"], report)
+        self.assertTrue(os.path.islink("link.c"))
+        self.assertEqual(Path("b.c").read_text(), "void h(void);\n")
+        self.assertEqual(os.stat("b.c").st_mode & 0o777, 0o755)
+
+    def test_malformed(self):
+        self.assertFalse(apply_patch.apply_patches("")["ok"])
+        self.assertIn("Missing standard markers",
+                      apply_patch.apply_patches("a.c\n<<<<<<< SEARCH\nx\n=======\n")["error"])
+        self.assertIn("no filename", apply_patch.apply_patches(block("x\n", "y\n"))["error"])
+
+    def test_whitespace_drift_falls_back(self):
+        Path("c.c").write_text("int main() {\n    int x = 1;   \n    return x;\n}\n")
+        # Trailing spaces dropped by the agent
+        report = apply_patch.apply_patches("c.c\n" + block("    int x = 1;\n    return x;\n", "    int x = 2;\n    return x;\n"))
+        self.assertTrue(report["ok"], report)
+        self.assertEqual((report["blocks"][0]["match"], report["blocks"][0]["at_line"]), ("rstrip", 2))
+        # Indentation changed by the agent
+        report = apply_patch.apply_patches("c.c\n" + block("\n  int x = 2;\n  return  x;\n", "    return 2;\n"))
+        self.assertTrue(report["ok"], report)
+        self.assertEqual(report["blocks"][0]["match"], "whitespace")
+        self.assertEqual(Path("c.c").read_text(), "int main() {\n    return 2;\n}\n")
+
+    def test_fuzzy_candidates_ranked_or_ambiguous(self):
+        Path("d.c").write_text("if (a) {\n  f();\n}\nif (a) {\n    f();\n}\n")
+        # The second location matches verbatim on every line: it wins
+        report = apply_patch.apply_patches("d.c\n" + block("if (a)  {\n    f();\n}\n", "g();\n"))
+        self.assertTrue(report["ok"], report)
+        self.assertEqual(report["blocks"][0]["candidates"], [4, 1])
+        self.assertEqual(Path("d.c").read_text(), "if (a) {\n  f();\n}\ng();\n")
+
+        Path("e.c").write_text("x  =  1;\ny = 2;\nx  =  1;\n")
+        report = apply_patch.apply_patches("e.c\n" + block("x = 1;\n", "x = 3;\n"))
+        self.assertFalse(report["ok"])
+        self.assertEqual(report["blocks"][0]["status"], "ambiguous")
+        self.assertEqual(report["blocks"][0]["candidates"], [1, 3])
+        self.assertEqual(Path("e.c").read_text(), "x  =  1;\ny = 2;\nx  =  1;\n")
+
+    def test_exact_match_counts_duplicates(self):
+        match = apply_patch.find_match("ab\nab\nab\n", "ab\n")
+        self.assertEqual((match["level"], match["start"], match["occurrences"]), ("exact", 0, 3))
+        self.assertIsNone(apply_patch.find_match("ab\n", "cd\n"))
+
+    def test_json_cli(self):
+        stream = "a.c\n" + block("int b = 2;\n", "int b = 3;\n")
+        with patch("sys.argv", ["apply_patch", "--json"]), patch("sys.stdin.read", return_value=stream), \
+             patch("builtins.print") as printed:
+            apply_patch.main()
+        report = json.loads(printed.call_args[0][0])
+        self.assertTrue(report["ok"])
+        self.assertEqual(report["blocks"][0]["occurrences"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import chaos
+
+SCALE = {"components": 6, "files_per_component": 4, "component_deps": 2, "include_fanout": 3,
+         "duplicate_tus": 2, "sdk_headers": 20, "sdk_fanout": 2, "cpp_ratio": 0.5}
+
+def tree_digest(root):
+    digest = hashlib.sha1()
+    for path in sorted(p for p in Path(root).rglob("*") if p.is_file() and p.name != "compile_commands.json"):
+        digest.update(str(path.relative_to(root)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+class TestChaosScale(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        patcher = patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _generate(self, name, seed=7, workers=1):
+        root = Path(self.tmp_dir) / name
+        root.mkdir()
+        plan = {"root": str(root), "scale": dict(SCALE, sdk_root=str(root / "sdk"))}
+        chaos.generate_scale(plan, root, seed=seed, workers=workers)
+        return root
+
+    def test_generates_consistent_db(self):
+        root = self._generate("repo")
+        db = json.loads((root / "compile_commands.json").read_text())
+        self.assertEqual(len(db), 6 * 4 * 2)
+        self.assertEqual(len({e["file"] for e in db}), 6 * 4)
+        for entry in db:
+            self.assertTrue(os.path.exists(entry["file"]))
+            flags = entry.get("arguments") or entry["command"].split()
+            include_dirs = [f[2:] for f in flags if f.startswith("-I")]
+            # Every quoted/angle include resolves through the entry's -I paths
+            for inc in re.findall(r'#include ["<](\S+)[">]', Path(entry["file"]).read_text()):
+                if inc != "stdio.h":
+                    self.assertTrue(any(os.path.exists(os.path.join(d, inc)) for d in include_dirs), inc)
+        targets = {f for e in db for f in (e.get("arguments") or e["command"].split()) if f.startswith("-DCHAOS_TARGET")}
+        self.assertEqual(targets, {"-DCHAOS_TARGET=0", "-DCHAOS_TARGET=1"})
+
+    def test_deterministic_across_worker_counts(self):
+        first = self._generate("a", workers=1)
+        second = self._generate("b", workers=3)
+        third = self._generate("c", seed=8)
+        self.assertEqual(tree_digest(first), tree_digest(second))
+        self.assertNotEqual(tree_digest(first), tree_digest(third))
+        db_a = (first / "compile_commands.json").read_text().replace(str(first), "ROOT")
+        db_b = (second / "compile_commands.json").read_text().replace(str(second), "ROOT")
+        self.assertEqual(db_a, db_b)
+
+if __name__ == '__main__':
+    unittest.main()
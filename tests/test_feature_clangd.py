@@ -104,6 +104,76 @@ class TestProjectorClangd(unittest.TestCase):
         self.assertNotIn("main.o", content)
         self.assertNotIn("-c", content)
 
+    def test_focus_merges_all_entries(self):
+        """Test 'focus' emits one PathMatch fragment per distinct flag set."""
+        src = os.path.join(self.hologram_dir, "src")
+        db_entries = [
+            {"directory": self.hologram_dir, "file": os.path.join(src, "a.c"),
+             "arguments": ["gcc", "-DBOARD_A", "-o", "a.o", "-c", os.path.join(src, "a.c")]},
+            {"directory": self.hologram_dir, "file": os.path.join(src, "b.c"),
+             "arguments": ["gcc", "-DBOARD_A", "-o", "b.o", "-c", os.path.join(src, "b.c")]},
+            {"directory": self.hologram_dir, "file": os.path.join(src, "z.c"),
+             "arguments": ["gcc", "-DBOARD_Z", "-o", "z.o", "-c", os.path.join(src, "z.c")]},
+        ]
+        self.create_compile_db(db_entries)
+        clangd_path = os.path.join(self.hologram_dir, ".clangd")
+
+        args = MagicMock()
+        args.file = os.path.join(src, "z.c")
+        with patch('sys.stdout', new=io.StringIO()):
+            do_focus(args)
+
+        with open(clangd_path, "r") as f:
+            content = f.read()
+
+        fragments = content.split("---\n")
+        # 2 flag sets + 1 header fallback
+        self.assertEqual(len(fragments), 3)
+        self.assertIn("'src/a\\.c'", fragments[0])
+        self.assertIn("'src/b\\.c'", fragments[0])
+        self.assertEqual(content.count('"-DBOARD_A"'), 1)
+        # Headers follow the focused file
+        self.assertIn("hpp", fragments[2])
+        self.assertIn('"-DBOARD_Z"', fragments[2])
+
+        # Re-focusing on the same file leaves the config untouched
+        mtime = os.stat(clangd_path).st_mtime_ns
+        with patch('sys.stdout', new=io.StringIO()) as out:
+            do_focus(args)
+        self.assertIn("already up to date", out.getvalue())
+        self.assertEqual(os.stat(clangd_path).st_mtime_ns, mtime)
+
+    def test_focus_switch_with_same_flags_keeps_config(self):
+        """Test 'focus' on another file with the same flags does not rewrite .clangd."""
+        src = os.path.join(self.hologram_dir, "src")
+        db_entries = [
+            {"directory": self.hologram_dir, "file": os.path.join(src, "a.c"),
+             "arguments": ["gcc", "-DBOARD_A", "-c", os.path.join(src, "a.c")]},
+            {"directory": self.hologram_dir, "file": os.path.join(src, "b.c"),
+             "arguments": ["gcc", "-DBOARD_A", "-c", os.path.join(src, "b.c")]},
+            # Second entry for a.c (e.g. another target): the first one wins
+            {"directory": self.hologram_dir, "file": os.path.join(src, "a.c"),
+             "arguments": ["gcc", "-DBOARD_TEST", "-c", os.path.join(src, "a.c")]},
+        ]
+        self.create_compile_db(db_entries)
+        clangd_path = os.path.join(self.hologram_dir, ".clangd")
+
+        args = MagicMock()
+        args.file = os.path.join(src, "a.c")
+        with patch('sys.stdout', new=io.StringIO()):
+            do_focus(args)
+        with open(clangd_path, "r") as f:
+            content = f.read()
+        self.assertNotIn("BOARD_TEST", content)
+        self.assertEqual(content.count("'src/a\\.c'"), 1)
+
+        mtime = os.stat(clangd_path).st_mtime_ns
+        args.file = os.path.join(src, "b.c")
+        with patch('sys.stdout', new=io.StringIO()) as out:
+            do_focus(args)
+        self.assertIn("already up to date", out.getvalue())
+        self.assertEqual(os.stat(clangd_path).st_mtime_ns, mtime)
+
     def test_focus_fails_missing_db(self):
         """Test 'focus' fails gracefully if compile_commands.json is missing."""
         args = MagicMock()
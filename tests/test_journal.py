@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import types
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import radio
+import journal
+import toolsmith_local
+
+class TestJournalTail(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp_dir, "mission_log.md")
+        with open(self.log, "w") as f:
+            f.write("# Mission Log\n### old entry\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _append(self, text):
+        with open(self.log, "a") as f:
+            f.write(text)
+
+    def test_reads_only_appended_complete_lines(self):
+        tail = journal.JournalTail(self.log, from_end=True)
+        self.assertEqual(tail.read_lines(), [])
+        self._append("### one\n### tw")
+        self.assertEqual(tail.read_lines(), ["### one\n"])
+        self._append("o\n")
+        self.assertEqual(tail.read_lines(), ["### two\n"])
+        tail.close()
+
+    def test_reopens_rotated_file(self):
+        tail = journal.JournalTail(self.log, from_end=True)
+        os.replace(self.log, self.log + ".1")
+        with open(self.log, "w") as f:
+            f.write("### fresh\n")
+        self.assertEqual(tail.read_lines(), ["### fresh\n"])
+        tail.close()
+
+    def test_follow_wakes_on_append(self):
+        for use_inotify in (True, False):
+            tail = journal.JournalTail(self.log, from_end=True, use_inotify=use_inotify)
+            timer = threading.Timer(0.2, self._append, args=("### [ACK] late\n",))
+            timer.start()
+            start = time.time()
+            lines = []
+            for line in tail.follow(5):
+                lines.append(line)
+                break
+            self.assertEqual(lines, ["### [ACK] late\n"])
+            self.assertLess(time.time() - start, 2)
+            timer.join()
+            tail.close()
+
+    def test_request_ids(self):
+        req_id = journal.new_request_id()
+        self.assertEqual(journal.split_request_id(journal.tag_request("run verification", req_id)),
+                         (req_id, "run verification"))
+        self.assertEqual(journal.split_request_id("backup x"), (None, "backup x"))
+        line = f"### [t] [LocalSmith -> Director] [ACK] {journal.tag_reply('done', req_id)}\n"
+        self.assertEqual(journal.reply_id(line), req_id)
+        self.assertIsNone(journal.reply_id("### [t] [LocalSmith -> Director] [ACK] done\n"))
+
+    def test_toolsmith_replies_to_envelopes(self):
+        with patch.object(toolsmith_local, "LOG_FILE", self.log), \
+             patch.object(toolsmith_local, "log"):
+            toolsmith_local.handle_envelope({"id": "ab12", "from": "Director", "to": "LocalSmith",
+                                             "type": "REQ", "body": {"command": "frobnicate"}})
+            # Tagged Markdown lines are left to the envelope stream (no double handling)
+            toolsmith_local.handle_line("### [t] [Director -> LocalSmith] [REQ] [ID:ab12] frobnicate\n")
+        last = Path(self.log).read_text().strip().splitlines()[-1]
+        self.assertIn("[LocalSmith -> Director] [ACK] [RE:ab12] Unknown command: frobnicate", last)
+        envs = [json.loads(l) for l in Path(journal.envelope_path(self.log)).read_text().splitlines()]
+        self.assertEqual(len(envs), 1)
+        self.assertEqual((envs[0]["reply_to"], envs[0]["body"]), ("ab12", {"message": "Unknown command: frobnicate"}))
+
+    def test_toolsmith_requests_follow_broadcast_context(self):
+        inbox = journal.EnvelopeReader(self.log, recipient=("LocalSmith", "All"), from_end=True)
+        tail = journal.JournalTail(self.log, from_end=True)
+        j = radio.Journal(self.log)
+        j.append("User", "All", "CTX", "Switch to /tmp/newctx")
+        j.append("Director", "LocalSmith", "REQ", "run verification", body={"command": "run verification"})
+        j.append("User", "All", "LOG", "[CTX] Switch to /tmp/other")
+        j.append("Director", "LocalSmith", "REQ", "backup x", body={"command": "backup x"})
+        j.append("Director", "Coder", "REQ", "not for LocalSmith", body={"command": "echo no"})
+        ran = []
+        with patch.object(toolsmith_local, "CURRENT_CONTEXT", "/repo"), patch.object(toolsmith_local, "log"), \
+             patch.object(toolsmith_local, "run_request",
+                          side_effect=lambda cmd, ctx, req_id=None: ran.append((cmd, ctx))):
+            # One pass of the daemon loop
+            for line in tail.read_lines():
+                toolsmith_local.handle_line(line)
+            for env in inbox.poll(0):
+                toolsmith_local.handle_envelope(env)
+            self.assertEqual(toolsmith_local.CURRENT_CONTEXT, "/tmp/other")
+        self.assertEqual(ran, [("run verification", "/tmp/newctx"), ("backup x", "/tmp/other")])
+        inbox.close()
+        tail.close()
+
+    def test_toolsmith_answers_quick_commands_during_builds(self):
+        started = threading.Event()
+        release = threading.Event()
+        def slow_build(cmd, log_path, cwd=None, progress=None):
+            started.set()
+            release.wait(5)
+            with open(log_path, "w") as f:
+                f.write(f"built {cwd}\n")
+            return 0, 1
+        ctx = os.path.join(self.tmp_dir, "ctx")
+        os.makedirs(ctx)
+        writer = toolsmith_local.AckWriter(self.log)
+        pool = toolsmith_local.LanePool(4)
+        with patch.object(toolsmith_local, "LOG_FILE", self.log), patch.object(toolsmith_local, "log"), \
+             patch.object(toolsmith_local, "_ACKS", writer), \
+             patch.object(toolsmith_local, "stream_shell", side_effect=slow_build), \
+             patch.object(toolsmith_local, "CURRENT_CONTEXT", ctx):
+            for i, cmd in enumerate(["run verification", "run verification", "frobnicate"]):
+                toolsmith_local.handle_envelope({"id": f"r{i}", "from": "Director", "to": "LocalSmith",
+                                                 "type": "REQ", "body": {"command": cmd}}, pool)
+            self.assertTrue(started.wait(5))
+            deadline = time.time() + 5
+            while not os.path.exists(journal.envelope_path(self.log)) and time.time() < deadline:
+                time.sleep(0.01)
+            writer.flush()
+            # The quick command is answered while the build still runs
+            envs = [json.loads(l) for l in Path(journal.envelope_path(self.log)).read_text().splitlines()]
+            self.assertEqual([e["reply_to"] for e in envs], ["r2"])
+            release.set()
+            pool.shutdown()
+            writer.flush()
+        envs = [json.loads(l) for l in Path(journal.envelope_path(self.log)).read_text().splitlines()]
+        # Builds of one context stay serialized, in order, and use the context at receipt
+        self.assertEqual([e["reply_to"] for e in envs], ["r2", "r0", "r1"])
+        self.assertIn(f"built {ctx}", envs[1]["body"]["message"])
+
+    def test_toolsmith_builds_see_earlier_config_edits(self):
+        repo = os.path.join(self.tmp_dir, "repo")
+        os.makedirs(os.path.join(repo, ".ddd"))
+        real_write = toolsmith_local.write_text_atomic
+        def slow_write(path, content):
+            time.sleep(0.3)
+            real_write(path, content)
+        writer = toolsmith_local.AckWriter(self.log)
+        pool = toolsmith_local.LanePool(4)
+        with patch.object(toolsmith_local, "LOG_FILE", self.log), patch.object(toolsmith_local, "log"), \
+             patch.object(toolsmith_local, "_ACKS", writer), patch.object(toolsmith_local, "REPO_ROOT", repo), \
+             patch.object(toolsmith_local, "CURRENT_CONTEXT", repo), \
+             patch.object(toolsmith_local, "write_text_atomic", side_effect=slow_write):
+            for i, cmd in enumerate(["set verification_command to echo NEWVALUE", "run verification",
+                                     "set verification_command to echo LATER"]):
+                toolsmith_local.handle_envelope({"id": f"r{i}", "from": "Director", "to": "LocalSmith",
+                                                 "type": "REQ", "body": {"command": cmd}}, pool)
+            pool.shutdown()
+            writer.flush()
+        envs = {e["reply_to"]: e["body"]["message"]
+                for e in map(json.loads, Path(journal.envelope_path(self.log)).read_text().splitlines())}
+        self.assertEqual(envs["r1"], "Verification Output: NEWVALUE")
+        with open(os.path.join(repo, ".ddd", "config.json")) as f:
+            self.assertEqual(json.load(f), {"verification_command": "echo LATER"})
+
+    def test_envelope_reader_pipelines_replies(self):
+        j = radio.Journal(self.log)
+        reader = journal.EnvelopeReader(self.log, recipient="Director")
+        ids = [j.append("Director", "LocalSmith", "REQ", f"cmd {i}", body={"command": f"cmd {i}"})["id"]
+               for i in range(3)]
+        # Answered out of order; each reply is claimed by its own request ID
+        for req_id in reversed(ids):
+            j.append("LocalSmith", "Director", "ACK", f"done {req_id}", body={"message": req_id}, reply_to=req_id)
+        self.assertEqual([reader.wait_reply(i, 1)["body"]["message"] for i in ids], ids)
+        self.assertIsNone(reader.take_reply(ids[0]))
+
+        inbox = journal.EnvelopeReader(self.log, recipient="LocalSmith", from_end=False)
+        seen = []
+        self.assertEqual(inbox.dispatch({"REQ": seen.append}), 3)
+        self.assertEqual([e["body"]["command"] for e in seen], ["cmd 0", "cmd 1", "cmd 2"])
+        reader.close()
+        inbox.close()
+
+    def test_director_pipelines_requests(self):
+        with patch.dict(sys.modules, {"litellm": types.SimpleNamespace(completion=None)}):
+            import director
+        with patch.object(director, "LOG_FILE", self.log), patch.object(director, "_READER", None), \
+             patch.object(director, "_TAIL", None), patch("builtins.print"):
+            first = director.write_request("run verification")
+            second = director.write_request("backup x")
+            j = radio.Journal(self.log)
+            threading.Timer(0.1, j.append, args=("LocalSmith", "Director", "ACK", "ok"),
+                            kwargs={"reply_to": second}).start()
+            # Legacy untagged Markdown ACK answers the remaining request
+            threading.Timer(0.2, self._append,
+                            args=("### [t] [LocalSmith -> Director] [ACK] legacy ok\n",)).start()
+            self.assertEqual(director.wait_for_acks([first, second], timeout=5), set())
+            self.assertFalse(director.wait_for_ack("missing", timeout=0.2))
+            director._READER.close()
+            director._TAIL.close()
+        self.assertIn(f"[REQ] [ID:{first}] run verification", Path(self.log).read_text())
+
+    def test_director_drops_envelopes_answered_in_markdown(self):
+        with patch.dict(sys.modules, {"litellm": types.SimpleNamespace(completion=None)}):
+            import director
+        with patch.object(director, "LOG_FILE", self.log), patch.object(director, "_READER", None), \
+             patch.object(director, "_TAIL", None), patch("builtins.print"):
+            req = director.write_request("run verification")
+            # The Markdown ACK is seen before its envelope is written
+            self._append(f"### [t] [LocalSmith -> Director] [ACK] [RE:{req}] ok\n")
+            self.assertEqual(director.wait_for_acks([req], timeout=5), set())
+            with open(journal.envelope_path(self.log), "a") as f:
+                f.write(json.dumps({"id": "x1", "reply_to": req, "from": "LocalSmith",
+                                    "to": "Director", "type": "ACK", "body": {"message": "ok"}}) + "\n")
+            self.assertIsNone(director._READER.take_reply(req))
+            self.assertEqual(director._READER.replies, {})
+            director._READER.close()
+            director._TAIL.close()
+
+    def test_director_heartbeats_extend_timeout(self):
+        with patch.dict(sys.modules, {"litellm": types.SimpleNamespace(completion=None)}):
+            import director
+        with patch.object(director, "LOG_FILE", self.log), patch.object(director, "_READER", None), \
+             patch.object(director, "_TAIL", None), patch("builtins.print"):
+            req = director.write_request("run verification")
+            j = radio.Journal(self.log)
+            for delay in (0.3, 0.6):
+                threading.Timer(delay, j.append, args=("LocalSmith", "Director", "LOG", "running"),
+                                kwargs={"reply_to": req}).start()
+            threading.Timer(0.9, j.append, args=("LocalSmith", "Director", "ACK", "done"),
+                            kwargs={"reply_to": req}).start()
+            self.assertEqual(director.wait_for_acks([req], timeout=0.5), set())
+            director._READER.close()
+            director._TAIL.close()
+
+if __name__ == '__main__':
+    unittest.main()
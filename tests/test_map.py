@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import tempfile
+import shutil
+import subprocess
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import map as code_map
+
+class TestMapClangFanout(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.sources = {
+            "a.c": "void init(void) { hal_init(); }\n",
+            "b.c": "void run(void) { hal_init_done(); }\n",  # substring only: filtered out
+            "c.c": "void boot(void) { hal_init(); }\n",
+        }
+        db = []
+        for name, text in self.sources.items():
+            with open(os.path.join(self.root, name), "w") as f:
+                f.write(text)
+            db.append({"directory": self.root, "file": name, "command": f"cc -c {name}"})
+        db.append({"directory": self.root, "file": "a.c", "command": "cc -DALT -c a.c"})  # duplicate TU
+        db.append({"directory": self.root, "file": "gone.c", "command": "cc -c gone.c"})
+        with open(os.path.join(self.root, "compile_commands.json"), "w") as f:
+            json.dump(db, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_select_tus_prefilters_on_symbol(self):
+        with open(os.path.join(self.root, "compile_commands.json")) as f:
+            db = json.load(f)
+        tus = code_map.select_tus(db, "hal_init")
+        self.assertEqual([os.path.basename(t) for t in tus], ["a.c", "c.c"])
+        # No TU mentions it: fall back to the first existing TU
+        self.assertEqual([os.path.basename(t) for t in code_map.select_tus(db, "nowhere")], ["a.c"])
+
+    def test_query_clang_merges_and_streams(self):
+        calls = []
+        def fake_query(query_str, root, tu):
+            calls.append(os.path.basename(tu))
+            # Both TUs see the call inside the shared header
+            return (f"Match #1:\n{tu}:1:19: note: \"root\" binds here\n"
+                    f"Match #2:\n{self.root}/hal.h:3:5: note: \"root\" binds here\n")
+
+        streamed = []
+        with patch.object(code_map, "CLANG_QUERY", "clang-query"), \
+             patch.object(code_map, "run_clang_query", side_effect=fake_query), \
+             patch("os.getcwd", return_value=self.root):
+            hits = code_map.query_clang("callers", "hal_init", self.root, on_hit=streamed.append)
+
+        self.assertEqual(sorted(calls), ["a.c", "c.c"])
+        self.assertEqual(hits, ["a.c:1", "c.c:1", "hal.h:3"])
+        # Each hit streamed exactly once
+        self.assertEqual(sorted(streamed), hits)
+
+class TestMapGrepStreaming(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        files = {"halinit.h": "void hal_init(void);\n", "board.h": "#define X hal_init\n"}
+        for i in range(30):
+            files[f"src/mod{i:02d}.c"] = "\n".join(["hal_init();"] * 5) + "\n"
+        for name, text in files.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(text)
+        subprocess.run(["git", "init", "-q"], cwd=self.root, check=True)
+        subprocess.run(["git", "add", "."], cwd=self.root, check=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_grep_priority(self):
+        self.assertEqual(code_map.grep_priority("inc/z_assert.h", "zassert"), 0)
+        self.assertEqual(code_map.grep_priority("inc/other.hpp", "zassert"), 1)
+        self.assertEqual(code_map.grep_priority("src/main.c", "zassert"), 2)
+        self.assertEqual(code_map.grep_priority("Makefile", "zassert"), 2)
+
+    def test_top_k_ranked_with_total(self):
+        with patch("shutil.which", return_value=None):
+            hits, total, complete = code_map.query_grep("callers", "hal_init", self.root, limit=4)
+        files = [h.rsplit(":", 1)[0] for h in hits]
+        self.assertEqual(files, ["halinit.h", "board.h", "src/mod00.c", "src/mod01.c"])
+        self.assertEqual(total, 32)
+        self.assertTrue(complete)
+
+    def test_stops_early_once_stable(self):
+        with patch("shutil.which", return_value=None), patch.object(code_map, "STABLE_HITS", 5):
+            hits, total, complete = code_map.query_grep("callers", "hal_init", self.root, limit=2, max_hits=10)
+        self.assertFalse(complete)
+        self.assertEqual(len(hits), 2)
+        self.assertLess(total, 32)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import map_index
+import map
+
+def fake_ast(src, header):
+    """A trimmed clang JSON AST: 'file'/'line' are omitted when unchanged, like the real dumper."""
+    return {"kind": "TranslationUnitDecl", "loc": {}, "range": {"begin": {}, "end": {}}, "inner": [
+        # System header noise: must be ignored
+        {"kind": "FunctionDecl", "name": "printf",
+         "loc": {"offset": 1, "file": "/usr/include/stdio.h", "line": 300, "col": 5},
+         "range": {"begin": {"offset": 1, "col": 1}, "end": {"offset": 9, "col": 9}}},
+        {"kind": "TypedefDecl", "name": "dev_t",
+         "loc": {"offset": 10, "file": header, "line": 3, "col": 5},
+         "range": {"begin": {"offset": 10, "col": 1}, "end": {"offset": 20, "col": 20}}},
+        {"kind": "FunctionDecl", "name": "helper",
+         "loc": {"offset": 5, "file": src, "line": 2, "col": 6},
+         "range": {"begin": {"offset": 0, "col": 1}, "end": {"offset": 30, "line": 4, "col": 1}},
+         "inner": [{"kind": "CompoundStmt", "range": {"begin": {"offset": 12, "line": 2, "col": 14}, "end": {"offset": 30, "line": 4, "col": 1}}}]},
+        {"kind": "FunctionDecl", "name": "main",
+         "loc": {"offset": 40, "line": 6, "col": 5},
+         "range": {"begin": {"offset": 36, "col": 1}, "end": {"offset": 80, "line": 9, "col": 1}},
+         "inner": [{"kind": "CompoundStmt",
+                    "range": {"begin": {"offset": 47, "line": 6, "col": 16}, "end": {"offset": 80, "line": 9, "col": 1}},
+                    "inner": [{"kind": "CallExpr",
+                               # Same line as previous location => 'line' omitted on begin
+                               "range": {"begin": {"offset": 53, "line": 7, "col": 5}, "end": {"offset": 60, "col": 12}},
+                               "inner": [{"kind": "ImplicitCastExpr",
+                                          "range": {"begin": {"offset": 53, "col": 5}, "end": {"offset": 53, "col": 5}},
+                                          "inner": [{"kind": "DeclRefExpr",
+                                                     "range": {"begin": {"offset": 53, "col": 5}, "end": {"offset": 53, "col": 5}},
+                                                     "referencedDecl": {"kind": "FunctionDecl", "name": "helper"}}]}]},
+                              {"kind": "CallExpr",
+                               "range": {"begin": {"spellingLoc": {"offset": 5, "file": header, "line": 5, "col": 1},
+                                                   "expansionLoc": {"offset": 64, "file": src, "line": 8, "col": 5}},
+                                         "end": {"offset": 70, "col": 11}},
+                               "inner": [{"kind": "DeclRefExpr",
+                                          "range": {"begin": {"offset": 64, "col": 5}, "end": {"offset": 64, "col": 5}},
+                                          "referencedDecl": {"kind": "FunctionDecl", "name": "printf"}}]}]}]}
+    ]}
+
+class TestMapIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "src"))
+        self.src = os.path.join(self.root, "src", "main.c")
+        self.header = os.path.join(self.root, "src", "dev.h")
+        for p in (self.src, self.header):
+            Path(p).touch()
+        self.db = [{"directory": os.path.join(self.root, "src"), "file": "main.c", "arguments": ["cc", "-c", "main.c", "-o", "main.o"]}]
+        self.dumps = []
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _dump(self, entry):
+        self.dumps.append(entry["file"])
+        return fake_ast("main.c", "dev.h")
+
+    def test_walk_tracks_omitted_locations(self):
+        defs, calls, files = map_index.walk_ast(fake_ast("main.c", "dev.h"), self.root, os.path.join(self.root, "src"))
+        self.assertIn(("helper", "function", self.src, 2), defs)
+        self.assertIn(("main", "function", self.src, 6), defs)
+        self.assertIn(("dev_t", "typedef", self.header, 3), defs)
+        self.assertNotIn("printf", [d[0] for d in defs])
+        self.assertIn(("main", "helper", self.src, 7), calls)
+        # Macro-expanded call is attributed to its expansion site
+        self.assertIn(("main", "printf", self.src, 8), calls)
+        self.assertEqual(files, {self.src, self.header})
+
+    def test_ast_dump_cmd_drops_output_flags(self):
+        cmd = map_index.ast_dump_cmd(self.db[0], "clang")
+        self.assertEqual(cmd[:2], ["clang", "main.c"])
+        self.assertNotIn("-o", cmd)
+        self.assertNotIn("-c", cmd)
+        self.assertIn("-ast-dump=json", cmd)
+
+    def test_query_and_incremental_refresh(self):
+        idx = map_index.MapIndex(self.root)
+        self.assertEqual(idx.refresh(self.db, dump=self._dump), (1, 1))
+        self.assertEqual(idx.query("callers", "helper"), ["src/main.c:7"])
+        self.assertEqual(idx.query("callees", "main"), ["src/main.c:7", "src/main.c:8"])
+        self.assertEqual(idx.query("defs", "dev_t"), ["src/dev.h:3"])
+        idx.close()
+
+        # Reopened from disk: nothing changed => no re-dump
+        idx = map_index.MapIndex(self.root)
+        self.assertEqual(idx.refresh(self.db, dump=self._dump), (0, 1))
+        self.assertEqual(idx.query("callers", "helper"), ["src/main.c:7"])
+
+        # Touching an included header invalidates the TU
+        st = os.stat(self.header)
+        os.utime(self.header, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000))
+        self.assertEqual(idx.refresh(self.db, dump=self._dump), (1, 1))
+        self.assertEqual(len(self.dumps), 2)
+
+        # TU removed from the compile DB => its rows are dropped
+        idx.refresh([], dump=self._dump)
+        self.assertEqual(idx.query("callers", "helper"), [])
+        idx.close()
+
+    def test_lookup_only_checks_the_db_stamp(self):
+        db_path = os.path.join(self.root, "compile_commands.json")
+        with open(db_path, "w") as f:
+            json.dump(self.db, f)
+        idx = map_index.MapIndex(self.root)
+        idx.refresh(self.db, dump=self._dump)
+        idx.close()
+        # 'map index' records the stamp of the DB it indexed
+        with patch.object(map_index.MapIndex, "refresh", return_value=(0, 1)), \
+             patch.object(map_index, "CLANG", "clang"), patch("sys.stderr", new_callable=io.StringIO):
+            self.assertEqual(map.build_index(self.root), 0)
+
+        # Fresh stamp: no warning, and neither the DB nor any TU/header is read or stat'ed
+        with patch.object(map_index.MapIndex, "refresh") as refresh, patch.object(map, "load_db") as load, \
+             patch.object(map_index.MapIndex, "is_stale") as is_stale, \
+             patch("sys.stderr", new_callable=io.StringIO) as err:
+            self.assertEqual(map.query_index("callers", "helper", self.root), ["src/main.c:7"])
+        refresh.assert_not_called()
+        load.assert_not_called()
+        is_stale.assert_not_called()
+        self.assertNotIn("stale", err.getvalue())
+
+        # A rewritten DB is reported, the stored index still answers
+        with open(db_path, "w") as f:
+            json.dump(self.db + self.db, f)
+        with patch.object(map_index.MapIndex, "refresh") as refresh, \
+             patch("sys.stderr", new_callable=io.StringIO) as err:
+            self.assertEqual(map.query_index("callers", "helper", self.root), ["src/main.c:7"])
+        refresh.assert_not_called()
+        self.assertIn("Index may be stale", err.getvalue())
+        self.assertEqual(len(self.dumps), 1)
+
+if __name__ == '__main__':
+    unittest.main()
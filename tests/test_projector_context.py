@@ -176,6 +176,9 @@ class TestProjectorContext(unittest.TestCase):
         """
         args = MagicMock()
         args.file = os.path.join(self.test_dir, "hologram/src/main.c")
+        args.files = []
+        args.max_tokens = None
+        args.region = None
         
         # Setup Fake Hologram
         hologram_dir = os.path.join(self.test_dir, "hologram")
@@ -220,5 +223,66 @@ class TestProjectorContext(unittest.TestCase):
         # Verify source code is printed
         self.assertIn("int main() { return 0; }", output)
 
+    def _setup_hologram(self, names):
+        hologram_dir = os.path.join(self.test_dir, "hologram")
+        os.makedirs(os.path.join(hologram_dir, "src"), exist_ok=True)
+        entries = []
+        for name in names:
+            path = os.path.join(hologram_dir, "src", name)
+            with open(path, 'w') as f:
+                f.write(f"// {name}")
+            entries.append({
+                "directory": hologram_dir,
+                "file": path,
+                "command": f"gcc -DFILE_{name.split('.')[0].upper()} -std=c11 -c {name}"
+            })
+        with open(os.path.join(hologram_dir, "compile_commands.json"), 'w') as f:
+            json.dump(entries, f)
+        return [e["file"] for e in entries]
+
+    def _run_context(self, file, files=None):
+        args = MagicMock()
+        args.file = file
+        args.task = None
+        args.files = files or []
+        args.max_tokens = None
+        args.region = None
+        with patch('projector.commands.build.find_project_root', return_value=self.test_dir), \
+             patch('sys.stderr', new=io.StringIO()) as err:
+            do_context(args)
+        return err.getvalue()
+
+    def test_context_cache_skips_db_parse(self):
+        """Second request for an unchanged DB is served from the per-file cache."""
+        main_c, = self._setup_hologram(["main.c"])
+
+        err1 = self._run_context(main_c)
+        self.assertIn("Loading compilation database", err1)
+
+        err2 = self._run_context(main_c)
+        self.assertNotIn("Loading compilation database", err2)
+        self.assertIn("Context cache hit", err2)
+        self.assertEqual(self.held_stdout.getvalue().count("- `FILE_MAIN`"), 2)
+
+        # Touching the DB invalidates the DB stamp -> one reload
+        db_path = os.path.join(self.test_dir, "hologram", "compile_commands.json")
+        st = os.stat(db_path)
+        os.utime(db_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+        err3 = self._run_context(main_c)
+        self.assertIn("Loading compilation database", err3)
+
+    def test_context_multiple_files_single_load(self):
+        """--files resolves several files with a single DB load."""
+        main_c, util_c = self._setup_hologram(["main.c", "util.c"])
+
+        err = self._run_context(main_c, files=[util_c])
+        self.assertEqual(err.count("Loading compilation database"), 1)
+
+        output = self.held_stdout.getvalue()
+        self.assertEqual(output.count("# Mission Request"), 1)
+        self.assertIn("- `FILE_MAIN`", output)
+        self.assertIn("- `FILE_UTIL`", output)
+        self.assertIn("// util.c", output)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+# Setup path to import projector package
+TOOLS_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../tools'))
+if TOOLS_ROOT not in sys.path:
+    sys.path.append(TOOLS_ROOT)
+
+from projector.internal.context_pack import pack_context, extract_signatures, estimate_tokens, parse_region
+
+HEADER = """#ifndef DRV_H
+#define DRV_H
+#define DRV_MAX 8
+typedef struct drv { int id; int flags; } drv_t;
+int drv_open(drv_t *d,
+             int flags);
+static inline int drv_ok(int rc) { return rc == 0; }
+#endif
+"""
+
+class TestContextPack(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.inc_dir = os.path.join(self.root, "outside_wall", "include")
+        self.src_dir = os.path.join(self.root, "hologram", "src")
+        os.makedirs(self.inc_dir)
+        os.makedirs(self.src_dir)
+        with open(os.path.join(self.inc_dir, "drv.h"), 'w') as f:
+            f.write(HEADER)
+        self.source = os.path.join(self.src_dir, "drv.c")
+        body = ["#include <stdio.h>", '#include "drv.h"', ""]
+        body += [f"int filler_{i}(void) {{ return {i}; }}" for i in range(400)]
+        with open(self.source, 'w') as f:
+            f.write("\n".join(body) + "\n")
+        self.context = {
+            "macros": ["DEBUG"],
+            "includes": [self.inc_dir, "/usr/include"],
+            "system_includes": ["/usr/include"],
+            "standard": "c11",
+            "directory": self.src_dir
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_extract_signatures(self):
+        sigs = extract_signatures(HEADER)
+        self.assertIn("#define DRV_MAX 8", sigs)
+        self.assertIn("typedef struct drv { ... } drv_t;", sigs)
+        self.assertIn("int drv_open(drv_t *d, int flags);", sigs)
+        self.assertIn("static inline int drv_ok(int rc);", sigs)
+        # Include guards are not signatures
+        self.assertFalse(any("DRV_H" in s for s in sigs))
+
+    def test_unbudgeted_pack_includes_everything(self):
+        text, tokens = pack_context(self.source, self.context, self.root)
+        self.assertIn("int drv_open(drv_t *d, int flags);", text)
+        self.assertIn("filler_399", text)
+        self.assertIn("System includes (elided): `<stdio.h>`", text)
+        self.assertIn(f"**Size Estimate**: ~", text)
+        self.assertEqual(tokens, estimate_tokens(text))
+
+    def test_budget_trims_source_but_keeps_estimate_honest(self):
+        text, tokens = pack_context(self.source, self.context, self.root, max_tokens=600)
+        # The size line itself is counted against the budget
+        self.assertLessEqual(tokens, 600)
+        self.assertIn(f"**Size Estimate**: ~{tokens} tokens", text)
+        self.assertIn("lines truncated to fit the token budget", text)
+        self.assertIn("(budget 600)", text)
+        self.assertNotIn("filler_399", text)
+
+    def test_unresolved_quoted_includes_are_not_system_includes(self):
+        with open(self.source, 'a') as f:
+            f.write('#include "gen/missing.h"\n')
+        text, _ = pack_context(self.source, self.context, self.root)
+        self.assertIn("System includes (elided): `<stdio.h>`\n", text + "\n")
+        self.assertIn('Unresolved includes: `"gen/missing.h"`', text)
+
+    def test_region(self):
+        self.assertEqual(parse_region("10:12"), (10, 12))
+        text, _ = pack_context(self.source, self.context, self.root, region=parse_region("10:12"))
+        self.assertIn("filler_6(void)", text)
+        self.assertIn("filler_8(void)", text)
+        self.assertNotIn("filler_9(void)", text)
+        self.assertIn("(lines 1-9 elided)", text)
+        # Header signatures are still provided for the region
+        self.assertIn("drv_open", text)
+
+if __name__ == '__main__':
+    unittest.main()
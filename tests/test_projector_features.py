@@ -123,8 +123,8 @@ class TestProjectorFeatures(unittest.TestCase):
         with open(os.path.join(self.hologram_dir, ".hologram_config"), "w") as f:
             f.write("{}")
 
-        # Mock remote existence check (check_call succeeds)
-        self.mock_call.return_value = 0
+        # Mock remote existence check: one ssh call, existing paths echoed back
+        check = MagicMock(stdout="/remote/src/a.c\n/remote/src/b.c\n")
         
         # Mock run_command to simulate verify restoration
         self.mock_sync_run.return_value = ""
@@ -133,7 +133,8 @@ class TestProjectorFeatures(unittest.TestCase):
         args = MagicMock()
         args.all = True
         args.file = None
-        do_retract(args)
+        with patch('subprocess.run', return_value=check) as mock_check:
+            do_retract(args)
         
         # Verify
         # 1. Content files are gone
@@ -145,8 +146,47 @@ class TestProjectorFeatures(unittest.TestCase):
         config_p = os.path.join(self.hologram_dir, ".hologram_config")
         assert os.path.exists(config_p), "Config file should remain"
         
-        # 3. Verify loop calls to restore
-        assert self.mock_sync_run.call_count >= len(files)
+        # 3. Verify batched restore: one existence check, one rsync for the existing files
+        assert mock_check.call_count == 1
+        sent = mock_check.call_args[1]["input"].split()
+        assert sorted(sent) == ["/remote/docs/note.md", "/remote/src/a.c", "/remote/src/b.c"]
+        assert self.mock_call.call_count == 0
+        assert self.mock_sync_run.call_count == 1
+        rsync_cmd = self.mock_sync_run.call_args[0][0]
+        assert "--files-from" in rsync_cmd
+        assert rsync_cmd[-2] == "test-host:/remote"
+
+    def test_retract_all_restores_read_only_per_base(self):
+        # Hologram paths mirroring the remote root ("remote/...") map to absolute remote paths
+        self.mock_sync_conf.return_value = {"host_target": "test-host", "remote_root": "/remote"}
+        files = ["src/a.c", "remote/inc/b.h", "src/gone.c"]
+        for f in files:
+            p = os.path.join(self.hologram_dir, f)
+            os.makedirs(os.path.dirname(p), exist_ok=True)
+            with open(p, "w") as fp: fp.write("content")
+        check = MagicMock(stdout="/remote/src/a.c\n/remote/inc/b.h\n")
+
+        lists = {}
+        def fake_rsync(cmd, *a, **kw):
+            listed = open(cmd[cmd.index("--files-from") + 1]).read().split()
+            lists[cmd[-2]] = listed
+            for rel in listed:
+                dest = os.path.join(cmd[-1], rel)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                with open(dest, "w") as fp: fp.write("base")
+        self.mock_sync_run.side_effect = fake_rsync
+
+        args = MagicMock()
+        args.all = True
+        args.file = None
+        with patch('subprocess.run', return_value=check):
+            do_retract(args)
+
+        assert lists == {"test-host:/remote": ["src/a.c"], "test-host:/": ["remote/inc/b.h"]}
+        for rel in ("src/a.c", "remote/inc/b.h"):
+            wall = os.path.join(self.outside_wall_dir, rel)
+            assert os.stat(wall).st_mode & 0o777 == 0o444
+        assert not os.path.exists(os.path.join(self.outside_wall_dir, "src/gone.c"))
 
     def test_grep_remote_execution(self):
         self.mock_misc_conf.return_value = {"host_target": "user@host", "remote_root": "/remote"}
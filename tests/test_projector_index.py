@@ -0,0 +1,176 @@
+import io
+import os
+import sys
+import json
+import stat
+import multiprocessing
+import unittest
+import tempfile
+import shutil
+from unittest.mock import patch, MagicMock
+
+# Add tools/ to path to import projector package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_ROOT = os.path.join(PROJECT_ROOT, "tools")
+if TOOLS_ROOT not in sys.path:
+    sys.path.append(TOOLS_ROOT)
+
+from projector.commands.misc import do_index
+from projector.internal import indexer
+
+FAKE_INDEXER = """#!/bin/sh
+echo "$@" >> "$(dirname "$0")/indexer_calls.log"
+printf 'RIFF-index'
+"""
+
+# Speaks just enough LSP: answers initialize, then reports background indexing on didOpen
+FAKE_CLANGD = """#!{python}
+import sys, json
+
+def read():
+    length = None
+    while True:
+        line = sys.stdin.buffer.readline()
+        if not line:
+            sys.exit(0)
+        line = line.strip()
+        if not line:
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return json.loads(sys.stdin.buffer.read(length))
+
+def send(msg):
+    body = json.dumps(msg).encode()
+    sys.stdout.buffer.write(b"Content-Length: %d\\r\\n\\r\\n" % len(body) + body)
+    sys.stdout.buffer.flush()
+
+def progress(value):
+    send({{"jsonrpc": "2.0", "method": "$/progress", "params": {{"token": "backgroundIndexProgress", "value": value}}}})
+
+while True:
+    msg = read()
+    method = msg.get("method")
+    if method == "initialize":
+        send({{"jsonrpc": "2.0", "id": msg["id"], "result": {{"capabilities": {{}}}}}})
+    elif method == "textDocument/didOpen":
+        send({{"jsonrpc": "2.0", "id": "p1", "method": "window/workDoneProgress/create", "params": {{"token": "backgroundIndexProgress"}}}})
+        progress({{"kind": "begin", "title": "indexing"}})
+        progress({{"kind": "report", "percentage": 50, "message": "1/2"}})
+        progress({{"kind": "end"}})
+    elif method == "shutdown":
+        send({{"jsonrpc": "2.0", "id": msg["id"], "result": None}})
+    elif method == "exit":
+        sys.exit(0)
+"""
+
+class TestProjectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.hologram_dir = os.path.join(self.test_dir, "hologram")
+        self.bin_dir = os.path.join(self.test_dir, "bin")
+        os.makedirs(self.hologram_dir)
+        os.makedirs(self.bin_dir)
+
+        self.source = os.path.join(self.hologram_dir, "main.c")
+        with open(self.source, "w") as f:
+            f.write("int main() { return 0; }\n")
+        self.db_path = os.path.join(self.hologram_dir, "compile_commands.json")
+        with open(self.db_path, "w") as f:
+            json.dump([{"directory": self.hologram_dir, "file": self.source, "command": "gcc -c main.c"}], f)
+
+        self.patcher_root = patch('projector.commands.misc.find_project_root', return_value=self.test_dir)
+        self.patcher_root.start()
+
+    def tearDown(self):
+        self.patcher_root.stop()
+        shutil.rmtree(self.test_dir)
+
+    def _tool(self, name, content):
+        path = os.path.join(self.bin_dir, name)
+        with open(path, "w") as f:
+            f.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return path
+
+    def _args(self, static=False):
+        args = MagicMock()
+        args.static = static
+        args.detach = False
+        args.timeout = 30
+        return args
+
+    def test_static_index_built_then_reused(self):
+        tool = self._tool("clangd-indexer", FAKE_INDEXER)
+        with patch.dict(os.environ, {"CLANGD_INDEXER": tool}):
+            do_index(self._args(static=True))
+            index_path = os.path.join(self.test_dir, indexer.INDEX_DIR, indexer.STATIC_INDEX_NAME)
+            with open(index_path) as f:
+                self.assertEqual(f.read(), "RIFF-index")
+
+            # Second run: index is newer than DB and sources -> no re-index
+            do_index(self._args(static=True))
+
+        with open(os.path.join(self.bin_dir, "indexer_calls.log")) as f:
+            calls = f.read().splitlines()
+        self.assertEqual(len(calls), 1)
+        self.assertIn("--executor=all-TUs", calls[0])
+        # Lock released
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, indexer.INDEX_DIR, indexer.LOCK_NAME)))
+
+    def test_background_index_waits_for_progress_end(self):
+        tool = self._tool("clangd", FAKE_CLANGD.format(python=sys.executable))
+        with patch.dict(os.environ, {"CLANGD": tool}):
+            with patch('sys.stdout', new_callable=io.StringIO) as out:
+                do_index(self._args())
+        printed = out.getvalue()
+        self.assertIn("Background indexing started", printed)
+        self.assertIn("Background index ready", printed)
+
+    def test_skips_when_another_run_holds_lock(self):
+        index_dir = os.path.join(self.test_dir, indexer.INDEX_DIR)
+        os.makedirs(index_dir)
+        with open(os.path.join(index_dir, indexer.LOCK_NAME), "w") as f:
+            f.write(str(os.getppid())) # A live pid that is not ours
+
+        tool = self._tool("clangd-indexer", FAKE_INDEXER)
+        with patch.dict(os.environ, {"CLANGD_INDEXER": tool}):
+            do_index(self._args(static=True))
+        self.assertFalse(os.path.exists(os.path.join(self.bin_dir, "indexer_calls.log")))
+
+    def test_lock_is_exclusive_across_processes(self):
+        index_dir = os.path.join(self.test_dir, indexer.INDEX_DIR)
+        ctx = multiprocessing.get_context("fork")
+        barrier = ctx.Barrier(6)
+        results = ctx.Queue()
+        def contend():
+            barrier.wait()
+            results.put(indexer.acquire_lock(index_dir))
+            barrier.wait() # Stay alive until every run has tried
+        procs = [ctx.Process(target=contend) for _ in range(6)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join(10)
+        self.assertEqual(sorted(results.get(timeout=5) for _ in procs), [False] * 5 + [True])
+
+    def test_stale_lock_is_taken_over(self):
+        index_dir = os.path.join(self.test_dir, indexer.INDEX_DIR)
+        os.makedirs(index_dir)
+        lock = os.path.join(index_dir, indexer.LOCK_NAME)
+        with open(lock, "w") as f:
+            f.write("999999999") # No such pid
+        self.assertTrue(indexer.acquire_lock(index_dir))
+        with open(lock) as f:
+            self.assertEqual(f.read(), str(os.getpid()))
+
+        # Empty: held while its owner is still writing, stale once old
+        with open(lock, "w"):
+            pass
+        self.assertFalse(indexer.acquire_lock(index_dir))
+        old = os.stat(lock).st_mtime - indexer.LOCK_GRACE_SECS - 1
+        os.utime(lock, (old, old))
+        self.assertTrue(indexer.acquire_lock(index_dir))
+
+if __name__ == '__main__':
+    unittest.main()
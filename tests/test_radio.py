@@ -1,6 +1,10 @@
 import os
 import sys
+import json
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
 from pathlib import Path
 
 # Add tools/lib to path
@@ -54,6 +58,59 @@ class TestRadioInfrastructure(unittest.TestCase):
             content = f.read()
             self.assertIn(test_msg, content)
 
+@unit_test
+class TestSegmentedJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmp_dir, "mission_log.md")
+        self.journal = radio.Journal(self.log, segment_bytes=400)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _append_at(self, ts, *args):
+        with patch.object(radio, "get_timestamp", return_value=ts):
+            return self.journal.append(*args)
+
+    def test_append_indexes_markdown_entries(self):
+        rec = self._append_at("2024-05-01T10:00:00", "Director", "LocalSmith", "REQ", "[ID:ab12] run verification")
+        self.assertEqual((rec["from"], rec["to"], rec["type"], rec["id"]), ("Director", "LocalSmith", "REQ", "ab12"))
+        with open(self.log) as f:
+            self.assertIn("### [2024-05-01T10:00:00] [Director -> LocalSmith] [REQ] [ID:ab12] run verification", f.read())
+        rec = next(self.journal.query(msg_id="ab12"))
+        self.assertEqual(self.journal.read_entry(rec),
+                         "### [2024-05-01T10:00:00] [Director -> LocalSmith] [REQ] [ID:ab12] run verification")
+
+    def test_foreign_writes_are_indexed(self):
+        self._append_at("2024-05-01T10:00:00", "Director", "LocalSmith", "REQ", "one")
+        with open(self.log, "a") as f:
+            f.write("\n### [2024-05-01T10:00:05] [LocalSmith -> Director] [ACK] [RE:x1] line1\nline2\n")
+        acks = list(self.journal.query(msg_type="ACK"))
+        self.assertEqual(len(acks), 1)
+        self.assertEqual(acks[0]["re"], "x1")
+        self.assertTrue(self.journal.read_entry(acks[0]).endswith("line1\nline2"))
+
+    def test_rotation_latest_and_since(self):
+        for i in range(20):
+            self._append_at(f"2024-05-01T10:00:{i:02d}", "Director" if i % 2 else "User",
+                            "LocalSmith", "REQ", f"cmd {i}")
+        sealed = self.journal.sealed_segments()
+        self.assertGreater(len(sealed), 1)
+        self.assertLess(os.path.getsize(self.log), 400 + 100)
+
+        # Last lines cross segment boundaries transparently
+        lines = self.journal.latest(200)
+        entries = [l for l in lines if l.startswith("###")]
+        self.assertEqual(len(entries), 20)
+        self.assertTrue(entries[-1].rstrip().endswith("cmd 19"))
+
+        since = list(self.journal.query(since="2024-05-01T10:00:13", sender="Director"))
+        self.assertEqual([self.journal.read_entry(r).rsplit(" ", 1)[1] for r in since], ["13", "15", "17", "19"])
+        # Reindex from the Markdown reproduces the same records
+        before = [json.dumps(r, sort_keys=True) for r in self.journal.query()]
+        self.journal.reindex()
+        self.assertEqual([json.dumps(r, sort_keys=True) for r in self.journal.query()], before)
+
 if __name__ == '__main__':
     unittest.main()
 
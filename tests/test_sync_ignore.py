@@ -0,0 +1,161 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import sync_ignore
+import allowlist
+
+class TestSyncIgnore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        for d in ["src/a", "src/b", "lib", ".weaves/cache"]:
+            os.makedirs(d)
+        for f in ["src/a/1.c", "src/a/2.c", "src/b/1.c", "src/b/notes.txt", "lib/l.c"]:
+            Path(f).touch()
+        with open("weave.yaml", "w") as f:
+            f.write('ignores: ["*"]\nviews:\n  app: ["src/**/*.c"]\n  lib: ["lib/*.c"]\n')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self, *args):
+        with patch("sys.argv", ["sync_ignore"] + list(args)):
+            try:
+                sync_ignore.main()
+            except SystemExit as e:
+                return e.code
+        return 0
+
+    def _allows(self):
+        lines = Path(".aiderignore").read_text().splitlines()
+        return [l for l in lines[lines.index("# --- ALLOWS (views + system) ---") + 1:] if l]
+
+    def test_collapse_dirs(self):
+        rules = sync_ignore.collapse_dirs(["src/a/1.c", "src/a/2.c", "src/b/1.c", "lib/l.c"])
+        self.assertEqual(rules, {"!src/a/", "!src/b/1.c", "!lib/"})
+        # Every entry of src/ allowed => the topmost directory wins
+        rules = sync_ignore.collapse_dirs(["src/a/1.c", "src/a/2.c", "src/b/1.c", "src/b/notes.txt"])
+        self.assertEqual(rules, {"!src/"})
+
+    def test_resolve_mode_emits_literal_rules(self):
+        self._run("--resolve")
+        allows = self._allows()
+        self.assertIn("!src/a/", allows)
+        self.assertIn("!src/b/1.c", allows)
+        self.assertIn("!lib/", allows)
+        self.assertIn("!.mission/", allows)
+        self.assertNotIn("!src/**/*.c", allows)
+
+        # Pattern mode changes the fingerprint and rewrites the file
+        self._run()
+        self.assertIn("!src/**/*.c", self._allows())
+
+    def test_unchanged_inputs_skip_rewrite(self):
+        self._run("--resolve")
+        first = Path(".aiderignore").read_text()
+        self.assertIn(sync_ignore.FINGERPRINT_PREFIX, first)
+        mtime = os.stat(".aiderignore").st_mtime_ns
+
+        with patch.object(sync_ignore, "collapse_dirs") as collapse:
+            self._run("--resolve")
+        collapse.assert_not_called()
+        self.assertEqual(os.stat(".aiderignore").st_mtime_ns, mtime)
+
+        # A new file in a view changes the resolved set => regenerated
+        Path("src/b/2.c").touch()
+        self._run("--resolve")
+        self.assertIn("!src/b/2.c", self._allows())
+        self.assertNotEqual(Path(".aiderignore").read_text(), first)
+
+    def test_new_file_in_collapsed_dir_regenerates(self):
+        self._run("--resolve")
+        self.assertIn("!lib/", self._allows())
+        # Not in any view, so the resolved set is unchanged, but '!lib/' would now allow it
+        Path("lib/secrets.txt").touch()
+        self._run("--resolve")
+        allows = self._allows()
+        self.assertNotIn("!lib/", allows)
+        self.assertIn("!lib/l.c", allows)
+
+    def test_allowlist_written_with_views(self):
+        Path("compile_commands.json").write_text("[]")
+        self._run()
+        files = allowlist.read_allowlist()
+        self.assertEqual(files, ["compile_commands.json", "lib/l.c", "src/a/1.c", "src/a/2.c",
+                                 "src/b/1.c", "weave.yaml"])
+        mtime = os.stat(sync_ignore.ALLOWLIST_PATH).st_mtime_ns
+
+        # Unchanged views => allowlist untouched; a new view file => refreshed by the wrapper
+        self._run()
+        self.assertEqual(os.stat(sync_ignore.ALLOWLIST_PATH).st_mtime_ns, mtime)
+        Path("lib/m.c").touch()
+        self.assertIn("lib/m.c", allowlist.refresh(self.tmp_dir))
+        self.assertIn("lib/m.c", allowlist.read_allowlist())
+
+    def test_allowlist_follows_manifests(self):
+        self._run()
+        self.assertIn("lib/l.c", allowlist.read_allowlist())
+        # Manifests unchanged => no re-resolve without --resolve
+        with patch.object(sync_ignore.weave_glob, "resolve_views") as resolve:
+            self._run()
+        resolve.assert_not_called()
+
+        # A view re-resolved elsewhere rewrites its manifest => picked up
+        Path("lib/m.c").touch()
+        sync_ignore.weave_glob.resolve_views({"lib": ["lib/*.c"]})
+        self._run()
+        self.assertIn("lib/m.c", allowlist.read_allowlist())
+
+    def test_allowlist_includes_whitelist(self):
+        os.makedirs("docs/api")
+        for f in ["docs/api/x.md", "docs/y.md", "notes.txt"]:
+            Path(f).touch()
+        with open("weave.yaml", "a") as f:
+            f.write('whitelist: ["docs/", "notes.txt", "missing.c"]\n')
+        self._run("--resolve")
+        files = allowlist.read_allowlist()
+        for f in ["docs/api/x.md", "docs/y.md", "notes.txt", "lib/l.c"]:
+            self.assertIn(f, files)
+        self.assertNotIn("missing.c", files)
+        # Whitelist entries stay patterns in the .aiderignore
+        allows = self._allows()
+        self.assertIn("!docs/", allows)
+        self.assertNotIn("!docs/y.md", allows)
+
+    def test_aider_args_use_allow_only_ignore(self):
+        self._run()
+        files = allowlist.read_allowlist()
+        with patch("sys.argv", ["allowlist", "--no-refresh"]), patch("sys.stdout", new=io.StringIO()) as out, \
+             patch("sys.stderr", new=io.StringIO()):
+            allowlist.main()
+        self.assertEqual(out.getvalue().splitlines(),
+                         ["--map-tokens", "0", "--aiderignore", allowlist.IGNORE_PATH])
+        # No per-file arguments (files stay editable and out of the chat), any list size
+        self.assertFalse(any(f in out.getvalue().splitlines() for f in files))
+        rules = Path(allowlist.IGNORE_PATH).read_text().splitlines()
+        self.assertEqual(rules[1], "*")
+        for rule in ["!lib/", "!src/a/", "!src/b/1.c", "!weave.yaml", "!.mission-context/"]:
+            self.assertIn(rule, rules)
+        self.assertNotIn("!src/b/", rules)
+
+    def test_empty_allowlist_warns(self):
+        os.remove("weave.yaml")
+        with patch("sys.argv", ["allowlist"]), patch("sys.stdout", new=io.StringIO()) as out, \
+             patch("sys.stderr", new=io.StringIO()) as err:
+            with self.assertRaises(SystemExit):
+                allowlist.main()
+        self.assertEqual(out.getvalue(), "")
+        self.assertIn("scan the full tree", err.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
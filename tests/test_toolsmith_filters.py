@@ -0,0 +1,122 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+
+import toolsmith_local
+
+class TestFilterPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filters = os.path.join(self.tmp_dir, "filters")
+        os.makedirs(self.filters)
+        toolsmith_local._FILTER_CACHE.clear()
+        patcher = patch.object(toolsmith_local, "log")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, code, mtime=None):
+        path = os.path.join(self.filters, name)
+        with open(path, "w") as f:
+            f.write(code)
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    def test_filters_compile_once_until_changed(self):
+        self._write("a.py", "def filter(lines): return (l for l in lines if 'noise' not in l)\n", 1000)
+        with patch("builtins.compile", wraps=compile) as compiled:
+            self.assertEqual(list(toolsmith_local.filter_lines(["ok", "noise"], self.filters)), ["ok"])
+            self.assertEqual(list(toolsmith_local.filter_lines(["ok", "noise"], self.filters)), ["ok"])
+            self.assertEqual(compiled.call_count, 1)
+            self._write("a.py", "def filter(lines): return (l.upper() for l in lines)\n", 2000)
+            self.assertEqual(list(toolsmith_local.filter_lines(["ok"], self.filters)), ["OK"])
+            self.assertEqual(compiled.call_count, 2)
+
+    def test_pipeline_streams(self):
+        # Streaming is opt-in: a generator function, or filter.streaming = True
+        self._write("a.py", "def filter(lines):\n    for l in lines:\n        if int(l) % 2: yield l\n")
+        self._write("b.py", "def filter(lines): return (str(int(l) * 10) for l in lines)\nfilter.streaming = True\n")
+        pulled = []
+        def source():
+            for i in range(10 ** 9):
+                pulled.append(i)
+                yield f"{i}\n"
+        out = toolsmith_local.filter_lines(source(), self.filters)
+        self.assertEqual([next(out) for _ in range(3)], ["10", "30", "50"])
+        # Only what was needed for three output lines was read
+        self.assertEqual(len(pulled), 6)
+        out.close()
+        self.assertEqual(set(toolsmith_local.FILTER_STATS), {"read", "a.py", "b.py"})
+
+    def test_list_filters_and_errors(self):
+        self._write("a.py", "def filter(lines): return [l for l in lines if 'info' not in l]\n")
+        self._write("b.py", "def filter(lines):\n    for l in lines:\n        if l == 'boom': raise ValueError('bad')\n        yield l\n")
+        self._write("c.py", "def filter(:\n")
+        out = list(toolsmith_local.filter_lines(["line1", "info", "boom", "line3"], self.filters))
+        # A broken filter lets all of its input through and the error is appended
+        self.assertEqual(out[:-1], ["line1", "boom", "line3", "[Filter Error b.py]: bad"])
+        self.assertTrue(out[-1].startswith("[Filter Error c.py]: "))
+
+    def test_plain_filters_get_a_list(self):
+        self._write("a.py", "def filter(lines): return lines[-2:] + [str(len(lines))]\n")
+        self._write("b.py", "def filter(lines):\n    lines.append('seen')\n    return [l for l in lines if l != lines[0]] + [1 / 0]\n")
+        out = list(toolsmith_local.filter_lines(["x", "y", "z"], self.filters))
+        self.assertEqual(out, ["y", "z", "3", "seen", "[Filter Error b.py]: division by zero"])
+
+    def test_replay_streams_log_through_filters(self):
+        repo = os.path.join(self.tmp_dir, "repo")
+        os.makedirs(os.path.join(repo, ".ddd", "filters"))
+        with open(os.path.join(repo, ".ddd", "last_run.log"), "w") as f:
+            f.write("line1\nnoise\nline3\n")
+        with open(os.path.join(repo, ".ddd", "filters", "n.py"), "w") as f:
+            f.write("def filter(lines): return (l for l in lines if 'noise' not in l)\n")
+        with patch.object(toolsmith_local, "REPO_ROOT", repo):
+            self.assertEqual(toolsmith_local.process_command("replay logs", repo), "Replay Output: line1\nline3")
+            self.assertTrue(toolsmith_local.process_command("filter stats", repo).startswith("Filter Stats: read "))
+
+class TestStreamedVerification(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, ".ddd"))
+        self.log_path = os.path.join(self.tmp_dir, ".ddd", "last_run.log")
+        patcher = patch.object(toolsmith_local, "log")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _set_command(self, cmd):
+        with open(os.path.join(self.tmp_dir, ".ddd", "config.json"), "w") as f:
+            json.dump({"verification_command": cmd}, f)
+
+    def test_stream_shell_writes_log_and_heartbeats(self):
+        beats = []
+        code, count = toolsmith_local.stream_shell("echo out; echo err >&2; sleep 0.3; exit 3", self.log_path,
+                                                   cwd=self.tmp_dir, progress=beats.append, interval=0.05)
+        self.assertEqual((code, count), (3, 2))
+        with open(self.log_path) as f:
+            self.assertEqual(f.read(), "out\nerr\n")
+        self.assertTrue(beats)
+        self.assertIn("2 lines", beats[-1])
+
+    def test_verification_acks_filtered_tail(self):
+        self._set_command("seq 1 10; exit 2")
+        with patch.object(toolsmith_local, "REPO_ROOT", self.tmp_dir), patch.object(toolsmith_local, "TAIL_LINES", 3):
+            reply = toolsmith_local.process_command("run verification", self.tmp_dir)
+        self.assertEqual(reply, f"Verification Output: Error (exit 2): [... 7 earlier lines in {self.log_path}]\n8\n9\n10")
+        with open(self.log_path) as f:
+            self.assertEqual(len(f.read().splitlines()), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -72,5 +72,51 @@ class TestWeave(unittest.TestCase):
         finally:
             os.chdir(cwd)
 
+    def test_expand_parses_db_once(self):
+        """--expand parses the DB once and adds the headers actually #included."""
+        import c_context
+        c_context._DB_CACHE.clear()
+
+        os.makedirs(os.path.join(self.tmp_dir, "inc"))
+        with open(os.path.join(self.tmp_dir, "inc", "hal.h"), "w") as f:
+            f.write('#include "hal_regs.h"\n#include <stdint.h>\n')
+        with open(os.path.join(self.tmp_dir, "inc", "hal_regs.h"), "w") as f:
+            f.write('#include "hal_bits.h"\n')
+        Path(os.path.join(self.tmp_dir, "inc", "hal_bits.h")).touch()
+        Path(os.path.join(self.tmp_dir, "inc", "unused.h")).touch()
+
+        db = []
+        for name in ["a.c", "b.c", "c.c"]:
+            with open(os.path.join(self.tmp_dir, name), "w") as f:
+                f.write('#include "hal.h"\n' if name == "a.c" else "int x;\n")
+            db.append({"directory": self.tmp_dir, "file": os.path.join(self.tmp_dir, name),
+                       "command": f"cc -Iinc -DUSE_{name[0].upper()} -c {name}"})
+        with open(os.path.join(self.tmp_dir, "compile_commands.json"), "w") as f:
+            json.dump(db, f)
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        try:
+            with patch('c_context.json.load', wraps=json.load) as mock_load, \
+                 patch('sys.stderr', new=MagicMock()):
+                files = weave.expand_c_context(["a.c", "b.c", "c.c", "notes.txt"], self.tmp_dir)
+                with open(os.path.join(".mission", "gen", "active_context.md")) as f:
+                    card = f.read()
+                shallow = weave.expand_c_context(["a.c"], self.tmp_dir, depth=2)
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual(mock_load.call_count, 1)
+        # Concrete headers, followed transitively; no include directories
+        self.assertNotIn("inc", files)
+        for header in ["inc/hal.h", "inc/hal_regs.h", "inc/hal_bits.h"]:
+            self.assertIn(header, files)
+        self.assertNotIn("inc/unused.h", files)
+        self.assertIn("inc/hal_regs.h", shallow)
+        self.assertNotIn("inc/hal_bits.h", shallow)
+        self.assertIn(os.path.join(".mission", "gen", "active_context.md"), files)
+        for macro in ["USE_A", "USE_B", "USE_C"]:
+            self.assertIn(macro, card)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import weave_config
+
+class TestWeaveConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        weave_config._MEMO.clear()
+        with open("weave.yaml", "w") as f:
+            f.write("views:\n  app: ['src/*.c']\n")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+        weave_config._MEMO.clear()
+
+    def _count_parses(self):
+        real = weave_config.yaml.load
+        calls = []
+        def counting(stream, Loader):
+            calls.append(stream.name)
+            return real(stream, Loader=Loader)
+        return patch.object(weave_config.yaml, "load", side_effect=counting), calls
+
+    def test_search_order(self):
+        self.assertEqual(weave_config.find_config(), "weave.yaml")
+        os.makedirs(".weaves")
+        Path(".weaves/weave.yaml").write_text("views: {}\n")
+        self.assertEqual(weave_config.find_config(), os.path.join(".weaves", "weave.yaml"))
+        self.assertEqual(weave_config.find_config(self.tmp_dir), os.path.join(self.tmp_dir, ".weaves", "weave.yaml"))
+        self.assertEqual(weave_config.load_config(), {"views": {}})
+
+    def test_memo_and_sidecar_reuse(self):
+        patcher, calls = self._count_parses()
+        with patcher:
+            config = weave_config.load_config()
+            self.assertEqual(config, {"views": {"app": ["src/*.c"]}})
+            self.assertEqual(weave_config.load_config(), config)
+            self.assertEqual(len(calls), 1)
+
+            # New process: memo is empty, the sidecar serves the parsed config
+            weave_config._MEMO.clear()
+            self.assertEqual(weave_config.load_config(), config)
+            self.assertEqual(len(calls), 1)
+        self.assertTrue(os.path.exists(weave_config.SIDECAR_PATH))
+
+    def test_edit_invalidates_cache(self):
+        weave_config.load_config()
+        with open("weave.yaml", "w") as f:
+            f.write("views:\n  app: ['src/*.c', 'inc/*.h']\n")
+        weave_config._MEMO.clear()
+        self.assertEqual(weave_config.load_config()["views"]["app"], ["src/*.c", "inc/*.h"])
+
+    def test_unmarshalable_and_invalid_configs(self):
+        # YAML dates cannot be marshaled: served from the parser, no sidecar
+        Path("weave.yaml").write_text("created: 2024-01-01\n")
+        self.assertIn("created", weave_config.load_config())
+        self.assertFalse(os.path.exists(weave_config.SIDECAR_PATH))
+
+        Path("weave.yaml").write_text("views: [unclosed\n")
+        self.assertEqual(weave_config.load_config(), {})
+
+if __name__ == '__main__':
+    unittest.main()
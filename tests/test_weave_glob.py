@@ -0,0 +1,114 @@
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import weave_glob
+
+PATTERNS = [
+    "src/**", "**", "**/*.c", "src/**/*.c", "src/*", "src/*/", "src/.*", "*/a",
+    "src/a", "src/a/", "src/**/", ".*/*.c", "nope/*", "./src/*.c", "src/[ax]*",
+    "src/?.c", "**/a/**", "*", "**/", "src/*/**", "**/**", "src/**/**/*.c", ".top/**", "**/.h/*",
+]
+
+class TestWeaveGlob(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        for d in ["src/a/.h", "src/.hid", ".top", "lib/deep/er", ".weaves/cache"]:
+            os.makedirs(d)
+        for f in ["src/x.c", "src/a/y.c", "src/a/.h/z.c", "src/.hid/q.c", ".top/t.c", "r.c",
+                  "src/.dot.c", "lib/deep/er/w.c"]:
+            Path(f).touch()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def _count_scandir(self):
+        real = os.scandir
+        calls = []
+        def counting(path="."):
+            calls.append(path)
+            return real(path)
+        return patch("os.scandir", side_effect=counting), calls
+
+    def test_matches_glob_semantics(self):
+        for pattern in PATTERNS:
+            matches = weave_glob.resolve_patterns([pattern])
+            self.assertEqual(sorted(matches), sorted(set(glob.glob(pattern, recursive=True))), pattern)
+
+    def test_manifest_skips_walk_when_unchanged(self):
+        patterns = ["src/**/*.c", "lib/**/*.c", "r.c"]
+        first = weave_glob.resolve_view("core", patterns)
+        self.assertEqual(first, ["lib/deep/er/w.c", "r.c", "src/a/y.c", "src/x.c"])
+
+        patcher, calls = self._count_scandir()
+        with patcher:
+            self.assertEqual(weave_glob.resolve_view("core", patterns), first)
+        self.assertEqual(calls, [])
+
+    def test_only_changed_directories_rescanned(self):
+        patterns = ["src/**/*.c", "lib/**/*.c"]
+        weave_glob.resolve_view("core", patterns)
+
+        Path("lib/deep/er/new.c").touch()
+        patcher, calls = self._count_scandir()
+        with patcher:
+            files = weave_glob.resolve_view("core", patterns)
+        self.assertIn("lib/deep/er/new.c", files)
+        self.assertEqual(calls, [os.path.join("lib", "deep", "er")])
+
+        # Edited patterns still reuse the cached listings
+        patcher, calls = self._count_scandir()
+        with patcher:
+            files = weave_glob.resolve_view("core", ["src/*.c"])
+        self.assertEqual(files, ["src/x.c"])
+        self.assertEqual(calls, [])
+
+    def test_refresh_and_missing_base(self):
+        self.assertEqual(weave_glob.resolve_view("later", ["gen/*.c"]), [])
+        os.makedirs("gen")
+        Path("gen/out.c").touch()
+        self.assertEqual(weave_glob.resolve_view("later", ["gen/*.c"]), ["gen/out.c"])
+
+        patcher, calls = self._count_scandir()
+        with patcher:
+            weave_glob.resolve_view("later", ["gen/*.c"], refresh=True)
+        self.assertEqual(calls, ["gen"])
+
+    def test_views_resolved_in_one_pruned_walk(self):
+        views = {
+            "app": ["src/**/*.c", "src/a/*.c"],
+            "lib": ["lib/deep/**/*.c"],
+            "top": ["*.c", ".top/*.c"],
+        }
+        patcher, calls = self._count_scandir()
+        with patcher:
+            resolved = weave_glob.resolve_views(views)
+        self.assertEqual(resolved["app"], ["src/a/y.c", "src/x.c"])
+        self.assertEqual(resolved["lib"], ["lib/deep/er/w.c"])
+        self.assertEqual(resolved["top"], [".top/t.c", "r.c"])
+
+        # Every directory listed at most once; hidden dirs under '**' are pruned
+        self.assertEqual(len(calls), len(set(calls)))
+        self.assertNotIn(os.path.join("src", "a", ".h"), calls)
+        self.assertNotIn(os.path.join("src", ".hid"), calls)
+
+        # One view changed: served views are untouched, the stale one re-scans its dir only
+        Path("lib/deep/er/v.c").touch()
+        patcher, calls = self._count_scandir()
+        with patcher:
+            resolved = weave_glob.resolve_views(views)
+        self.assertEqual(resolved["lib"], ["lib/deep/er/v.c", "lib/deep/er/w.c"])
+        self.assertEqual(calls, [os.path.join("lib", "deep", "er")])
+
+if __name__ == '__main__':
+    unittest.main()
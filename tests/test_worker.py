@@ -0,0 +1,70 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Add tools/lib to path
+sys.path.append(str(Path(__file__).parent.parent / "tools" / "lib"))
+import worker
+import worker_client
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        # Short path: Unix socket paths are limited to ~100 bytes
+        self.tmp_dir = tempfile.mkdtemp(dir="/tmp")
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir)
+        with open("weave.yaml", "w") as f:
+            f.write("views:\n  app: ['src/*.c']\n")
+        os.makedirs("src")
+        Path("src/a.c").touch()
+        self.sock = os.path.join(self.tmp_dir, worker.SOCKET_PATH)
+        ready = threading.Event()
+        self.thread = threading.Thread(target=worker.serve, args=(self.tmp_dir, self.sock, 60, ready), daemon=True)
+        self.thread.start()
+        self.assertTrue(ready.wait(10))
+
+    def tearDown(self):
+        worker.stop(self.sock)
+        self.thread.join(5)
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmp_dir)
+
+    def _request(self, tool, argv):
+        out, err = io.StringIO(), io.StringIO()
+        code = worker_client.request(self.sock, tool, argv, out, err)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_runs_tools_in_process(self):
+        code, out, _ = self._request("weave", ["hello"])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out)["message"], "Hello Weave")
+
+        code, out, _ = self._request("weave", ["get", "app", "--json"])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out), ["src/a.c"])
+
+        # Exit codes and stderr come back as-is; argv/cwd are restored afterwards
+        code, _, err = self._request("weave", ["get", "nope"])
+        self.assertEqual(code, 1)
+        self.assertIn("View 'nope' not found", err)
+        self.assertEqual(os.getcwd(), self.tmp_dir)
+
+    def test_unknown_tool_and_status(self):
+        self.assertEqual(self._request("dispatch", [])[0], worker.EX_TEMPFAIL)
+        self.assertEqual(worker.ping(self.sock)["root"], self.tmp_dir)
+
+    def test_fallback_when_unavailable(self):
+        worker.stop(self.sock)
+        self.thread.join(5)
+        self.assertFalse(os.path.exists(self.sock))
+        self.assertEqual(self._request("weave", ["hello"])[0], worker.EX_TEMPFAIL)
+
+if __name__ == '__main__':
+    unittest.main()
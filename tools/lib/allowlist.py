@@ -0,0 +1,77 @@
+import os
+import sys
+import argparse
+from pathlib import Path
+
+import weave_glob
+import sync_ignore
+
+# Allow-only ignore file handed to Aider: it only considers the allowlist files,
+# which stay editable and are not added to the chat
+IGNORE_PATH = os.path.join(".mission", "gen", "allowlist.aiderignore")
+# Also allowed: the launchers pass plans and the journal from here
+LAUNCHER_WHITELIST = ["!.mission-context/"]
+
+def refresh(repo_root):
+    """Re-resolves the views (manifest-cached) and rewrites the allowlist if it changed."""
+    config = sync_ignore.load_config(repo_root)
+    resolved = weave_glob.resolve_views(sync_ignore.allowlist_views(config))
+    sync_ignore.refresh_allowlist(config, resolved)
+    return sync_ignore.build_allowlist(resolved)
+
+def read_allowlist(path=sync_ignore.ALLOWLIST_PATH):
+    try:
+        with open(path, 'r') as f:
+            return [line.rstrip("\n") for line in f if line.strip() and not line.startswith(sync_ignore.FINGERPRINT_PREFIX)]
+    except OSError:
+        return None
+
+def write_ignore(files, path=IGNORE_PATH):
+    """
+    Writes an ignore file that ignores everything but files (collapsed into '!dir/'
+    rules where a directory is fully allowed) and the system entries. Returns True
+    if written.
+    """
+    rules = sync_ignore.collapse_dirs(files) | set(sync_ignore.SYSTEM_WHITELIST) | set(LAUNCHER_WHITELIST)
+    content = "# Auto-generated by allowlist. Do not edit.\n*\n"
+    content += "".join(f"{rule}\n" for rule in sorted(rules))
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
+
+def aider_args(ignore_path=IGNORE_PATH):
+    """Limits Aider to the allowlist and disables the repo map (no full-tree scan at startup)."""
+    return ["--map-tokens", "0", "--aiderignore", ignore_path]
+
+def main():
+    parser = argparse.ArgumentParser(description="Print launcher arguments for the precomputed allowlist (one per line)")
+    parser.add_argument("--no-refresh", action="store_true", help="Use the existing allowlist as-is")
+    parser.add_argument("--list", action="store_true", help="Print the files instead of aider arguments")
+    args = parser.parse_args()
+
+    repo_root = Path(os.getcwd()).resolve()
+    files = read_allowlist() if args.no_refresh else refresh(repo_root)
+    if not files:
+        print("⚠️  Allowlist empty or missing (define views in weave.yaml). Aider will scan the full tree.", file=sys.stderr)
+        sys.exit(0)
+
+    if args.list:
+        for f in files:
+            print(f)
+        return
+    write_ignore(files)
+    print(f"📋 Allowlist: {len(files)} files (via {IGNORE_PATH})", file=sys.stderr)
+    for line in aider_args():
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,309 @@
 import sys
 import os
+import json
+import argparse
 
-def apply_patch(input_content):
-    lines = input_content.splitlines(keepends=True)
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER_MARKER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+def parse_patch(input_content):
+    """
+    Parses a stream of SEARCH/REPLACE blocks. Each block applies to the filename line
+    last seen before it, so one header may be followed by several blocks:
+
+        path/to/file.c
+        <<<<<<< SEARCH
+        old
+        =======
+        new
+        >>>>>>> REPLACE
 
-    # 1. Validation and Header Parsing
+    Markdown fences around blocks are ignored. Returns (blocks, error) where blocks is
+    a list of {"file", "search", "replace", "line"} and error is None or a message.
+    """
+    lines = input_content.splitlines(keepends=True)
     if not lines:
-        print("Error: Empty input provided.", file=sys.stderr)
-        return False
+        return [], "Empty input provided."
 
-    target_file = lines[0].strip()
-    if not target_file:
-        print("Error: First line (filename) is empty.", file=sys.stderr)
-        return False
+    blocks = []
+    target_file = None
+    i = 0
+    while i < len(lines):
+        clean_line = lines[i].strip()
+        if clean_line == SEARCH_MARKER:
+            if not target_file:
+                return blocks, f"SEARCH block at line {i + 1} has no filename line before it."
+            start = i
+            divider_idx = replace_idx = -1
+            for j in range(i + 1, len(lines)):
+                marker = lines[j].strip()
+                if marker == DIVIDER_MARKER and divider_idx == -1:
+                    divider_idx = j
+                elif marker == REPLACE_MARKER:
+                    replace_idx = j
+                    break
+                elif marker == SEARCH_MARKER:
+                    break
+            if divider_idx == -1 or replace_idx == -1:
+                return blocks, f"Malformed patch for '{target_file}' at line {start + 1}. Missing standard markers."
+            blocks.append({
+                "file": target_file,
+                "search": "".join(lines[start + 1 : divider_idx]),
+                "replace": "".join(lines[divider_idx + 1 : replace_idx]),
+                "line": start + 1,
+            })
+            i = replace_idx + 1
+            continue
+        if clean_line in (DIVIDER_MARKER, REPLACE_MARKER):
+            return blocks, f"Markers are out of order at line {i + 1}."
+        if clean_line and not clean_line.startswith("```"):
+            target_file = clean_line
+        i += 1
 
-    # 2. Locate Markers
-    try:
-        search_idx = -1
-        divider_idx = -1
-        replace_idx = -1
-
-        for i, line in enumerate(lines):
-            clean_line = line.strip()
-            if clean_line == "<<<<<<< SEARCH":
-                search_idx = i
-            elif clean_line == "=======":
-                divider_idx = i
-            elif clean_line == ">>>>>>> REPLACE":
-                replace_idx = i
-                break
-
-        if search_idx == -1 or divider_idx == -1 or replace_idx == -1:
-            print(f"Error: Malformed patch for '{target_file}'. Missing standard markers.", file=sys.stderr)
-            return False
-            
-        # Verify marker order
-        if not (search_idx < divider_idx < replace_idx):
-            print("Error: Markers are out of order.", file=sys.stderr)
-            return False
-
-        # 3. Extract Blocks
-        # We assume the content *between* markers is the payload
-        search_block = "".join(lines[search_idx + 1 : divider_idx])
-        replace_block = "".join(lines[divider_idx + 1 : replace_idx])
+    if not blocks:
+        return blocks, f"Malformed patch for '{target_file}'. Missing standard markers."
+    return blocks, None
 
-    except Exception as e:
-        print(f"Error parsing patch structure: {e}", file=sys.stderr)
-        return False
+# Fallback matching levels, tried in order after an exact match fails
+NORMALIZERS = [
+    ("rstrip", lambda line: line.rstrip()),                # Trailing whitespace / line endings
+    ("whitespace", lambda line: " ".join(line.split())),   # Indentation and inner spacing
+]
+MAX_CANDIDATES = 10 # Locations listed in ambiguity reports
 
-    # 4. Apply to File
-    if not os.path.exists(target_file):
-        print(f"Error: Target file '{target_file}' does not exist.", file=sys.stderr)
-        return False
+def _line_offsets(lines):
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+def _fuzzy_match(content, search, level, normalize):
+    """
+    Line-anchored match under a normalization. Content lines are indexed by their
+    normalized text; only positions of the rarest search line are verified, so the
+    cost stays linear in the file size. Candidates are ranked by how many lines
+    match verbatim.
+    """
+    search_lines = search.splitlines()
+    while search_lines and not search_lines[0].strip():
+        search_lines.pop(0)
+    while search_lines and not search_lines[-1].strip():
+        search_lines.pop()
+    if not search_lines:
+        return None
+    lines = content.splitlines(keepends=True)
+    norm = [normalize(line) for line in lines]
+    index = {}
+    for i, key in enumerate(norm):
+        index.setdefault(key, []).append(i)
+
+    wanted = [normalize(line) for line in search_lines]
+    postings = [index.get(key, ()) for key in wanted]
+    anchor = min(range(len(wanted)), key=lambda k: len(postings[k]))
+    candidates = []
+    for pos in postings[anchor]:
+        start = pos - anchor
+        if start < 0 or start + len(wanted) > len(lines):
+            continue
+        if all(norm[start + k] == wanted[k] for k in range(len(wanted))):
+            verbatim = sum(lines[start + k].rstrip("\r\n") == search_lines[k] for k in range(len(wanted)))
+            candidates.append((verbatim, start))
+    if not candidates:
+        return None
+
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+    offsets = _line_offsets(lines)
+    best_score, best = candidates[0]
+    return {
+        "level": level,
+        "start": offsets[best],
+        "end": offsets[best + len(wanted)],
+        "line": best + 1,
+        "occurrences": len(candidates),
+        "candidates": [start + 1 for _, start in candidates[:MAX_CANDIDATES]],
+        # A tie for the best rank cannot be resolved safely
+        "ambiguous": len(candidates) > 1 and candidates[1][0] == best_score,
+    }
+
+def find_match(content, search):
+    """
+    Locates a SEARCH block: exact text first, then line-anchored matches ignoring
+    trailing whitespace, then ignoring all whitespace differences. Returns None or
+    {"level", "start", "end", "line", "occurrences", "candidates", "ambiguous"}.
+    Exact duplicates resolve to the first occurrence (as before); fuzzy ties are
+    ambiguous.
+    """
+    start = content.find(search)
+    if start != -1:
+        # One pass in total: count only from the second occurrence on
+        second = content.find(search, start + 1) if search else start + 1
+        occurrences = 1 if second == -1 else 1 + content.count(search, second)
+        return {
+            "level": "exact",
+            "start": start,
+            "end": start + len(search),
+            "line": content.count("\n", 0, start) + 1,
+            "occurrences": occurrences,
+            "candidates": [],
+            "ambiguous": False,
+        }
+    for level, normalize in NORMALIZERS:
+        match = _fuzzy_match(content, search, level, normalize)
+        if match:
+            return match
+    return None
 
+def _write_atomic(path, content):
+    """
+    Writes content next to path and renames it into place, keeping path's mode.
+    Symlinks are resolved first, so the link stays and its target is updated.
+    """
+    path = os.path.realpath(path)
+    tmp = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.{os.getpid()}.tmp")
     try:
-        with open(target_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.chmod(tmp, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp, path)
+    except Exception:
+        # Never leave the temporary file next to the target
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
 
-        if search_block not in content:
-            print(f"Error: SEARCH block not found in '{target_file}'.", file=sys.stderr)
-            return False
+def _commit(originals, patched):
+    """
+    Renames every patched file into place. If any write fails, files already replaced
+    are restored to their original content, so the tree is never left half-patched.
+    """
+    done = []
+    try:
+        for path, content in patched.items():
+            _write_atomic(path, content)
+            done.append(path)
+    except Exception:
+        for path in done:
+            try:
+                _write_atomic(path, originals[path])
+            except Exception as e:
+                print(f"Error: Rollback of '{path}' failed: {e}", file=sys.stderr)
+        raise
 
-        if content.count(search_block) > 1:
-            print(f"Warning: Multiple occurrences found in '{target_file}'. Patching first occurrence only.", file=sys.stderr)
+def apply_patches(input_content):
+    """
+    Applies every block of a patch stream as one transaction: blocks are grouped per
+    file and applied in order in memory, and files are only written if all blocks
+    apply. Returns a report: {"ok", "error", "blocks": [...], "files": [...]}.
+    """
+    blocks, error = parse_patch(input_content)
+    report = {"ok": False, "error": error, "blocks": [], "files": []}
+    if error:
+        return report
 
-        new_content = content.replace(search_block, replace_block, 1)
+    # Keyed by real path: './x.c', 'x.c' and symlinks to it are one file
+    originals = {}
+    patched = {}
+    names = {} # real path -> spelling first used in the patch
+    failed = False
+    for index, block in enumerate(blocks):
+        target_file = block["file"]
+        result = {"index": index, "file": target_file, "line": block["line"]}
+        report["blocks"].append(result)
 
-        with open(target_file, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-            
-        print(f"✅ Success: Patched '{target_file}'")
-        return True
+        key = os.path.realpath(target_file)
+        if key not in patched:
+            if not os.path.exists(target_file):
+                result.update(status="error", message=f"Target file '{target_file}' does not exist.")
+                failed = True
+                continue
+            try:
+                with open(target_file, 'r', encoding='utf-8') as f:
+                    originals[key] = patched[key] = f.read()
+                names[key] = target_file
+            except Exception as e:
+                result.update(status="error", message=f"Error reading '{target_file}': {e}")
+                failed = True
+                continue
+
+        content = patched[key]
+        match = find_match(content, block["search"])
+        if not match:
+            result.update(status="not_found", occurrences=0, message=f"SEARCH block not found in '{target_file}'.")
+            failed = True
+            continue
+        result.update(match=match["level"], at_line=match["line"], occurrences=match["occurrences"])
+        if match["candidates"]:
+            result["candidates"] = match["candidates"]
+        if match["ambiguous"]:
+            lines = ", ".join(str(l) for l in match["candidates"])
+            result.update(status="ambiguous",
+                          message=f"SEARCH block matches ({match['level']}) equally well at lines {lines} of '{target_file}'.")
+            failed = True
+            continue
+        if match["occurrences"] > 1:
+            if match["level"] == "exact":
+                result["message"] = f"Multiple occurrences found in '{target_file}'. Patching first occurrence only."
+            else:
+                result["message"] = f"Several {match['level']} matches in '{target_file}'. Patched the closest, at line {match['line']}."
+        elif match["level"] != "exact":
+            result["message"] = f"Matched '{target_file}' at line {match['line']} ignoring {'trailing ' if match['level'] == 'rstrip' else ''}whitespace."
+        patched[key] = content[:match["start"]] + block["replace"] + content[match["end"]:]
+        result["status"] = "applied"
+
+    if failed:
+        report["error"] = "Patch not applied: some blocks failed (no files were changed)."
+        return report
 
+    changed = {path: content for path, content in patched.items() if content != originals[path]}
+    try:
+        _commit(originals, changed)
     except Exception as e:
-        print(f"Error writing to file: {e}", file=sys.stderr)
+        report["error"] = f"Error writing to file: {e}"
+        return report
+
+    report["ok"] = True
+    report["files"] = [names[key] for key in patched]
+    return report
+
+def apply_patch(input_content):
+    """Applies a patch stream, printing per-block results. Returns True if every block applied."""
+    report = apply_patches(input_content)
+    for result in report["blocks"]:
+        status = result.get("status")
+        if status == "applied":
+            if result.get("message"):
+                print(f"Warning: {result['message']}", file=sys.stderr)
+        elif status:
+            print(f"Error: {result['message']}", file=sys.stderr)
+    if report["error"]:
+        print(f"Error: {report['error']}", file=sys.stderr)
         return False
+    for target_file in report["files"]:
+        print(f"✅ Success: Patched '{target_file}'")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply SEARCH/REPLACE blocks (any number of files) from stdin")
+    parser.add_argument("--json", action="store_true", help="Print per-block results as JSON")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     # Read all input from stdin (allows piping)
     input_data = sys.stdin.read()
     if not input_data:
-        print("Usage: cat patch.txt | tools/bin/apply_patch")
+        print("Usage: cat patch.txt | tools/bin/apply_patch [--json]")
         sys.exit(1)
-    
-    success = apply_patch(input_data)
+
+    if args.json:
+        report = apply_patches(input_data)
+        print(json.dumps(report, indent=2))
+        success = report["ok"]
+    else:
+        success = apply_patch(input_data)
     if not success:
         sys.exit(1)
+
+if __name__ == "__main__":
+    main()
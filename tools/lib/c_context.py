@@ -2,24 +2,21 @@ import sys
 import os
 import json
 import shlex
-import yaml
 import re
+import threading
 from pathlib import Path
 
+import weave_config
+
+SOURCE_SUFFIXES = ['.c', '.cc', '.cpp', '.cxx']
+HEADER_SUFFIXES = ['.h', '.hh', '.hpp']
+
+# Parsed compilation DBs, memoized per process: (abs path, cwd) -> ((mtime_ns, size), index)
+_DB_CACHE = {}
+_DB_LOCK = threading.Lock()
+
 def load_config(repo_root):
-    config_paths = [
-        Path(repo_root) / ".weaves/weave.yaml",
-        Path(repo_root) / ".mission/weave.yaml",
-        Path(repo_root) / "weave.yaml",
-    ]
-    for path in config_paths:
-        if path.exists():
-            try:
-                with open(path, 'r') as f:
-                    return yaml.safe_load(f) or {}
-            except Exception:
-                pass
-    return {}
+    return weave_config.load_config(repo_root)
 
 def extract_macros(cmd_str):
     """Extracts -D definitions from a command string."""
@@ -37,6 +34,52 @@ def extract_macros(cmd_str):
         macros = re.findall(r'-D([a-zA-Z0-9_=\(\)]+)', cmd_str)
     return sorted(list(set(macros)))
 
+def load_db_index(db_path):
+    """
+    Loads a compilation DB and indexes it by file, once per process.
+    The result is memoized by path and reused while the file's mtime/size are unchanged.
+
+    Index:
+      by_file: raw and resolved 'file' strings -> [entry positions]
+      by_stem: (resolved parent dir, stem) of source entries -> [entry positions]
+    Returns None if the DB is missing or invalid.
+    """
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    key = (os.path.abspath(db_path), os.getcwd())
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _DB_LOCK:
+        hit = _DB_CACHE.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+
+    try:
+        with open(db_path, 'r') as f:
+            db = json.load(f)
+    except:
+        return None
+
+    by_file = {}
+    by_stem = {}
+    for i, entry in enumerate(db):
+        entry_file_str = entry.get("file", "")
+        by_file.setdefault(entry_file_str, []).append(i)
+        try:
+            entry_file_p = Path(entry_file_str).resolve()
+        except:
+            continue
+        if str(entry_file_p) != entry_file_str:
+            by_file.setdefault(str(entry_file_p), []).append(i)
+        if entry_file_p.suffix in SOURCE_SUFFIXES:
+            by_stem.setdefault((str(entry_file_p.parent), entry_file_p.stem), []).append(i)
+
+    index = {"entries": db, "by_file": by_file, "by_stem": by_stem}
+    with _DB_LOCK:
+        _DB_CACHE[key] = (stamp, index)
+    return index
+
 def get_compile_command(fpath, db_paths, required_flags=None):
     repo_root = Path(os.getcwd())
     abs_fpath = Path(fpath).resolve()
@@ -45,63 +88,39 @@ def get_compile_command(fpath, db_paths, required_flags=None):
 
     # 1. Harvest all candidates
     for db_path in db_paths:
-        if not os.path.exists(db_path):
-            continue
-            
-        try:
-            with open(db_path, 'r') as f:
-                db = json.load(f)
-        except:
+        index = load_db_index(db_path)
+        if index is None:
             continue
 
-        for i, entry in enumerate(db):
-            entry_file_str = entry.get("file", "")
-            
-            # 1. Try exact string match (normalized)
-            is_match = False
-            is_sibling = False
+        # 1. Exact match (raw string or resolved path)
+        exact = set(index["by_file"].get(str(abs_fpath), []))
+
+        # 2. Header Fallback: If target is header, look for sibling source
+        siblings = set()
+        if abs_fpath.suffix in HEADER_SUFFIXES:
+            siblings = set(index["by_stem"].get((str(abs_fpath.parent), abs_fpath.stem), [])) - exact
+
+        # Keep DB order, as a linear scan would
+        for i in sorted(exact | siblings):
+            entry = index["entries"][i]
+            is_match = i in exact
+            cmd_str = ""
+            if "command" in entry:
+                cmd_str = entry["command"]
+            elif "arguments" in entry:
+                cmd_str = " ".join(entry["arguments"])
             
-            if entry_file_str == str(abs_fpath):
-                 is_match = True
+            # Clone entry to avoid mutating original DB
+            # Override 'file' to match target header so valid DB entry is created
+            final_entry = entry.copy()
+            final_entry["file"] = str(abs_fpath)
             
-            # 2. Try resolved path comparison if not matched yet
-            if not is_match:
-                 try:
-                     entry_file_p = Path(entry_file_str).resolve()
-                     if entry_file_p == abs_fpath:
-                         is_match = True
-                 except:
-                     pass
-
-            # 3. Header Fallback: If target is header, look for sibling source
-            if not is_match and abs_fpath.suffix in ['.h', '.hh', '.hpp']:
-                 try:
-                     entry_file_p = Path(entry_file_str).resolve()
-                     if entry_file_p.parent == abs_fpath.parent and \
-                        entry_file_p.stem == abs_fpath.stem and \
-                        entry_file_p.suffix in ['.c', '.cc', '.cpp', '.cxx']:
-                             is_sibling = True
-                 except:
-                     pass
-
-            if is_match or is_sibling:
-                cmd_str = ""
-                if "command" in entry:
-                    cmd_str = entry["command"]
-                elif "arguments" in entry:
-                    cmd_str = " ".join(entry["arguments"])
-                
-                # Clone entry to avoid mutating original DB
-                # Override 'file' to match target header so valid DB entry is created
-                final_entry = entry.copy()
-                final_entry["file"] = str(abs_fpath)
-                
-                candidates.append({
-                    "entry": final_entry,
-                    "cmd_str": cmd_str,
-                    "score": 100 if is_match else 50,
-                    "type": "exact" if is_match else "sibling"
-                })
+            candidates.append({
+                "entry": final_entry,
+                "cmd_str": cmd_str,
+                "score": 100 if is_match else 50,
+                "type": "exact" if is_match else "sibling"
+            })
 
 
     total_candidates = len(candidates)
@@ -189,6 +208,42 @@ def extract_includes(entry, repo_root):
         
     return includes
 
+def get_context(target_file, db_paths, required_flags=None, repo_root=None):
+    """Resolves the compilation context of one file (the JSON document printed by main)."""
+    repo_root = repo_root or os.getcwd()
+    match, stats = get_compile_command(target_file, db_paths, required_flags)
+
+    if match:
+        entry = match["entry"]
+        cmd_str = match["cmd_str"]
+        includes = extract_includes(entry, repo_root)
+        macros = extract_macros(cmd_str)
+        
+        # Prepare full info
+        args = []
+        if "arguments" in entry:
+            args = entry["arguments"]
+        elif "command" in entry:
+            args = shlex.split(entry["command"])
+
+        return {
+            "file": target_file,
+            "found": True,
+            "includes": includes,
+            "macros": macros,
+            "arguments": args, # Full arguments for re-execution
+            "directory": entry.get("directory", repo_root),
+            "candidates": stats.get("candidates", []), # Expose all candidates
+            "stats": stats 
+        }
+    return {
+        "file": target_file,
+        "found": False,
+        "includes": [],
+        "macros": [],
+        "stats": stats
+    }
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: c_context.py <file> [--db <path>]")
@@ -256,43 +311,12 @@ def main():
     # Debug
 
 
-    match, stats = get_compile_command(target_file, db_paths, required_flags)
+    result = get_context(target_file, db_paths, required_flags, repo_root)
     
-    for w in stats["warnings"]:
+    for w in result["stats"]["warnings"]:
         print(w, file=sys.stderr)
 
-    if match:
-        entry = match["entry"]
-        cmd_str = match["cmd_str"]
-        includes = extract_includes(entry, repo_root)
-        macros = extract_macros(cmd_str)
-        
-        # Prepare full info
-        args = []
-        if "arguments" in entry:
-            args = entry["arguments"]
-        elif "command" in entry:
-            import shlex
-            args = shlex.split(entry["command"])
-
-        print(json.dumps({
-            "file": target_file,
-            "found": True,
-            "includes": includes,
-            "macros": macros,
-            "arguments": args, # Full arguments for re-execution
-            "directory": entry.get("directory", repo_root),
-            "candidates": stats.get("candidates", []), # Expose all candidates
-            "stats": stats 
-        }, indent=2))
-    else:
-        print(json.dumps({
-            "file": target_file,
-            "found": False,
-            "includes": [],
-            "macros": [],
-            "stats": stats
-        }, indent=2))
+    print(json.dumps(result, indent=2))
 
 if __name__ == "__main__":
     main()
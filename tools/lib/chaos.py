@@ -3,9 +3,11 @@ import sys
 import yaml
 import json
 import stat
+import random
+import argparse
+import multiprocessing
 from pathlib import Path
 
-# --- Configuration Constants ---
 # --- Configuration Constants ---
 APP_COMPILER = "/usr/bin/g++"
 APP_FLAGS = [
@@ -105,13 +107,172 @@ void {os.path.splitext(name)[0]}();
 #endif // {guard}
 """
 
+# --- Scale Mode ---
+# A plan with a `scale:` section describes a synthetic monorepo by its dimensions
+# instead of listing components. Every component draws from its own RNG, seeded from
+# (seed, component index), so output does not depend on worker count or order.
+SCALE_DEFAULTS = {
+    "components": 100,
+    "files_per_component": 50,
+    "headers_per_component": 0,   # 0 => one header per 5 sources
+    "component_deps": 4,          # Earlier components each one includes from
+    "include_fanout": 6,          # Project headers included per source
+    "duplicate_tus": 1,           # Compile DB entries per source (multi-target builds)
+    "sdk_headers": 500,           # Headers in the out-of-tree SDK
+    "sdk_fanout": 3,              # SDK headers included per source
+    "sdk_root": None,             # Default: <root>_sdk, next to the repo
+    "cpp_ratio": 0.3,             # Share of app_modern_cpp components
+    "workers": 0,                 # 0 => one per CPU
+}
+SDK_DIRS = 16 # SDK headers are spread over this many subdirectories
+
+def scale_spec(plan, root_dir, seed=None, workers=None):
+    spec = dict(SCALE_DEFAULTS)
+    spec.update(plan.get("scale") or {})
+    spec["seed"] = seed if seed is not None else plan.get("seed", 0)
+    spec["root"] = str(root_dir)
+    sdk_root = spec["sdk_root"] or f"{root_dir}_sdk"
+    spec["sdk_root"] = str(resolve_path(root_dir, sdk_root).resolve())
+    if not spec["headers_per_component"]:
+        spec["headers_per_component"] = max(1, spec["files_per_component"] // 5)
+    if workers is not None:
+        spec["workers"] = workers
+    spec["workers"] = spec["workers"] or os.cpu_count() or 1
+    return spec
+
+def component_dir(index):
+    return f"components/g{index // 100:03d}/c{index:05d}"
+
+def component_header(index, k):
+    return f"c{index:05d}_h{k:03d}.h"
+
+def sdk_header(k):
+    return f"sdk{k % SDK_DIRS:02d}/sdk_h{k:05d}.h"
+
+def _generate_sdk_dir(job):
+    """Writes the SDK headers of one subdirectory."""
+    spec, d = job
+    out_dir = Path(spec["sdk_root"]) / "include" / f"sdk{d:02d}"
+    ensure_dir(out_dir)
+    for k in range(d, spec["sdk_headers"], SDK_DIRS):
+        guard = f"SDK_H{k:05d}_H"
+        with open(out_dir / f"sdk_h{k:05d}.h", "w") as f:
+            f.write(f"#ifndef {guard}\n#define {guard}\n\n#define SDK_H{k:05d}_VERSION {k}\n"
+                    f"typedef struct {{ int id; int flags; }} sdk_h{k:05d}_t;\n\n#endif // {guard}\n")
+    return d
+
+def _generate_component(job):
+    """
+    Writes one component's sources and headers. Returns its compile DB entries,
+    already serialized (one JSON object per line), and how many there are.
+    """
+    spec, index = job
+    rng = random.Random(f"{spec['seed']}:component:{index}")
+    files = spec["files_per_component"]
+    n_headers = spec["headers_per_component"]
+    is_cpp = rng.random() < spec["cpp_ratio"]
+    deps = sorted(rng.sample(range(index), min(spec["component_deps"], index)))
+
+    comp_path = Path(spec["root"]) / component_dir(index)
+    sdk_include = Path(spec["sdk_root"]) / "include"
+    ensure_dir(comp_path / "src")
+    ensure_dir(comp_path / "include")
+
+    # Headers: declare the functions of the sources mapped to them (source j -> header j % n)
+    for k in range(n_headers):
+        guard = component_header(index, k).upper().replace(".", "_")
+        lines = [f"#ifndef {guard}", f"#define {guard}", ""]
+        if spec["sdk_headers"]:
+            lines.append(f"#include <{sdk_header(rng.randrange(spec['sdk_headers']))}>")
+        lines += [f"void c{index:05d}_f{j:04d}(void);" for j in range(k, files, n_headers)]
+        lines += ["", f"#endif // {guard}", ""]
+        with open(comp_path / "include" / component_header(index, k), "w") as f:
+            f.write("\n".join(lines))
+
+    # Headers a source may pull in: its own component's and its dependencies'
+    pool = [(index, k) for k in range(n_headers)] + [(d, k) for d in deps for k in range(n_headers)]
+    includes = [f"-I{comp_path / 'include'}"] + \
+               [f"-I{Path(spec['root']) / component_dir(d) / 'include'}" for d in deps]
+    if spec["sdk_headers"]:
+        includes.append(f"-I{sdk_include}")
+
+    ext = "cpp" if is_cpp else "c"
+    entries = []
+    for j in range(files):
+        src = f"src/f{j:04d}.{ext}"
+        picked = rng.sample(pool, min(spec["include_fanout"], len(pool)))
+        sdk_picked = rng.sample(range(spec["sdk_headers"]), min(spec["sdk_fanout"], spec["sdk_headers"]))
+        lines = [f"// Source: {component_dir(index)}/{src}", "#include <stdio.h>"]
+        lines += [f'#include "{component_header(d, k)}"' for d, k in picked]
+        lines += [f"#include <{sdk_header(k)}>" for k in sdk_picked]
+        lines += ["", f"void c{index:05d}_f{j:04d}(void) {{",
+                  f'    printf("c{index:05d}_f{j:04d} %d\\n", {rng.randrange(1 << 16)});', "}", ""]
+        with open(comp_path / src, "w") as f:
+            f.write("\n".join(lines))
+
+        abs_src = str(comp_path / src)
+        for t in range(spec["duplicate_tus"]):
+            out_obj = f"build/t{t}/{src}.o"
+            target = [f"-DCHAOS_TARGET={t}"] if spec["duplicate_tus"] > 1 else []
+            entry = {"directory": str(comp_path)}
+            if is_cpp:
+                entry["command"] = f"{APP_COMPILER} {' '.join(APP_FLAGS + target + includes)} -o {out_obj} -c {abs_src}"
+            else:
+                entry["arguments"] = [DRIVER_COMPILER] + DRIVER_FLAGS + target + includes + ["-c", "-o", out_obj, src]
+            entry["file"] = abs_src
+            entry["output"] = str(comp_path / out_obj)
+            entries.append(json.dumps(entry))
+    return ",\n".join(entries), len(entries)
+
+def _run_jobs(pool, fn, jobs):
+    """Ordered map over jobs, in-process when there is no pool."""
+    return pool.imap(fn, jobs) if pool else map(fn, jobs)
+
+def generate_scale(plan, root_dir, seed=None, workers=None):
+    """
+    Generates a synthetic monorepo from plan["scale"]. Components are written in
+    parallel and the compile DB is streamed to disk in component order, so memory
+    stays flat and the result is identical for a given seed.
+    """
+    spec = scale_spec(plan, root_dir, seed, workers)
+    total = spec["components"] * spec["files_per_component"]
+    print(f"   -> Scale: {spec['components']} components x {spec['files_per_component']} files "
+          f"({total} sources, {total * spec['duplicate_tus']} DB entries), seed {spec['seed']}, "
+          f"{spec['workers']} workers")
+    print(f"   -> SDK: {spec['sdk_headers']} headers in {spec['sdk_root']}")
+
+    db_path = root_dir / "compile_commands.json"
+    tmp_path = root_dir / "compile_commands.json.tmp"
+    pool = multiprocessing.Pool(spec["workers"]) if spec["workers"] > 1 else None
+    try:
+        for _ in _run_jobs(pool, _generate_sdk_dir, [(spec, d) for d in range(SDK_DIRS)]):
+            pass
+        written = 0
+        with open(tmp_path, "w") as db:
+            db.write("[\n")
+            jobs = ((spec, i) for i in range(spec["components"]))
+            for i, (fragment, count) in enumerate(_run_jobs(pool, _generate_component, jobs)):
+                if count:
+                    db.write((",\n" if written else "") + fragment)
+                    written += count
+                if (i + 1) % 100 == 0:
+                    print(f"      {i + 1}/{spec['components']} components, {written} DB entries")
+            db.write("\n]\n")
+        os.replace(tmp_path, db_path)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    print(f"   -> compile_commands.json: {written} entries")
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: chaos <plan.yaml>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate a synthetic C/C++ repository from a plan")
+    parser.add_argument("plan", help="Plan file (YAML): `components:` or a `scale:` section")
+    parser.add_argument("--seed", type=int, help="Override the plan's seed (scale mode)")
+    parser.add_argument("--workers", type=int, help="Override the worker count (scale mode)")
+    args = parser.parse_args()
 
-    plan_file = sys.argv[1]
-    with open(plan_file, 'r') as f:
+    with open(args.plan, 'r') as f:
         plan = yaml.safe_load(f)
 
     target_root = plan.get("root", ".")
@@ -121,6 +282,12 @@ def main():
     if not root_dir.exists():
         root_dir.mkdir(parents=True)
 
+    if plan.get("scale") is not None:
+        generate_scale(plan, root_dir, args.seed, args.workers)
+        write_configs(root_dir, plan)
+        print("✅ Chaos Generated Successfully.")
+        return
+
     # --- Pass 0: Build Header Map ---
     # Used to verify if an include path actually contains headers we know about
     header_map = {}
@@ -283,6 +450,11 @@ int main() {{
         with open(root_dir / "compile_commands.json", "w") as f:
             json.dump(root_compile_commands, f, indent=2)
 
+    write_configs(root_dir, plan)
+    print("✅ Chaos Generated Successfully.")
+
+def write_configs(root_dir, plan):
+    """Writes .ddd/config.json (unless present) and ignores the generated artifacts."""
     # Configs
     ddd_root = root_dir / ".ddd"
     ensure_dir(ddd_root)
@@ -311,7 +483,5 @@ int main() {{
                 f.write("\n")
             f.write("\n".join(missing_ignores) + "\n")
 
-    print("✅ Chaos Generated Successfully.")
-
 if __name__ == "__main__":
     main()
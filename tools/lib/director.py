@@ -1,11 +1,13 @@
 import os
 import sys
-import time
 import re
 import json
-from datetime import datetime
+import time
 from litellm import completion
 
+from journal import JournalTail, EnvelopeReader, reply_id
+from radio import Journal
+
 # --- Configuration ---
 LOG_FILE = os.environ.get("MISSION_JOURNAL", ".mission-context/mission_log.md")
 MODEL = os.environ.get("MODEL", "vertex_ai/gemini-1.5-pro")
@@ -17,49 +19,80 @@ YELLOW = "\033[1;33m"
 RED = "\033[0;31m"
 RESET = "\033[0m"
 
-def extract_timestamp(line):
-    match = re.search(r"\[(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})\]", line)
-    if match:
-        try:
-            return datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S")
-        except ValueError:
-            return None
-    return None
+# Opened before the first request is written, so no reply is missed:
+# structured replies come from the envelope stream, untagged ones (older
+# LocalSmith builds) from the Markdown log.
+_READER = None
+_TAIL = None
+
+def get_reader():
+    global _READER, _TAIL
+    if _READER is None:
+        _READER = EnvelopeReader(LOG_FILE, recipient="Director", from_end=True)
+        _TAIL = JournalTail(LOG_FILE, from_end=True)
+    return _READER
 
 def write_request(command):
-    now = datetime.now()
-    timestamp_str = now.strftime("%Y-%m-%dT%H:%M:%S")
-    entry = f"\n### [{timestamp_str}] [Director -> LocalSmith] [REQ] {command}\n"
-    
-    with open(LOG_FILE, "a") as f:
-        f.write(entry)
+    get_reader()
+    record = Journal(LOG_FILE).append("Director", "LocalSmith", "REQ", command, body={"command": command})
     
     print(f"{YELLOW}>> Signal Sent: {command}{RESET}")
-    return now
+    return record["id"]
+
+def _legacy_reply(line, pending):
+    """Request ID a Markdown ACK/ERR answers: its [RE:x] tag, or any pending one if untagged."""
+    if "[LocalSmith -> Director]" not in line or not ("[ACK]" in line or "[ERR]" in line):
+        return None
+    answered = reply_id(line)
+    if answered:
+        return answered if answered in pending else None
+    if "[ID:" in line:
+        return None # Tagged non-reply (e.g. 'Daemon Online')
+    return next(iter(pending), None)
 
-def wait_for_ack(start_time):
-    print(f"{BLUE}... Waiting for LocalSmith (timeout: 45s) ...{RESET}")
-    start_time_seconds = start_time.timestamp()
+def wait_for_acks(req_ids, timeout=45):
+    """
+    Waits until every request in req_ids is answered (in any order), so several
+    requests can be in flight at once. A progress heartbeat (LOG) restarts the
+    timeout. Returns the set of IDs still unanswered.
+    """
+    print(f"{BLUE}... Waiting for LocalSmith (timeout: {timeout}s) ...{RESET}")
+    reader = get_reader()
+    pending = dict.fromkeys(req_ids)
+    deadline = time.time() + timeout
+    while pending:
+        for req_id in list(pending):
+            env = reader.take_reply(req_id)
+            while env and env.get("type") == "LOG":
+                # Progress heartbeat: the request is alive, keep waiting for its ACK
+                body = env.get("body") or {}
+                print(f"{BLUE}.. [{req_id}] {body.get('message', body)}{RESET}")
+                deadline = time.time() + timeout
+                env = reader.take_reply(req_id)
+            if env:
+                body = env.get("body") or {}
+                color = RED if env.get("type") == "ERR" else GREEN
+                print(f"{color}<< Signal Received [{req_id}]: {body.get('message', body)}{RESET}")
+                del pending[req_id]
+        for line in _TAIL.read_lines():
+            req_id = _legacy_reply(line, pending)
+            if req_id:
+                color = GREEN if "[ACK]" in line else RED
+                print(f"{color}<< Signal Received: {line.strip()}{RESET}")
+                del pending[req_id]
+                # Its envelope (if any) would otherwise stay buffered forever
+                reader.discard(req_id)
+        remaining = deadline - time.time()
+        if not pending or remaining <= 0:
+            break
+        reader.tail.wait(min(remaining, 1.0))
     
-    for _ in range(45):
-        if not os.path.exists(LOG_FILE):
-            time.sleep(1)
-            continue
-            
-        with open(LOG_FILE, "r") as f:
-            lines = f.readlines()
-            
-        for line in reversed(lines):
-            if "[LocalSmith -> Director]" in line and ("[ACK]" in line or "[ERR]" in line):
-                msg_time = extract_timestamp(line)
-                if msg_time and msg_time.timestamp() >= (start_time_seconds - 1):
-                    color = GREEN if "[ACK]" in line else RED
-                    print(f"{color}<< Signal Received: {line.strip()}{RESET}")
-                    return True
-        time.sleep(1)
-        
-    print(f"{RED}[!] Timeout waiting for ACK.{RESET}")
-    return False
+    if pending:
+        print(f"{RED}[!] Timeout waiting for ACK.{RESET}")
+    return set(pending)
+
+def wait_for_ack(req_id, timeout=45):
+    return not wait_for_acks([req_id], timeout)
 
 def get_llm_action(user_input, history):
     system_prompt = """
@@ -74,6 +107,7 @@ def get_llm_action(user_input, history):
     PROTOCOL INSTRUCTION:
     To execute a command, your output must contain: CMD: <command>
     Example: "I will run the check. CMD: run verification"
+    Several commands may be issued at once, one CMD: per line.
     """
     
     messages = [{"role": "system", "content": system_prompt}] + history + [{"role": "user", "content": user_input}]
@@ -104,25 +138,25 @@ def main():
                 
             response = get_llm_action(user_input, history)
             
-            # Regex to find CMD: anywhere in the response
-            match = re.search(r"CMD:\s*(.*)", response, re.IGNORECASE)
+            # Regex to find CMD: anywhere in the response (one per line)
+            matches = list(re.finditer(r"CMD:\s*(.*)", response, re.IGNORECASE))
             
-            if match:
-                # We found a command!
-                # If there was chat text before it, print that first
-                prefix = response[:match.start()].strip()
+            if matches:
+                # We found commands!
+                # If there was chat text before them, print that first
+                prefix = response[:matches[0].start()].strip()
                 if prefix:
                     print(prefix)
                     
-                command = match.group(1).strip()
                 # Clean up any trailing quotes or periods if the LLM got messy
-                command = command.strip()
+                commands = [m.group(1).strip() for m in matches]
                 
-                request_time = write_request(command)
-                wait_for_ack(request_time)
+                # Pipelined: send all, then collect the ACKs as they arrive
+                req_ids = [write_request(command) for command in commands]
+                wait_for_acks(req_ids)
                 
                 history.append({"role": "user", "content": user_input})
-                history.append({"role": "assistant", "content": f"Executed: {command}"})
+                history.append({"role": "assistant", "content": "Executed: " + "; ".join(commands)})
             else:
                 print(f"{response}")
                 history.append({"role": "user", "content": user_input})
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+import time
+import uuid
+import errno
+import select
+import ctypes
+import ctypes.util
+from collections import deque
+
+# Request/reply correlation tags carried in the entry content:
+#   ### [ts] [Director -> LocalSmith] [REQ] [ID:1a2b3c4d] run verification
+#   ### [ts] [LocalSmith -> Director] [ACK] [RE:1a2b3c4d] Verification Output: ...
+ID_RE = re.compile(r"^\s*\[ID:([\w-]+)\]\s*")
+RE_RE = re.compile(r"\[(?:ACK|ERR|LOG)\]\s*\[RE:([\w-]+)\]")
+
+POLL_INTERVAL = 0.05 # Fallback wake-up interval when inotify is unavailable
+
+def new_request_id():
+    return uuid.uuid4().hex[:8]
+
+def tag_request(content, req_id):
+    return f"[ID:{req_id}] {content}"
+
+def split_request_id(content):
+    """'[ID:x] cmd' -> ('x', 'cmd'); untagged content -> (None, content)."""
+    match = ID_RE.match(content)
+    if not match:
+        return None, content
+    return match.group(1), content[match.end():]
+
+def tag_reply(content, req_id):
+    return f"[RE:{req_id}] {content}" if req_id else content
+
+def reply_id(line):
+    """Request ID an ACK/ERR/LOG line answers, or None for untagged (legacy) replies."""
+    match = RE_RE.search(line)
+    return match.group(1) if match else None
+
+# --- inotify (Linux), via ctypes: no third-party dependency ---
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+class _Inotify:
+    """Watches a directory; wait() returns as soon as anything in it is written or created."""
+    def __init__(self, directory):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify unavailable")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, "inotify_add_watch failed")
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self.fd, 4096):
+                    pass # Drain: we only care that something happened
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+        return bool(ready)
+
+    def close(self):
+        os.close(self.fd)
+
+class JournalTail:
+    """
+    Follows an append-only journal without re-reading it: the file stays open and
+    only bytes past the last offset are read. Partial lines are held back until
+    their newline arrives. A replaced or truncated file is reopened from the start.
+    """
+    def __init__(self, path, from_end=True, use_inotify=True):
+        self.path = path
+        self.from_end = from_end
+        self.f = None
+        self.inode = None
+        self.offset = 0
+        self.partial = b""
+        self.notifier = None
+        if use_inotify:
+            try:
+                self.notifier = _Inotify(os.path.dirname(os.path.abspath(path)) or ".")
+            except (OSError, AttributeError):
+                self.notifier = None
+        if not self._open():
+            self.from_end = False # Nothing to skip: read the file from its start once it appears
+
+    def _open(self):
+        try:
+            f = open(self.path, "rb")
+        except OSError:
+            return False
+        self.f = f
+        st = os.fstat(f.fileno())
+        self.inode = st.st_ino
+        self.offset = st.st_size if self.from_end else 0
+        self.from_end = False # Files appearing later are read from their start
+        self.partial = b""
+        return True
+
+    def _rotated(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_ino != self.inode or st.st_size < self.offset
+
+    def read_lines(self):
+        """Returns the complete lines appended since the last call."""
+        if self.f is None and not self._open():
+            return []
+        lines = []
+        while True:
+            self.f.seek(self.offset)
+            chunk = self.f.read()
+            if chunk:
+                self.offset += len(chunk)
+                data = self.partial + chunk
+                *complete, self.partial = data.split(b"\n")
+                lines.extend(l.decode("utf-8", "replace") + "\n" for l in complete)
+            if not self._rotated():
+                return lines
+            self.f.close()
+            self.f = None
+            if not self._open():
+                return lines
+
+    def wait(self, timeout):
+        """Sleeps until the journal may have changed (inotify) or timeout/poll interval elapses."""
+        if self.notifier:
+            self.notifier.wait(timeout)
+        else:
+            time.sleep(min(timeout, POLL_INTERVAL))
+
+    def follow(self, timeout):
+        """Yields new lines as they are appended, until timeout seconds have passed."""
+        deadline = time.time() + timeout
+        while True:
+            for line in self.read_lines():
+                yield line
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            self.wait(remaining)
+
+    def close(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+        if self.notifier:
+            self.notifier.close()
+            self.notifier = None
+
+# --- Structured envelopes ---
+# Every entry written through radio.Journal is mirrored as one JSON line in a sidecar
+# stream next to the Markdown log (mission_log.jsonl):
+#   {"id", "reply_to", "ts", "from", "to", "type", "body"}
+
+def envelope_path(log_path):
+    return os.path.splitext(log_path)[0] + ".jsonl"
+
+class EnvelopeReader:
+    """
+    Reads the envelope stream addressed to one recipient (or any of a tuple of them,
+    e.g. ("LocalSmith", "All")). Replies (reply_to set) are kept per request ID until
+    claimed, so any number of requests can be in flight and answered in any order;
+    everything else is queued for poll()/dispatch().
+    """
+    def __init__(self, log_path, recipient=None, from_end=True, use_inotify=True):
+        self.recipient = recipient
+        self.recipients = (recipient,) if isinstance(recipient, str) else tuple(recipient or ())
+        self.tail = JournalTail(envelope_path(log_path), from_end=from_end, use_inotify=use_inotify)
+        self.replies = {}
+        self.answered = set()
+        self.inbox = deque()
+
+    def _pull(self):
+        for line in self.tail.read_lines():
+            try:
+                env = json.loads(line)
+            except ValueError:
+                continue
+            if self.recipients and env.get("to") not in self.recipients:
+                continue
+            if env.get("reply_to"):
+                if env["reply_to"] not in self.answered:
+                    self.replies.setdefault(env["reply_to"], deque()).append(env)
+            else:
+                self.inbox.append(env)
+
+    def take_reply(self, req_id):
+        """A buffered reply to req_id, or None (non-blocking)."""
+        self._pull()
+        queue = self.replies.get(req_id)
+        if not queue:
+            return None
+        env = queue.popleft()
+        if not queue:
+            del self.replies[req_id]
+        return env
+
+    def discard(self, req_id):
+        """Drops buffered and future replies to req_id (already answered another way)."""
+        self.answered.add(req_id)
+        self.replies.pop(req_id, None)
+
+    def wait_reply(self, req_id, timeout):
+        deadline = time.time() + timeout
+        while True:
+            env = self.take_reply(req_id)
+            remaining = deadline - time.time()
+            if env or remaining <= 0:
+                return env
+            self.tail.wait(remaining)
+
+    def poll(self, timeout=0):
+        """Returns the queued non-reply envelopes, waiting up to timeout for the first."""
+        deadline = time.time() + timeout
+        while True:
+            self._pull()
+            remaining = deadline - time.time()
+            if self.inbox or remaining <= 0:
+                envs = list(self.inbox)
+                self.inbox.clear()
+                return envs
+            self.tail.wait(remaining)
+
+    def dispatch(self, handlers, timeout=0):
+        """Calls handlers[type](envelope) for each new envelope. Returns how many ran."""
+        handled = 0
+        for env in self.poll(timeout):
+            handler = handlers.get(env.get("type"))
+            if handler:
+                handler(env)
+                handled += 1
+        return handled
+
+    def close(self):
+        self.tail.close()
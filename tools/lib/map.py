@@ -5,8 +5,12 @@ import subprocess
 import argparse
 import re
 import json
+import heapq
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import map_index
+
 # --- Configuration ---
 CLANG_QUERY = shutil.which("clang-query")
 GIT_GREP = shutil.which("git")
@@ -18,23 +22,86 @@ def get_repo_root():
 def has_compile_db(root):
     return (Path(root) / COMPILE_DB).exists()
 
-# --- TIER 1: Clang Query ---
-def run_clang_query(query_str, root):
-    if not CLANG_QUERY: return None
+# --- TIER 0: Persistent Symbol Index ---
+def load_db(root):
     try:
         with open(Path(root) / COMPILE_DB, 'r') as f:
-            db = json.load(f)
-            if not db: return None
-            candidate = None
-            for entry in db:
-                fpath = Path(entry['directory']) / entry['file']
-                if fpath.exists():
-                    candidate = str(fpath)
-                    break
-            if not candidate: return None
-    except:
+            return json.load(f)
+    except (OSError, ValueError):
         return None
 
+def build_index(root):
+    """Builds/refreshes the persistent index (only TUs changed since the last run)."""
+    # Taken before reading: a DB rewritten during indexing still reads as changed
+    db_stamp = map_index.file_stamp(Path(root) / COMPILE_DB)
+    db = load_db(root)
+    if db is None:
+        print(f"Error: {COMPILE_DB} not found or invalid in {root}", file=sys.stderr)
+        return 1
+    if not map_index.CLANG:
+        print("Error: 'clang' not found (needed for the AST dump).", file=sys.stderr)
+        return 1
+    print(f"🗂️  Indexing {len(db)} compile entries...", file=sys.stderr)
+    idx = map_index.MapIndex(root)
+    try:
+        indexed, total = idx.refresh(db)
+        idx.set_meta("db_stamp", db_stamp)
+        stats = idx.stats()
+    finally:
+        idx.close()
+    print(f"✅ Index updated: {indexed}/{total} TUs re-indexed "
+          f"({stats['defs']} defs, {stats['calls']} calls) -> {map_index.INDEX_PATH}", file=sys.stderr)
+    return 0
+
+def query_index(mode, symbol, root):
+    """
+    Answers from the stored index as is. Only the compile DB's stamp (one stat) is
+    compared with the one of the last 'map index'; per-TU and header staleness is
+    checked, and repaired, by 'map index' alone.
+    """
+    if not (Path(root) / map_index.INDEX_PATH).exists():
+        return None
+    print(f"🗂️  [Index] Looking up '{symbol}'...", file=sys.stderr)
+    idx = map_index.MapIndex(root)
+    try:
+        if idx.get_meta("db_stamp") != map_index.file_stamp(Path(root) / COMPILE_DB):
+            print(f"  [!] Index may be stale ({COMPILE_DB} changed). Run 'map index' to refresh.", file=sys.stderr)
+        return idx.query(mode, symbol)
+    except Exception as e:
+        print(f"  [!] Index lookup failed: {e}", file=sys.stderr)
+        return None
+    finally:
+        idx.close()
+
+# --- TIER 1: Clang Query ---
+def select_tus(db, symbol):
+    """
+    Cheap prefilter: TUs whose source text mentions the symbol.
+    Falls back to the first existing TU (headers are still parsed through it).
+    """
+    word = re.compile(rb"\b" + re.escape(symbol.encode("utf-8")) + rb"\b")
+    seen = set()
+    selected = []
+    first = None
+    for entry in db:
+        fpath = str(Path(entry['directory']) / entry['file'])
+        if fpath in seen:
+            continue
+        seen.add(fpath)
+        try:
+            with open(fpath, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        if first is None:
+            first = fpath
+        if word.search(data):
+            selected.append(fpath)
+    if not selected and first:
+        selected = [first]
+    return selected
+
+def run_clang_query(query_str, root, candidate):
     cmd = [CLANG_QUERY, "-p", root, candidate]
     try:
         process = subprocess.run(
@@ -61,7 +128,12 @@ def parse_clang_output(raw_output):
             hits.add(f"{fpath}:{match.group(2)}")
     return sorted(list(hits))
 
-def query_clang(mode, symbol, root):
+def query_clang(mode, symbol, root, on_hit=None):
+    """
+    Fans clang-query out over the TUs that mention the symbol (one process per TU,
+    as many in flight as there are cores). Deduplicated hits are passed to on_hit
+    as they arrive; the sorted list is returned at the end.
+    """
     q = ""
     if mode == "callers":
         q = f"m callExpr(callee(functionDecl(hasName(\"{symbol}\"))))"
@@ -70,18 +142,74 @@ def query_clang(mode, symbol, root):
     elif mode == "defs":
         q = f"m functionDecl(hasName(\"{symbol}\"), isDefinition())"
     
-    if not q: return None
+    if not q or not CLANG_QUERY: return None
 
-    print(f"🔍 [Clang] Querying AST for '{symbol}'...", file=sys.stderr)
-    raw = run_clang_query(q, root)
-    if raw:
-        return parse_clang_output(raw)
+    try:
+        with open(Path(root) / COMPILE_DB, 'r') as f:
+            db = json.load(f)
+    except (OSError, ValueError):
+        return None
+    tus = select_tus(db or [], symbol)
+    if not tus: return None
+
+    workers = min(len(tus), os.cpu_count() or 1)
+    print(f"🔍 [Clang] Querying AST for '{symbol}' ({len(tus)} TUs, {workers} workers)...", file=sys.stderr)
+    hits = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_clang_query, q, root, tu) for tu in tus]
+        for future in as_completed(futures):
+            raw = future.result()
+            if not raw:
+                continue
+            for hit in parse_clang_output(raw):
+                if hit not in hits:
+                    hits.add(hit)
+                    if on_hit:
+                        on_hit(hit)
+    if hits:
+        return sorted(hits)
     return None
 
 # --- TIER 2: Grep / Ripgrep (UPGRADED) ---
-def query_grep(mode, symbol, root):
+HEADER_EXTS = (".h", ".hpp", ".hh", ".hxx")
+# Early exit: after max_hits lines, stop once the top-K has not changed for this many hits
+STABLE_HITS = 500
+
+def grep_priority(path, sym_clean):
+    """Name Affinity (0) > Headers (1) > Source (2), using plain string ops."""
+    base = path.rsplit("/", 1)[-1]
+    stem, dot, ext = base.rpartition(".")
+    if not dot:
+        stem, ext = base, ""
+    # Tier 1: Filename matches symbol (e.g., zassert.h for z_assert)
+    if stem.lower().replace("_", "") == sym_clean:
+        return 0
+    # Tier 2: Headers
+    if dot and f".{ext}" in HEADER_EXTS:
+        return 1
+    # Tier 3: Everything else
+    return 2
+
+class _Worst:
+    """Heap entry ordering the WORST (prio, path) first, so heap[0] is evicted."""
+    __slots__ = ("key", "hit")
+
+    def __init__(self, key, hit):
+        self.key = key
+        self.hit = hit
+
+    def __lt__(self, other):
+        return self.key > other.key
+
+def query_grep(mode, symbol, root, limit=20, max_hits=20000):
+    """
+    Streams rg/git grep output and keeps only the best `limit` files in a bounded heap.
+    Once `max_hits` lines were read and the heap has been stable for STABLE_HITS more,
+    the search is terminated.
+    Returns (hits sorted by rank, total_files, complete) where total_files counts
+    every file seen (a lower bound when complete is False).
+    """
     import shutil
-    hits = set()
     
     # 1. Detect Tool (rg > git grep)
     RG = shutil.which("rg")
@@ -103,7 +231,7 @@ def query_grep(mode, symbol, root):
         # | (struct|enum|union)\s+{symbol}\s*\{  -> Tag Defs
         pattern = f"(#define\\s+{symbol}\\b|\\b{symbol}\\s*\\(|\\}}\\s*{symbol}\\s*;|^\\s*{symbol}\\s*;|typedef\\s+.*\\b{symbol}\\s*;|(struct|enum|union)\\s+{symbol}\\s*\\{{)"
     elif mode == "callees":
-        return []
+        return [], 0, True
 
     # 3. Build Command
     cmd = []
@@ -112,64 +240,99 @@ def query_grep(mode, symbol, root):
     else:
         cmd = ["git", "grep", "-n", "-E", pattern]
 
+    # 4. Stream + rank (Name Affinity > Headers > Source)
+    sym_clean = symbol.lower().replace("_", "")
+    heap = []
+    seen_files = set()
+    n_hits = 0
+    stable = 0
+    complete = True
     try:
-        res = subprocess.run(cmd, cwd=root, capture_output=True, text=True)
-        for line in res.stdout.splitlines():
-            parts = line.split(":", 2)
-            if len(parts) >= 2:
-                hits.add(f"{parts[0]}:{parts[1]}")
+        proc = subprocess.Popen(cmd, cwd=root, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, errors="replace")
+        try:
+            for line in proc.stdout:
+                parts = line.split(":", 2)
+                if len(parts) < 2:
+                    continue
+                n_hits += 1
+                stable += 1
+                path = parts[0]
+                if path not in seen_files:
+                    seen_files.add(path)
+                    entry = _Worst((grep_priority(path, sym_clean), path), f"{path}:{parts[1]}")
+                    if len(heap) < limit:
+                        heapq.heappush(heap, entry)
+                        stable = 0
+                    elif heap[0] < entry:
+                        # entry ranks better than the current worst
+                        heapq.heapreplace(heap, entry)
+                        stable = 0
+                if n_hits >= max_hits and stable >= STABLE_HITS:
+                    complete = False
+                    break
+        finally:
+            if proc.poll() is None:
+                proc.terminate()
+            proc.stdout.close()
+            proc.wait()
     except Exception as e:
         print(f"Search failed: {e}", file=sys.stderr)
-        pass
-
-    # 4. SORTING LOGIC (Name Affinity > Headers > Source)
-    def score(hit):
-        path_str = hit.split(":", 1)[0]
-        p_obj = Path(path_str)
-        fname = p_obj.stem.lower().replace("_", "")
-        sym_clean = symbol.lower().replace("_", "")
-        
-        # Tier 1: Filename matches symbol (e.g., zassert.h for z_assert)
-        if sym_clean == fname:
-            prio = 0
-        # Tier 2: Headers
-        elif p_obj.suffix in (".h", ".hpp", ".hh", ".hxx"):
-            prio = 1
-        # Tier 3: Everything else
-        else:
-            prio = 2
-            
-        return (prio, hit)
 
-        
-    return sorted(list(hits), key=score)
+    hits = [e.hit for e in sorted(heap, key=lambda e: e.key)]
+    return hits, len(seen_files), complete
 
 
 
 # --- Main ---
 def main():
     parser = argparse.ArgumentParser(description="Adaptive Code Map")
-    parser.add_argument("mode", choices=["callers", "callees", "defs"], help="Query mode")
-    parser.add_argument("symbol", help="Function or Type name")
+    parser.add_argument("mode", choices=["callers", "callees", "defs", "index"], help="Query mode ('index' builds the symbol index)")
+    parser.add_argument("symbol", nargs="?", help="Function or Type name")
     # We use -H because -h is reserved for --help
     parser.add_argument("-H", "--hint", action="store_true", help="Show copy-paste friendly /read command")
+    parser.add_argument("--limit", type=int, default=20, help="Number of files to list")
+    parser.add_argument("--max-hits", type=int, default=20000, help="Grep hits to read before stopping early once the top files are stable")
     
     args = parser.parse_args()
     root = get_repo_root()
+
+    if args.mode == "index":
+        sys.exit(build_index(root))
+    if not args.symbol:
+        parser.error(f"'{args.mode}' requires a symbol")
     
-    results = []
+    limit = max(1, args.limit)
+    total_files = None
+    complete = True
+    results = query_index(args.mode, args.symbol, root)
+
+    # Clang hits are printed as each TU finishes, so readers can start early
+    streamed = []
+    def stream(hit):
+        fpath = hit.rsplit(":", 1)[0]
+        if fpath in streamed:
+            return
+        if not streamed:
+            print(f"# Map: {args.mode} of '{args.symbol}'", flush=True)
+        streamed.append(fpath)
+        if len(streamed) <= limit:
+            print(f"- {fpath}", flush=True)
     
-    if CLANG_QUERY and has_compile_db(root):
-        results = query_clang(args.mode, args.symbol, root)
+    if not results and CLANG_QUERY and has_compile_db(root):
+        results = query_clang(args.mode, args.symbol, root, on_hit=stream)
     
     if not results:
         if CLANG_QUERY and has_compile_db(root):
             print("  [i] Clang returned no results (or failed).", file=sys.stderr)
-        results = query_grep(args.mode, args.symbol, root)
+        results, total_files, complete = query_grep(args.mode, args.symbol, root, limit=limit, max_hits=args.max_hits)
 
 # --- Output ---
     if not results:
         print("No results found.")
+    elif streamed:
+        # Already printed in arrival order
+        unique_ordered = streamed
     else:
         print(f"# Map: {args.mode} of '{args.symbol}'")
         
@@ -187,12 +350,16 @@ def main():
                 seen_files.add(fpath)
                 unique_ordered.append(fpath)
         
-        # Print top 20 unique files (Clean Paths)
-        for f in unique_ordered[:20]:
+        # Print top N unique files (Clean Paths)
+        for f in unique_ordered[:limit]:
             print(f"- {f}")
-            
-        if len(unique_ordered) > 20:
-            print(f"... ({len(unique_ordered) - 20} more files)")
+
+    if results:
+        if total_files is None:
+            total_files = len(unique_ordered)
+        if total_files > limit:
+            more = f"{total_files - limit}" if complete else f"{total_files - limit}+"
+            print(f"... ({more} more files)")
             
         # Hint Output (Rich)
         if args.hint:
@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import shlex
+import shutil
+import sqlite3
+import hashlib
+import subprocess
+
+# Persistent cross-TU symbol index for `map` (built from clang's JSON AST dump)
+INDEX_PATH = os.path.join(".mission", "gen", "map_index.sqlite")
+SCHEMA_VERSION = 1
+
+CLANG = shutil.which("clang")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tus (tu TEXT PRIMARY KEY, cmd_hash TEXT);
+CREATE TABLE IF NOT EXISTS files (tu TEXT, path TEXT, mtime INTEGER);
+CREATE TABLE IF NOT EXISTS defs (symbol TEXT, kind TEXT, file TEXT, line INTEGER, tu TEXT);
+CREATE TABLE IF NOT EXISTS calls (caller TEXT, callee TEXT, file TEXT, line INTEGER, tu TEXT);
+CREATE INDEX IF NOT EXISTS idx_files_tu ON files(tu);
+CREATE INDEX IF NOT EXISTS idx_defs_symbol ON defs(symbol);
+CREATE INDEX IF NOT EXISTS idx_calls_callee ON calls(callee);
+CREATE INDEX IF NOT EXISTS idx_calls_caller ON calls(caller);
+"""
+
+# Node kinds recorded as definitions (functions only when they have a body)
+TYPE_DEF_KINDS = {"TypedefDecl": "typedef", "EnumDecl": "enum", "RecordDecl": "record", "CXXRecordDecl": "record"}
+
+# Flags that make no sense for a syntax-only AST dump
+_DROP_WITH_VALUE = {"-o", "-MF", "-MT", "-MQ"}
+_DROP = {"-c", "-M", "-MM", "-MD", "-MMD", "-MP", "-S", "-E"}
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def file_stamp(path):
+    """'mtime_ns:size' of path, or None if missing: a one-stat change check."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+def entry_args(entry):
+    if "arguments" in entry:
+        return list(entry["arguments"])
+    return shlex.split(entry.get("command", ""))
+
+def entry_path(entry):
+    path = entry["file"]
+    if not os.path.isabs(path):
+        path = os.path.join(entry.get("directory", ""), path)
+    return os.path.normpath(path)
+
+def ast_dump_cmd(entry, clang):
+    """Rewrites a compile DB entry into a clang JSON AST dump invocation."""
+    args = entry_args(entry)[1:]
+    cmd = [clang]
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+            continue
+        if arg in _DROP_WITH_VALUE:
+            skip = True
+            continue
+        if arg in _DROP or arg.startswith("-o"):
+            continue
+        cmd.append(arg)
+    return cmd + ["-fsyntax-only", "-Xclang", "-ast-dump=json"]
+
+def dump_ast(entry, clang=None):
+    """Returns the parsed JSON AST of a TU, or None if clang fails."""
+    clang = clang or CLANG
+    if not clang:
+        return None
+    try:
+        res = subprocess.run(ast_dump_cmd(entry, clang), cwd=entry.get("directory") or None,
+                             capture_output=True, text=True)
+        if not res.stdout:
+            return None
+        return json.loads(res.stdout)
+    except (OSError, ValueError):
+        return None
+
+class _LocTracker:
+    """
+    clang's JSON dumper omits 'file' and 'line' when unchanged from the previously
+    written location (in document order), so the walker has to carry them along.
+    """
+    def __init__(self):
+        self.file = None
+        self.line = None
+
+    def _bare(self, loc):
+        if "file" in loc:
+            self.file = loc["file"]
+        if "line" in loc:
+            self.line = loc["line"]
+        return (self.file, self.line)
+
+    def visit(self, loc):
+        """Consumes one location; returns its (file, line), preferring the expansion site."""
+        if not loc:
+            return None
+        if "spellingLoc" in loc or "expansionLoc" in loc:
+            self._bare(loc.get("spellingLoc", {}))
+            return self._bare(loc.get("expansionLoc", {}))
+        return self._bare(loc)
+
+def _callee_name(call):
+    """Name of the function referenced by a CallExpr's callee expression."""
+    inner = call.get("inner") or []
+    stack = [inner[0]] if inner else []
+    while stack:
+        node = stack.pop()
+        ref = node.get("referencedDecl")
+        if node.get("kind") in ("DeclRefExpr", "MemberExpr") and ref and ref.get("name"):
+            return ref["name"]
+        if node.get("kind") == "MemberExpr" and node.get("name"):
+            return node["name"]
+        stack.extend(reversed(node.get("inner") or []))
+    return None
+
+def walk_ast(ast, root, base_dir=None):
+    """
+    Extracts (defs, calls, files) from a JSON AST.
+    Relative paths are resolved against base_dir (the entry's directory).
+    Only locations inside root are recorded (system headers are skipped).
+    defs:  [(symbol, kind, file, line)]
+    calls: [(caller, callee, file, line)]
+    files: set of repo files seen in the TU (dependency set for invalidation)
+    """
+    root = os.path.abspath(root)
+    tracker = _LocTracker()
+    defs = []
+    calls = []
+    files = set()
+
+    base_dir = os.path.abspath(base_dir or root)
+
+    def resolve(pos):
+        """(file, line) -> (absolute file, line) if inside root, else None."""
+        if not pos or not pos[0]:
+            return None
+        path = os.path.normpath(os.path.join(base_dir, pos[0]))
+        return (path, pos[1]) if path.startswith(root + os.sep) else None
+
+    # Iterative pre-order walk; the tracker must see locations in document order
+    stack = [(ast, None)]
+    while stack:
+        node, func = stack.pop()
+        loc = resolve(tracker.visit(node.get("loc")))
+        rng = node.get("range") or {}
+        begin = resolve(tracker.visit(rng.get("begin")))
+        tracker.visit(rng.get("end"))
+
+        kind = node.get("kind")
+        file, line = loc if loc else (None, None)
+        local = loc is not None and not node.get("isImplicit")
+        if local:
+            files.add(file)
+
+        if kind == "FunctionDecl":
+            has_body = any(c.get("kind") == "CompoundStmt" for c in node.get("inner") or [])
+            if has_body:
+                func = node.get("name")
+                if local:
+                    defs.append((func, "function", file, line))
+        elif kind in TYPE_DEF_KINDS and local and node.get("name"):
+            if kind == "TypedefDecl" or node.get("completeDefinition"):
+                defs.append((node["name"], TYPE_DEF_KINDS[kind], file, line))
+        elif kind in ("CallExpr", "CXXMemberCallExpr") and func:
+            # Call sites are located by their range start (expressions have no 'loc')
+            callee = _callee_name(node)
+            if callee and begin:
+                calls.append((func, callee, begin[0], begin[1]))
+
+        for child in reversed(node.get("inner") or []):
+            stack.append((child, func))
+
+    return defs, calls, files
+
+class MapIndex:
+    """sqlite-backed symbol store, refreshed incrementally per TU."""
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(self.root, INDEX_PATH)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key='version'").fetchone()
+        if row and int(row[0]) != SCHEMA_VERSION:
+            self.clear()
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SCHEMA_VERSION),))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def clear(self):
+        for table in ("tus", "files", "defs", "calls"):
+            self.conn.execute(f"DELETE FROM {table}")
+
+    def _forget(self, tu):
+        for table in ("tus", "files", "defs", "calls"):
+            self.conn.execute(f"DELETE FROM {table} WHERE tu=?", (tu,))
+
+    def is_stale(self, tu, cmd_hash):
+        row = self.conn.execute("SELECT cmd_hash FROM tus WHERE tu=?", (tu,)).fetchone()
+        if not row or row[0] != cmd_hash:
+            return True
+        for path, mtime in self.conn.execute("SELECT path, mtime FROM files WHERE tu=?", (tu,)):
+            if _mtime(path) != mtime:
+                return True
+        return False
+
+    def store(self, tu, cmd_hash, defs, calls, files):
+        self._forget(tu)
+        self.conn.execute("INSERT INTO tus VALUES (?, ?)", (tu, cmd_hash))
+        files = set(files) | {tu}
+        self.conn.executemany("INSERT INTO files VALUES (?, ?, ?)", [(tu, f, _mtime(f)) for f in files])
+        self.conn.executemany("INSERT INTO defs VALUES (?, ?, ?, ?, ?)", [d + (tu,) for d in defs])
+        self.conn.executemany("INSERT INTO calls VALUES (?, ?, ?, ?, ?)", [c + (tu,) for c in calls])
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    def refresh(self, db, dump=dump_ast):
+        """
+        Re-indexes TUs whose command or any recorded repo file changed (by mtime),
+        and drops TUs no longer in the compile DB. Returns (indexed, total).
+        """
+        entries = {}
+        for entry in db:
+            entries.setdefault(entry_path(entry), entry)
+
+        known = [r[0] for r in self.conn.execute("SELECT tu FROM tus")]
+        for tu in known:
+            if tu not in entries:
+                self._forget(tu)
+
+        indexed = 0
+        for tu, entry in entries.items():
+            if not os.path.exists(tu):
+                continue
+            cmd_hash = hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+            if not self.is_stale(tu, cmd_hash):
+                continue
+            ast = dump(entry)
+            if ast is None:
+                print(f"  [!] AST dump failed: {os.path.relpath(tu, self.root)}", file=sys.stderr)
+                continue
+            defs, calls, files = walk_ast(ast, self.root, entry.get("directory"))
+            self.store(tu, cmd_hash, defs, calls, files)
+            self.conn.commit()
+            indexed += 1
+        self.conn.commit()
+        return indexed, len(entries)
+
+    def query(self, mode, symbol):
+        """Returns sorted 'file:line' hits (relative to root) or None for unknown modes."""
+        if mode == "callers":
+            sql = "SELECT DISTINCT file, line FROM calls WHERE callee=?"
+        elif mode == "callees":
+            sql = "SELECT DISTINCT file, line FROM calls WHERE caller=?"
+        elif mode == "defs":
+            sql = "SELECT DISTINCT file, line FROM defs WHERE symbol=?"
+        else:
+            return None
+        hits = set()
+        for file, line in self.conn.execute(sql, (symbol,)):
+            try:
+                file = os.path.relpath(file, self.root)
+            except ValueError:
+                pass
+            hits.add(f"{file}:{line}")
+        return sorted(hits)
+
+    def stats(self):
+        return {t: self.conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                for t in ("tus", "defs", "calls")}
@@ -1,32 +1,313 @@
 import os
+import re
+import sys
+import json
+import argparse
 import datetime
-import time
+import contextlib
+
+from journal import envelope_path, new_request_id, split_request_id
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 # Configuration
 # We wrap this in abspath to satisfy the strict infrastructure tests
 DEFAULT_LOG = os.path.abspath(os.environ.get("MISSION_JOURNAL") or ".mission-context/mission_log.md")
 
+# The active log is rotated into numbered segments (mission_log.000001.md, ...) past this size
+SEGMENT_BYTES = int(os.environ.get("MISSION_JOURNAL_SEGMENT_BYTES") or 4 * 1024 * 1024)
+
+# ### [TIMESTAMP] [Sender -> Recipient] [TYPE] Content
+ENTRY_RE = re.compile(r"^### \[([^\]]*)\] \[(.+?) -> (.+?)\] \[(\w+)\] ?(.*)")
+ID_RE = re.compile(r"^\[ID:([\w-]+)\]")
+RE_RE = re.compile(r"^\[RE:([\w-]+)\]")
+
 def get_timestamp():
     return datetime.datetime.now().isoformat(timespec='seconds')
 
+def parse_header(line):
+    """Index record fields of an entry header line, or None if it is not one."""
+    match = ENTRY_RE.match(line)
+    if not match:
+        return None
+    ts, sender, recipient, msg_type, content = match.groups()
+    req = ID_RE.match(content)
+    rep = RE_RE.match(content)
+    return {"ts": ts, "from": sender, "to": recipient, "type": msg_type,
+            "id": req.group(1) if req else None, "re": rep.group(1) if rep else None}
+
+def _tail_lines(path, limit, block=8192):
+    """Last `limit` lines of a file, reading backwards from the end in blocks."""
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return []
+    with f:
+        pos = f.seek(0, 2)
+        data = b""
+        while pos > 0 and data.count(b"\n") <= limit:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode("utf-8", "replace").splitlines(keepends=True)
+    return lines[-limit:] if limit > 0 else []
+
+def _last_line(path):
+    lines = _tail_lines(path, 1)
+    return lines[0] if lines else None
+
+class Journal:
+    """
+    Segmented mission journal. The active Markdown file (mission_log.md) stays the
+    human view and is what agents tail; past SEGMENT_BYTES it is renamed to the next
+    numbered segment. Each segment has a JSONL sidecar index (mission_log.idx for the
+    active one) with one record per entry: {off, end, ts, from, to, type, id, re}.
+    Entries appended by writers that bypass this class are indexed on the next access.
+    Every entry is also mirrored as a structured envelope (see journal.EnvelopeReader).
+    """
+    def __init__(self, path=None, segment_bytes=None):
+        self.path = os.path.abspath(path or DEFAULT_LOG)
+        self.base, self.ext = os.path.splitext(self.path)
+        self.segment_bytes = segment_bytes or SEGMENT_BYTES
+        self.seg_re = re.compile(re.escape(os.path.basename(self.base)) + r"\.(\d{6})" + re.escape(self.ext) + "$")
+
+    def index_path(self, segment):
+        return os.path.splitext(segment)[0] + ".idx"
+
+    def sealed_segments(self):
+        directory = os.path.dirname(self.path)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return []
+        return sorted(os.path.join(directory, n) for n in names if self.seg_re.match(n))
+
+    def segments(self):
+        """All segment files, oldest first (the active log last)."""
+        return self.sealed_segments() + [self.path]
+
+    @contextlib.contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.base + ".lock", "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    # --- Indexing ---
+    def _scan(self, segment, start):
+        """Index records for the entries found in segment from byte offset `start`."""
+        records = []
+        try:
+            f = open(segment, "rb")
+        except OSError:
+            return records
+        with f:
+            f.seek(start)
+            pos = start
+            content_end = start # An entry ends after its last non-blank line
+            for raw in f:
+                header = parse_header(raw.decode("utf-8", "replace")) if raw.startswith(b"### [") else None
+                if header:
+                    if records:
+                        records[-1]["end"] = content_end
+                    header["off"] = pos
+                    records.append(header)
+                pos += len(raw)
+                if raw.strip():
+                    content_end = pos
+            if records:
+                records[-1]["end"] = content_end
+        return records
+
+    def _write_records(self, idx, records, mode="a"):
+        with open(idx, mode) as f:
+            for rec in records:
+                f.write(json.dumps(rec, sort_keys=True) + "\n")
+
+    def _catch_up(self):
+        """Indexes active-log entries not yet in the index (or rebuilds it if the log shrank)."""
+        idx = self.index_path(self.path)
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        last = _last_line(idx)
+        try:
+            end = json.loads(last)["end"] if last else 0
+        except (ValueError, KeyError):
+            end = None
+        if end is None or end > size:
+            self._write_records(idx, self._scan(self.path, 0), "w")
+        elif end < size:
+            self._write_records(idx, self._scan(self.path, end))
+
+    def _maybe_rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size < self.segment_bytes:
+            return
+        sealed = self.sealed_segments()
+        seq = int(self.seg_re.match(os.path.basename(sealed[-1])).group(1)) + 1 if sealed else 1
+        target = f"{self.base}.{seq:06d}{self.ext}"
+        os.replace(self.path, target)
+        for sidecar in (self.index_path, envelope_path):
+            if os.path.exists(sidecar(self.path)):
+                os.replace(sidecar(self.path), sidecar(target))
+
+    def reindex(self):
+        """Rebuilds every segment index from the Markdown files."""
+        with self._locked():
+            for segment in self.segments():
+                if os.path.exists(segment):
+                    self._write_records(self.index_path(segment), self._scan(segment, 0), "w")
+
+    def append(self, sender, recipient, msg_type, content, fsync=False, body=None, reply_to=None, msg_id=None):
+        """
+        Appends one entry: the Markdown line (tagged [ID:x], or [RE:x] for replies),
+        its index record and its envelope {id, reply_to, ts, from, to, type, body}.
+        body defaults to {"text": content}. Returns the index record.
+        """
+        return self.append_batch([{"sender": sender, "recipient": recipient, "msg_type": msg_type,
+                                   "content": content, "body": body, "reply_to": reply_to,
+                                   "msg_id": msg_id}], fsync)[0]
+
+    def append_batch(self, entries, fsync=False):
+        """
+        Appends several entries (dicts of append()'s arguments) under one lock, with one
+        write per file and at most one fsync each. Returns their index records.
+        """
+        timestamp = get_timestamp()
+        chunks, envelopes = [], []
+        for e in entries:
+            tagged_id, text = split_request_id(e["content"])
+            msg_id = e.get("msg_id") or tagged_id or new_request_id()
+            reply_to = e.get("reply_to")
+            tag = f"[RE:{reply_to}]" if reply_to else f"[ID:{msg_id}]"
+            chunks.append(f"\n### [{timestamp}] [{e['sender']} -> {e['recipient']}] [{e['msg_type']}] {tag} {text}\n".encode("utf-8"))
+            body = e.get("body")
+            envelopes.append(json.dumps({"id": msg_id, "reply_to": reply_to, "ts": timestamp,
+                                         "from": e["sender"], "to": e["recipient"], "type": e["msg_type"],
+                                         "body": body if body is not None else {"text": text}}) + "\n")
+        with self._locked():
+            self._catch_up()
+            self._maybe_rotate()
+            with open(self.path, "ab") as f:
+                start = f.seek(0, 2)
+                f.write(b"".join(chunks))
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            records = []
+            for data in chunks:
+                record = parse_header(data[1:].decode("utf-8"))
+                record["off"] = start + 1
+                record["end"] = start + len(data)
+                records.append(record)
+                start += len(data)
+            self._write_records(self.index_path(self.path), records)
+            with open(envelope_path(self.path), "a") as f:
+                f.write("".join(envelopes))
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+        return records
+
+    # --- Queries ---
+    def _records_since(self, idx, since):
+        """Records of one index from the first with ts >= since (binary search on the file)."""
+        try:
+            f = open(idx, "rb")
+        except OSError:
+            return
+        with f:
+            lo = 0
+            if since:
+                hi = f.seek(0, 2)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    f.seek(mid)
+                    if mid:
+                        f.readline() # Skip to the next full record
+                    line = f.readline()
+                    if not line:
+                        hi = mid
+                        continue
+                    if json.loads(line)["ts"] < since:
+                        lo = f.tell()
+                    else:
+                        hi = mid
+                # Step back to the start of the record containing lo
+                while lo > 0:
+                    f.seek(lo - 1)
+                    if f.read(1) == b"\n":
+                        break
+                    lo -= 1
+            f.seek(lo)
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if not since or rec["ts"] >= since:
+                    yield rec
+
+    def query(self, since=None, sender=None, recipient=None, msg_type=None, msg_id=None):
+        """Yields matching index records in journal order; each carries its 'segment'."""
+        if os.path.exists(self.path):
+            with self._locked():
+                self._catch_up()
+        for segment in self.segments():
+            idx = self.index_path(segment)
+            if since and segment != self.path:
+                last = _last_line(idx)
+                if last and json.loads(last)["ts"] < since:
+                    continue # Whole segment is older
+            for rec in self._records_since(idx, since):
+                if sender and rec["from"] != sender:
+                    continue
+                if recipient and rec["to"] != recipient:
+                    continue
+                if msg_type and rec["type"] != msg_type:
+                    continue
+                if msg_id and msg_id not in (rec.get("id"), rec.get("re")):
+                    continue
+                rec["segment"] = segment
+                yield rec
+
+    def read_entry(self, rec):
+        """Markdown text of an indexed entry."""
+        with open(rec.get("segment", self.path), "rb") as f:
+            f.seek(rec["off"])
+            return f.read(rec["end"] - rec["off"]).decode("utf-8", "replace").rstrip("\n")
+
+    def latest(self, limit=5):
+        """Last N lines of the journal, crossing into older segments if needed."""
+        lines = []
+        for segment in reversed(self.segments()):
+            lines = _tail_lines(segment, limit - len(lines)) + lines
+            if len(lines) >= limit:
+                break
+        return lines
+
 def append_entry(sender, recipient, msg_type, content):
     """
     Writes a structured log entry to the mission journal.
     Format: ### [TIMESTAMP] [Sender -> Recipient] [TYPE] Content
     """
-    timestamp = get_timestamp()
-    
-    # Ensure directory exists
-    log_dir = os.path.dirname(DEFAULT_LOG)
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir, exist_ok=True)
-        
     # The fix from ID 056: Ensure {content} is actually written
-    entry = f"\n### [{timestamp}] [{sender} -> {recipient}] [{msg_type}] {content}\n"
-    
     try:
-        with open(DEFAULT_LOG, "a") as f:
-            f.write(entry)
+        Journal(DEFAULT_LOG).append(sender, recipient, msg_type, content)
         print(f"📡 Transmitted {msg_type} to {DEFAULT_LOG}")
         return True
     except Exception as e:
@@ -37,6 +318,45 @@ def read_latest(limit=5):
     """Reads the last N lines from the log."""
     if not os.path.exists(DEFAULT_LOG):
         return []
-    with open(DEFAULT_LOG, "r") as f:
-        lines = f.readlines()
-        return lines[-limit:]
+    return Journal(DEFAULT_LOG).latest(limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Mission journal (radio)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    tx = subparsers.add_parser("tx", help="Append an entry")
+    tx.add_argument("--from", dest="sender", required=True)
+    tx.add_argument("--to", dest="recipient", required=True)
+    tx.add_argument("--type", dest="msg_type", default="LOG")
+    tx.add_argument("--msg", required=True)
+
+    latest = subparsers.add_parser("latest", help="Print the last N lines")
+    latest.add_argument("-n", "--lines", type=int, default=20)
+
+    query = subparsers.add_parser("query", help="Print entries matching filters (via the index)")
+    query.add_argument("--from", dest="sender")
+    query.add_argument("--to", dest="recipient")
+    query.add_argument("--type", dest="msg_type")
+    query.add_argument("--since", help="ISO timestamp, e.g. 2024-05-01T10:00:00")
+    query.add_argument("--id", dest="msg_id", help="Request ID ([ID:x] or [RE:x])")
+
+    subparsers.add_parser("reindex", help="Rebuild the segment indexes")
+
+    args = parser.parse_args()
+    journal = Journal(DEFAULT_LOG)
+
+    if args.command == "tx":
+        sys.exit(0 if append_entry(args.sender, args.recipient, args.msg_type, args.msg) else 1)
+    elif args.command == "latest":
+        sys.stdout.write("".join(read_latest(args.lines)))
+    elif args.command == "query":
+        for rec in journal.query(args.since, args.sender, args.recipient, args.msg_type, args.msg_id):
+            print(journal.read_entry(rec))
+    elif args.command == "reindex":
+        journal.reindex()
+        print(f"🗂️  Reindexed {len(journal.segments())} segment(s)")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
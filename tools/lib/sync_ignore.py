@@ -1,8 +1,13 @@
 import sys
 import os
-import yaml
+import json
+import hashlib
+import argparse
 from pathlib import Path
 
+import weave_glob
+import weave_config
+
 # Safety: These must NEVER be ignored, or the toolchain breaks.
 # We whitelist them to ensure they survive a "Nuclear" (*) ignore.
 SYSTEM_WHITELIST = [
@@ -14,57 +19,225 @@ SYSTEM_WHITELIST = [
     "!weave.yaml"
 ]
 
+FINGERPRINT_PREFIX = "# fingerprint: "
+
+# Precomputed file list for launchers (one path per line), see allowlist.py
+ALLOWLIST_PATH = os.path.join(".mission", "gen", "allowlist.txt")
+
 def load_config(repo_root):
-    config_paths = [
-        Path(repo_root) / ".weaves/weave.yaml",
-        Path(repo_root) / ".mission/weave.yaml",
-        Path(repo_root) / "weave.yaml",
-    ]
-    for path in config_paths:
-        if path.exists():
+    return weave_config.load_config(repo_root)
+
+def _allow(pat):
+    # Ensure it starts with '!' to act as an exception
+    clean_pat = pat.strip()
+    if not clean_pat.startswith("!"):
+        clean_pat = f"!{clean_pat}"
+    return clean_pat
+
+def fingerprint(config, resolved=None, dirs=None):
+    """
+    Hash of everything the generated file depends on: config sections, resolved files
+    and, in resolve mode, the directories collapse_dirs may turn into '!dir/' rules.
+    """
+    state = {
+        "system": SYSTEM_WHITELIST,
+        "ignores": config.get("ignores", []),
+        "views": config.get("views", {}),
+        "whitelist": config.get("whitelist", []),
+        "resolved": resolved,
+        "dirs": dirs,
+    }
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+def read_fingerprint(ignore_file):
+    try:
+        with open(ignore_file, 'r') as f:
+            for line in f:
+                if not line.startswith("#"):
+                    break
+                if line.startswith(FINGERPRINT_PREFIX):
+                    return line[len(FINGERPRINT_PREFIX):].strip()
+    except OSError:
+        pass
+    return None
+
+def dir_stamps(files):
+    """
+    mtimes of every ancestor directory of files. Adding or removing any entry (even
+    one outside the views) changes them, so a collapsed '!dir/' rule is re-checked.
+    """
+    dirs = set()
+    for f in files:
+        d = os.path.dirname(os.path.normpath(f))
+        while d and d not in dirs:
+            dirs.add(d)
+            d = os.path.dirname(d)
+    stamps = []
+    for d in sorted(dirs):
+        try:
+            stamps.append([d, os.stat(d).st_mtime_ns])
+        except OSError:
+            stamps.append([d, None])
+    return stamps
+
+def view_files(resolved):
+    files = set()
+    for files_of_view in (resolved or {}).values():
+        files.update(f for f in files_of_view if not f.startswith("!"))
+    return files
+
+def collapse_dirs(files):
+    """
+    Minimal allow rules for a concrete file set: a directory whose entries are ALL
+    allowed (recursively) becomes one '!dir/' rule, other files stay literal.
+    """
+    allowed = set(os.path.normpath(f) for f in files)
+    by_dir = {}
+    for f in allowed:
+        d = os.path.dirname(f)
+        while d:
+            by_dir.setdefault(d, set())
+            d = os.path.dirname(d)
+
+    covered = {}
+    def is_covered(d):
+        if d not in covered:
             try:
-                with open(path, 'r') as f:
-                    return yaml.safe_load(f) or {}
-            except Exception:
-                pass
-    return {}
+                with os.scandir(d) as it:
+                    entries = [(os.path.join(d, e.name), e.is_dir(follow_symlinks=False)) for e in it]
+            except OSError:
+                entries = [None]
+            covered[d] = bool(entries) and all(
+                e is not None and ((e[0] in by_dir and is_covered(e[0])) if e[1] else e[0] in allowed)
+                for e in entries)
+        return covered[d]
+
+    rules = set()
+    for f in allowed:
+        # Topmost fully covered ancestor wins
+        top = None
+        d = os.path.dirname(f)
+        while d:
+            if is_covered(d):
+                top = d
+            d = os.path.dirname(d)
+        rules.add(f"!{top}/" if top else f"!{f}")
+    return rules
+
+# Pseudo-view resolving the whitelist: entries for the allowlist
+WHITELIST_VIEW = "(whitelist)"
+
+def allowlist_views(config):
+    """The views plus the whitelist: entries as one more view ('dir/' expands to its files)."""
+    views = dict(config.get("views") or {})
+    patterns = []
+    for pat in config.get("whitelist") or []:
+        pat = pat.strip().lstrip("!")
+        patterns.append(f"{pat}**" if pat.endswith("/") else pat)
+    if patterns:
+        views[WHITELIST_VIEW] = patterns
+    return views
+
+def allowlist_fingerprint(views):
+    """Changes when the views/whitelist change or any of their manifests is rewritten."""
+    state = {"views": views, "manifests": weave_glob.manifest_stamps(views)}
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+def build_allowlist(resolved):
+    """Concrete files of all views plus the literal system entries that exist as files."""
+    files = view_files(resolved)
+    for pat in SYSTEM_WHITELIST:
+        path = pat.lstrip("!")
+        if not path.endswith("/") and not weave_glob.has_magic(path):
+            files.add(path)
+    return sorted(f for f in files if os.path.isfile(f))
+
+def write_allowlist(files, path=ALLOWLIST_PATH, fp=None):
+    """Writes the allowlist if its content changed. Returns True if written."""
+    content = f"{FINGERPRINT_PREFIX}{fp}\n" if fp else ""
+    content += "".join(f"{f}\n" for f in files)
+    try:
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(content)
+    os.replace(tmp, path)
+    return True
+
+def refresh_allowlist(config, resolved=None, path=ALLOWLIST_PATH):
+    """
+    Rewrites the allowlist from resolved (allowlist_views, already resolved) or, if
+    None, only when a view manifest or the config changed since the last write.
+    Returns True if written.
+    """
+    views = allowlist_views(config)
+    if resolved is None:
+        if read_fingerprint(path) == allowlist_fingerprint(views):
+            return False
+        resolved = weave_glob.resolve_views(views)
+    # After resolving: the walk may have rewritten manifests
+    return write_allowlist(build_allowlist(resolved), path, allowlist_fingerprint(views))
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate .aiderignore from weave views")
+    parser.add_argument("--resolve", action="store_true",
+                        help="Allow the concrete files of each view (collapsed into directory rules) instead of its patterns")
+    args = parser.parse_args()
+
     repo_root = Path(os.getcwd()).resolve()
     config = load_config(repo_root)
+    ignore_file = repo_root / ".aiderignore"
+
+    # Served from the view manifests when nothing changed (weave_glob)
+    resolved = None
+    allowed = None
+    if args.resolve:
+        allowed = weave_glob.resolve_views(allowlist_views(config))
+        resolved = {name: files for name, files in allowed.items() if name != WHITELIST_VIEW}
+
+    # 0. The allowlist follows the view manifests (tools/bin/allowlist re-resolves them)
+    if refresh_allowlist(config, allowed):
+        print(f"📋 Updated {ALLOWLIST_PATH}")
+
+    # 1. Skip when nothing the .aiderignore depends on has changed
+    files = view_files(resolved) if resolved is not None else None
+    fp = fingerprint(config, resolved, dir_stamps(files) if files is not None else None)
+    if read_fingerprint(ignore_file) == fp:
+        sys.exit(0)
     
-    # 1. The Blocklist (User defined)
+    # 2. The Blocklist (User defined)
     # If you want "Nuclear", you put "*" in this list in weave.yaml
     ignore_lines = []
     if "ignores" in config:
         ignore_lines = config["ignores"]
     
-    # 2. The Allowlist (Derived from Views + System)
+    # 3. The Allowlist (Derived from Views + System)
     # We use a set to avoid duplicates
     whitelist_lines = set(SYSTEM_WHITELIST)
     
-    if "views" in config:
+    if resolved is not None:
+        whitelist_lines.update(collapse_dirs(files))
+    elif "views" in config:
         for view_name, patterns in config["views"].items():
             for pat in patterns:
-                # Ensure it starts with '!' to act as an exception
-                clean_pat = pat.strip()
-                if not clean_pat.startswith("!"):
-                    clean_pat = f"!{clean_pat}"
-                whitelist_lines.add(clean_pat)
+                whitelist_lines.add(_allow(pat))
     
     # Add manual whitelist entries if they exist in config
     if "whitelist" in config:
         for pat in config["whitelist"]:
-            clean_pat = pat.strip()
-            if not clean_pat.startswith("!"):
-                clean_pat = f"!{clean_pat}"
-            whitelist_lines.add(clean_pat)
+            whitelist_lines.add(_allow(pat))
 
-    # 3. Construct File Content
+    # 4. Construct File Content
     # CRITICAL: Ignores must come FIRST. Whitelists must come LAST to override them.
     
     header = "# Auto-generated by Mission Control (sync_ignore)\n"
     header += "# strategy: Nuclear/Surgical mixed mode\n"
+    header += f"{FINGERPRINT_PREFIX}{fp}\n"
     
     content = header + "\n"
     
@@ -77,9 +250,7 @@ def main():
     content += "# --- ALLOWS (views + system) ---\n"
     content += "\n".join(sorted(list(whitelist_lines))) + "\n"
 
-    # 4. Write (Idempotent)
-    ignore_file = repo_root / ".aiderignore"
-    
+    # 5. Write (Idempotent)
     if ignore_file.exists():
         with open(ignore_file, 'r') as f:
             current_content = f.read()
@@ -90,7 +261,8 @@ def main():
     with open(ignore_file, 'w') as f:
         f.write(content)
         
-    print(f"☢️  Synced .aiderignore ({len(whitelist_lines)} allowed patterns)")
+    mode = "resolved files" if resolved is not None else "patterns"
+    print(f"☢️  Synced .aiderignore ({len(whitelist_lines)} allowed {mode})")
 
 if __name__ == "__main__":
     main()
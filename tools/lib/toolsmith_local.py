@@ -1,62 +1,222 @@
 import os
-import time
+import re
 import subprocess
 import sys
 import json
+import time
+import queue
+import inspect
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from journal import JournalTail, EnvelopeReader
+from radio import Journal
+
 # --- Configuration ---
 LOG_FILE = os.environ.get("MISSION_JOURNAL") or ".mission-context/mission_log.md"
 REPO_ROOT = "/repo"
 CURRENT_CONTEXT = REPO_ROOT
 
+# Requests run on a bounded pool; see lane_for() for what stays ordered
+WORKERS = int(os.environ.get("LOCALSMITH_WORKERS") or 4)
+
+# Verification output: streamed to last_run.log, only this many (filtered) lines ACKed
+TAIL_LINES = int(os.environ.get("LOCALSMITH_TAIL_LINES") or 200)
+# Seconds between progress heartbeats while a verification runs
+HEARTBEAT_SECS = float(os.environ.get("LOCALSMITH_HEARTBEAT") or 15)
+
+# Batched ACK writer (set by main); None => ACKs are written inline
+_ACKS = None
+
+# '[CTX] Switch to <path>' in a legacy line or in the text of a broadcast entry
+CTX_RE = re.compile(r"\[CTX\]\s*Switch to (.+)")
+
 def log(msg):
     """Prints to Docker logs with flushing."""
     timestamp = datetime.now().strftime("%H:%M:%S")
     print(f"[{timestamp}] {msg}", flush=True)
 
-def apply_filters(text):
-    """Applies all filters in .ddd/filters/ to the text."""
-    lines = text.splitlines()
-    filter_dir = os.path.join(REPO_ROOT, ".ddd", "filters")
-    
-    if not os.path.exists(filter_dir):
-        return text
+# Compiled filters: path -> ((mtime_ns, size), filter function or load error)
+_FILTER_CACHE = {}
+_FILTER_LOCK = threading.Lock()
+# Seconds spent in each stage during the last filter run
+FILTER_STATS = {}
 
-    # simple mechanism: load python files, expecting 'def filter(lines): return lines'
+def load_filters(filter_dir=None):
+    """
+    Returns [(name, filter or error)] for .ddd/filters/*.py in name order. Each file is
+    compiled once and reused until its mtime or size changes.
+    """
+    filter_dir = filter_dir or os.path.join(REPO_ROOT, ".ddd", "filters")
+    if not os.path.isdir(filter_dir):
+        return []
+    filters = []
     for f in sorted(os.listdir(filter_dir)):
-        if f.endswith(".py"):
+        if not f.endswith(".py"):
+            continue
+        path = os.path.join(filter_dir, f)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stamp = (st.st_mtime_ns, st.st_size)
+        with _FILTER_LOCK:
+            cached = _FILTER_CACHE.get(path)
+        if not cached or cached[0] != stamp:
             try:
-                # Dynamic import/exec
-                path = os.path.join(filter_dir, f)
                 with open(path, "r") as pyf:
-                    code = pyf.read()
-                
+                    code = compile(pyf.read(), path, "exec")
                 # Sandboxed execution context
-                local_scope = {}
-                exec(code, {}, local_scope)
-                
-                if "filter" in local_scope:
-                    lines = local_scope["filter"](lines)
+                scope = {}
+                exec(code, scope)
+                fn = scope.get("filter")
             except Exception as e:
-                lines.append(f"[Filter Error {f}]: {e}")
-                
-    return "\n".join(lines)
+                fn = e
+            cached = (stamp, fn)
+            with _FILTER_LOCK:
+                _FILTER_CACHE[path] = cached
+        if cached[1] is not None:
+            filters.append((f, cached[1]))
+    return filters
 
-def write_ack(message):
-    """Writes an [ACK] to the radio file."""
-    timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-    entry = f"\n### [{timestamp}] [LocalSmith -> Director] [ACK] {message}\n"
-    
+def streams(fn):
+    """Filters opt in to streaming by being generator functions or setting filter.streaming = True."""
+    return inspect.isgeneratorfunction(fn) or bool(getattr(fn, "streaming", False))
+
+def _passthrough(lines):
+    for line in lines:
+        yield line
+
+class _Stage:
+    """
+    One lazy step of the filter pipeline. Time spent pulling from it (upstream
+    included) accumulates in elapsed. Plain filters get the full list of lines (the
+    documented contract); streaming filters get an iterator. A failing filter lets
+    its input through unchanged and the error is appended, as before.
+    """
+    def __init__(self, name, fn, upstream):
+        self.name = name
+        self.fn = fn
+        self.upstream = upstream
+        self.it = None
+        self.elapsed = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            if self.it is None:
+                if isinstance(self.fn, Exception):
+                    self.it = self._failed(self.fn)
+                elif streams(self.fn):
+                    self.it = self._stream()
+                else:
+                    self.it = self._materialized()
+            return next(self.it)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def _error(self, e):
+        return f"[Filter Error {self.name}]: {e}"
+
+    def _failed(self, e):
+        for line in self.upstream:
+            yield line
+        yield self._error(e)
+
+    def _materialized(self):
+        lines = list(self.upstream)
+        try:
+            result = list(self.fn(lines))
+        except Exception as e:
+            for line in lines:
+                yield line
+            yield self._error(e)
+            return
+        for line in result:
+            yield line
+
+    def _stream(self):
+        # Input read since the filter last produced output: on error it is passed
+        # through with the rest, so no line is lost
+        consumed = []
+        def source():
+            for line in self.upstream:
+                consumed.append(line)
+                yield line
+        try:
+            for line in self.fn(source()):
+                del consumed[:]
+                yield line
+        except Exception as e:
+            for line in consumed:
+                yield line
+            for line in self.upstream:
+                yield line
+            yield self._error(e)
+
+def filter_lines(lines, filter_dir=None):
+    """
+    Chains all filters over an iterable of lines and yields the result. Plain filters
+    get a list; generator filters (or filter.streaming = True) get an iterator and
+    keep memory bounded. Timings land in FILTER_STATS.
+    """
+    stages = [_Stage("read", _passthrough, (l.rstrip("\r\n") for l in lines))]
+    for name, fn in load_filters(filter_dir):
+        stages.append(_Stage(name, fn, stages[-1]))
+    try:
+        for line in stages[-1]:
+            yield line
+    finally:
+        # Each stage's time includes its upstream: subtract to get its own share
+        stats = {}
+        upstream = 0.0
+        for stage in stages:
+            stats[stage.name] = max(stage.elapsed - upstream, 0.0)
+            upstream = stage.elapsed
+        with _FILTER_LOCK:
+            FILTER_STATS.clear()
+            FILTER_STATS.update(stats)
+        if len(stages) > 1:
+            log("Filter timings: " + format_filter_stats())
+
+def format_filter_stats():
+    with _FILTER_LOCK:
+        stats = list(FILTER_STATS.items())
+    return ", ".join(f"{name} {secs * 1000:.1f}ms" for name, secs in stats)
+
+def apply_filters(text):
+    """Applies all filters in .ddd/filters/ to the text."""
+    return "\n".join(filter_lines(text.splitlines()))
+
+def write_ack(message, req_id=None, msg_type="ACK"):
+    """Writes an [ACK] to the radio file (and its envelope, replying to req_id)."""
+    if _ACKS is not None:
+        _ACKS.put(message, req_id, msg_type)
+        return
     try:
-        with open(LOG_FILE, "a") as f:
-            f.write(entry)
-            f.flush()
-            os.fsync(f.fileno())
-        log(f"Sent ACK: {message}")
+        Journal(LOG_FILE).append("LocalSmith", "Director", msg_type, message, fsync=True,
+                                 body={"message": message}, reply_to=req_id)
+        log(f"Sent {msg_type}: {message}")
     except Exception as e:
         log(f"Radio Write Error: {e}")
 
+def write_text_atomic(path, content):
+    """Writes via a temp file and rename, so concurrent readers never see a partial file."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
 def execute_shell(cmd, cwd=REPO_ROOT):
     try:
         res = subprocess.run(cmd, shell=True, cwd=cwd, capture_output=True, text=True)
@@ -64,7 +224,58 @@ def execute_shell(cmd, cwd=REPO_ROOT):
     except Exception as e:
         return f"Exception: {e}"
 
-def process_command(cmd_text):
+
+def stream_shell(cmd, log_path, cwd=REPO_ROOT, progress=None, interval=None):
+    """
+    Runs cmd, writing stdout and stderr (interleaved) to log_path as they are produced.
+    While it runs, progress(message) is called every interval seconds.
+    Returns (exit code, number of lines written).
+    """
+    interval = interval or HEARTBEAT_SECS
+    state = {"lines": 0, "last": ""}
+    done = threading.Event()
+    start = time.time()
+
+    def heartbeat():
+        while not done.wait(interval):
+            progress(f"Verification running ({time.time() - start:.0f}s, {state['lines']} lines): {state['last'][:200]}")
+
+    with open(log_path, "w", buffering=1) as lf:
+        proc = subprocess.Popen(cmd, shell=True, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                text=True, errors="replace")
+        if progress:
+            threading.Thread(target=heartbeat, daemon=True).start()
+        try:
+            for line in proc.stdout:
+                lf.write(line)
+                state["lines"] += 1
+                state["last"] = line.rstrip()
+        finally:
+            proc.stdout.close()
+            code = proc.wait()
+            done.set()
+    return code, state["lines"]
+
+def summarize_log(log_path, limit=None):
+    """Filters the log (streamed) and returns its last `limit` lines, noting what was cut."""
+    limit = limit or TAIL_LINES
+    tail = deque(maxlen=limit)
+    total = 0
+    with open(log_path, "r", errors="replace") as f:
+        for line in filter_lines(f):
+            tail.append(line)
+            total += 1
+    summary = "\n".join(tail).strip()
+    if total > len(tail):
+        summary = f"[... {total - len(tail)} earlier lines in {log_path}]\n{summary}"
+    return summary
+
+def process_command(cmd_text, context=None, progress=None):
+    """
+    Runs one command; context is the working context captured when it was received.
+    Long-running commands report through progress(message) when given.
+    """
+    context = context or CURRENT_CONTEXT
     log(f"Processing: {cmd_text}")
     
     # Normalizing command
@@ -102,12 +313,9 @@ def process_command(cmd_text):
                     except: pass
             
             data[key] = value
-            
-            with open(cfg_file, "w") as f:
-                json.dump(data, f)
+            write_text_atomic(cfg_file, json.dumps(data))
                 
             return f"Config updated: {key} -> {value}"
-            return f"Config updated: {key} -> {value}"
         return "Config format error. Use: set <key> to <value>"
 
     # 3. CREATE FILTER (New)
@@ -127,8 +335,7 @@ def process_command(cmd_text):
             filter_dir = os.path.join(REPO_ROOT, ".ddd", "filters")
             os.makedirs(filter_dir, exist_ok=True)
             
-            with open(os.path.join(filter_dir, filename), "w") as f:
-                f.write(content)
+            write_text_atomic(os.path.join(filter_dir, filename), content)
                 
             return f"Filter created: {filename}"
         except Exception as e:
@@ -138,11 +345,11 @@ def process_command(cmd_text):
     elif "verification" in cmd_clean:
         # Read the config we just saved (Context-Aware)
         try:
-            cfg_path = os.path.join(CURRENT_CONTEXT, ".ddd/config.json")
+            cfg_path = os.path.join(context, ".ddd/config.json")
             # Fallback to Root if context config missing? No, strict is better for now.
             
             # If config doesn't exist in subtext, maybe fallback to root?
-            if not os.path.exists(cfg_path) and CURRENT_CONTEXT != REPO_ROOT:
+            if not os.path.exists(cfg_path) and context != REPO_ROOT:
                  cfg_path = os.path.join(REPO_ROOT, ".ddd/config.json")
 
             cmd = "echo 'System Online'"
@@ -151,19 +358,16 @@ def process_command(cmd_text):
                     cfg = json.load(f)
                     cmd = cfg.get("verification_command", cmd)
             
-            # Execute in Context!
-            output = execute_shell(cmd, cwd=CURRENT_CONTEXT)
-                
-            # 1. Save Raw Log (in Context)
-            log_dir = os.path.join(CURRENT_CONTEXT, ".ddd")
+            # 1. Execute in Context, streaming the Raw Log (in Context)
+            log_dir = os.path.join(context, ".ddd")
             os.makedirs(log_dir, exist_ok=True)
             log_path = os.path.join(log_dir, "last_run.log")
-            
-            with open(log_path, "w") as lf:
-                lf.write(output)
+            code, _ = stream_shell(cmd, log_path, cwd=context, progress=progress)
 
-            # 2. Apply Filters
-            filtered_output = apply_filters(output)
+            # 2. Apply Filters (only the tail is kept for the ACK)
+            filtered_output = summarize_log(log_path)
+            if code != 0:
+                filtered_output = f"Error (exit {code}): {filtered_output}"
             return f"Verification Output: {filtered_output}"
         except Exception as e:
             return f"Verification Error: {e}"
@@ -174,12 +378,16 @@ def process_command(cmd_text):
         if not os.path.exists(log_path):
             return "No previous logs found. Run verification first."
             
+        # Streamed: the log is never held in memory unfiltered
         with open(log_path, "r") as f:
-            raw_output = f.read()
-            
-        filtered_output = apply_filters(raw_output)
+            filtered_output = "\n".join(filter_lines(f))
         return f"Replay Output: {filtered_output}"
 
+    elif cmd_clean == "filter stats":
+        if not FILTER_STATS:
+            return "No filter runs yet."
+        return f"Filter Stats: {format_filter_stats()}"
+
     # 4. ECHO/DEBUG
     elif cmd_clean.startswith("echo "):
         return execute_shell(cmd_clean)
@@ -188,6 +396,209 @@ def process_command(cmd_text):
     else:
         return f"Unknown command: {cmd_clean}"
 
+class AckWriter:
+    """
+    Single writer thread for ACKs: whatever queued up while the previous batch was
+    being written goes out as one journal append with a single fsync.
+    """
+    def __init__(self, log_file):
+        self.journal = Journal(log_file)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, message, req_id=None, msg_type="ACK"):
+        self.queue.put((message, req_id, msg_type))
+
+    def flush(self):
+        self.queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.journal.append_batch([{"sender": "LocalSmith", "recipient": "Director", "msg_type": msg_type,
+                                            "content": message, "body": {"message": message}, "reply_to": req_id}
+                                           for message, req_id, msg_type in batch], fsync=True)
+                for message, _, msg_type in batch:
+                    log(f"Sent {msg_type}: {message}")
+            except Exception as e:
+                log(f"Radio Write Error: {e}")
+            for _ in batch:
+                self.queue.task_done()
+
+class _Task:
+    def __init__(self, fn, deps=()):
+        self.fn = fn
+        self.deps = list(deps) # Tasks of other lanes that must finish first
+        self.done = False
+        self.callbacks = []
+
+class LanePool:
+    """
+    Bounded thread pool where tasks sharing a lane run one at a time, in submission
+    order. A task may also wait for the tasks already submitted to other lanes
+    (see lanes_ordered); a lane blocked that way gives its worker back until they
+    finish. Tasks without a lane run as soon as a worker is free.
+    """
+    def __init__(self, workers=WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.lock = threading.Lock()
+        self.lanes = {} # lane -> deque of waiting tasks (present while a task of the lane runs)
+        self.last = {}  # lane -> last task submitted to it
+        self.idle = threading.Condition(self.lock)
+        self.pending = 0 # Submitted tasks not yet finished (parked ones included)
+
+    def submit(self, lane, fn, after=None):
+        """after(other_lane) -> True if this task must wait for other_lane's earlier tasks."""
+        with self.lock:
+            self.pending += 1
+        if lane is None:
+            self.executor.submit(self._drain, None, _Task(fn))
+            return
+        with self.lock:
+            deps = [t for other, t in self.last.items()
+                    if other != lane and not t.done and after and after(other)]
+            task = _Task(fn, deps)
+            self.last[lane] = task
+            if lane in self.lanes:
+                self.lanes[lane].append(task)
+                return
+            self.lanes[lane] = deque()
+        self._start(lane, task)
+
+    def _blocked(self, lane, task):
+        """Parks the lane on an unfinished dependency (lock held). Returns True if parked."""
+        for dep in task.deps:
+            if not dep.done:
+                dep.callbacks.append(lambda: self._start(lane, task))
+                return True
+        return False
+
+    def _start(self, lane, task):
+        with self.lock:
+            if self._blocked(lane, task):
+                return
+        self.executor.submit(self._drain, lane, task)
+
+    def _run(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            log(f"Request Error: {e}")
+
+    def _finish(self, task):
+        with self.lock:
+            task.done = True
+            callbacks, task.callbacks = task.callbacks, []
+            self.pending -= 1
+            self.idle.notify_all()
+        for callback in callbacks:
+            callback()
+
+    def _drain(self, lane, task):
+        while True:
+            try:
+                self._run(task.fn)
+            finally:
+                self._finish(task)
+            if lane is None:
+                return
+            with self.lock:
+                if not self.lanes[lane]:
+                    del self.lanes[lane]
+                    return
+                task = self.lanes[lane].popleft()
+                if self._blocked(lane, task):
+                    return
+
+    def shutdown(self):
+        """Waits for every submitted task (parked ones too), then stops the workers."""
+        with self.lock:
+            while self.pending:
+                self.idle.wait()
+        self.executor.shutdown(wait=True)
+
+def lane_for(cmd_text, context):
+    """
+    Serialization lane of a command (mirrors process_command's dispatch order):
+    builds and log replays are ordered per context, config/filesystem edits share
+    one lane (read-modify-write), everything else runs freely.
+    """
+    cmd_clean = cmd_text.strip()
+    if cmd_clean.startswith(("backup ", "set ", "create filter ")):
+        return ("config", REPO_ROOT)
+    if "verification" in cmd_clean or "replay logs" in cmd_clean:
+        return ("build", context)
+    return None
+
+def lanes_ordered(lane, other):
+    """Builds read what config edits write: the two keep arrival order with each other."""
+    return lane is not None and {lane[0], other[0]} == {"config", "build"}
+
+def run_request(cmd_text, context, req_id=None):
+    progress = lambda message: write_ack(message, req_id, "LOG")
+    write_ack(process_command(cmd_text, context, progress), req_id)
+
+def submit_request(pool, cmd_text, req_id=None):
+    """Queues a request with the context current at receipt time (inline without a pool)."""
+    context = CURRENT_CONTEXT
+    if pool is None:
+        run_request(cmd_text, context, req_id)
+    else:
+        lane = lane_for(cmd_text, context)
+        pool.submit(lane, lambda: run_request(cmd_text, context, req_id),
+                    after=lambda other: lanes_ordered(lane, other))
+
+def switch_context(new_ctx):
+    global CURRENT_CONTEXT
+    CURRENT_CONTEXT = new_ctx
+    log(f"Context Switched to: {CURRENT_CONTEXT}")
+
+def handle_envelope(env, pool=None):
+    """
+    Dispatches one structured message addressed to LocalSmith or to All. Both come
+    through one stream, so a broadcast context switch and the requests after it are
+    handled in the order they were written.
+    """
+    body = env.get("body") or {}
+    text = body.get("text", "")
+    match = CTX_RE.search(text)
+    if env.get("type") == "CTX" and text.startswith("Switch to "):
+        switch_context(text[len("Switch to "):].strip())
+    elif env.get("type") == "REQ" and env.get("from") == "Director" and env.get("to") == "LocalSmith":
+        submit_request(pool, body.get("command") or text, env.get("id"))
+    elif match:
+        # e.g. 'radio tx --to All --msg "[CTX] Switch to <path>"'
+        switch_context(match.group(1).strip())
+
+def handle_line(line, pool=None):
+    """Dispatches one legacy journal line (tagged entries arrive as envelopes instead)."""
+    if "[ID:" in line or "[RE:" in line:
+        return
+    # Look for [CTX] Signal
+    match = CTX_RE.search(line)
+    if match:
+        try:
+            switch_context(match.group(1).strip())
+        except Exception:
+            pass
+
+    # Look for [REQ] from Director
+    if "[REQ]" in line and "[Director -> LocalSmith]" in line:
+        # log(f"Detected REQ: {line.strip()}")
+        # Extract command part
+        try:
+            cmd_part = line.split("[REQ]", 1)[1].strip()
+            submit_request(pool, cmd_part)
+        except Exception as e:
+            log(f"Parse Error: {e}")
+
 def main():
     log("LocalSmith v2 Daemon Started.")
     
@@ -196,39 +607,23 @@ def main():
         with open(LOG_FILE, "w") as f:
             f.write("# Mission Log\n")
 
-    # Open file and go to end
-    f = open(LOG_FILE, "r")
-    f.seek(0, 2)
+    # Follow from the end: woken by inotify on append (short poll as fallback)
+    inbox = EnvelopeReader(LOG_FILE, recipient=("LocalSmith", "All"), from_end=True)
+    tail = JournalTail(LOG_FILE, from_end=True)
+    
+    # Requests run concurrently; ACKs are written by one thread, fsync'd per batch
+    global _ACKS
+    _ACKS = AckWriter(LOG_FILE)
+    pool = LanePool(WORKERS)
     
     # Signal Readiness to the Radio (for synchronization)
     write_ack("Daemon Online")
 
     while True:
-        line = f.readline()
-        if not line:
-            time.sleep(0.1)
-            continue
-            
-        # Look for [CTX] Signal
-        if "[CTX] Switch to " in line:
-            try:
-                new_ctx = line.split("[CTX] Switch to ", 1)[1].strip()
-                global CURRENT_CONTEXT
-                CURRENT_CONTEXT = new_ctx
-                log(f"Context Switched to: {CURRENT_CONTEXT}")
-            except Exception:
-                pass
-
-        # Look for [REQ] from Director
-        if "[REQ]" in line and "[Director -> LocalSmith]" in line:
-            # log(f"Detected REQ: {line.strip()}")
-            # Extract command part
-            try:
-                cmd_part = line.split("[REQ]", 1)[1].strip()
-                response = process_command(cmd_part)
-                write_ack(response)
-            except Exception as e:
-                log(f"Parse Error: {e}")
+        for line in tail.read_lines():
+            handle_line(line, pool)
+        for env in inbox.poll(1.0):
+            handle_envelope(env, pool)
 
 if __name__ == "__main__":
     main()
@@ -2,11 +2,15 @@ import argparse
 import json
 import sys
 import os
-import yaml
-import glob
-import subprocess
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import c_context
+import weave_glob
+import weave_config
+
 def find_db(file_path, root_path):
     file_dir = Path(file_path).parent
     candidate = file_dir / "compile_commands.json"
@@ -53,16 +57,74 @@ def generate_context_card(macros, repo_root):
         
     return str(card_path.relative_to(repo_root))
 
-def expand_c_context(file_list, repo_root, manual_macros=None):
-    script_dir = Path(__file__).parent.resolve()
-    c_context_bin = script_dir.parent / "bin" / "c_context"
-    
-    if not c_context_bin.exists():
-        print(f"Warning: c_context binary not found at {c_context_bin}", file=sys.stderr)
-        return file_list
+INCLUDE_RE = re.compile(r'^\s*#\s*include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+DEFAULT_INCLUDE_DEPTH = 3
+
+class IncludeResolver:
+    """
+    Resolves #include directives like the preprocessor: quoted includes search the
+    including file's directory first, then the TU's -I/-isystem paths in order.
+    Directive scans are memoized per file, resolutions per (file, search path).
+    """
+    def __init__(self):
+        self._directives = {}
+        self._resolved = {}
+
+    def directives(self, path):
+        if path not in self._directives:
+            try:
+                with open(path, 'r', errors='replace') as f:
+                    text = f.read()
+                self._directives[path] = [(m.group(1) == '"', m.group(2).strip()) for m in INCLUDE_RE.finditer(text)]
+            except OSError:
+                self._directives[path] = []
+        return self._directives[path]
+
+    def includes_of(self, path, search_dirs):
+        key = (path, search_dirs)
+        if key not in self._resolved:
+            found = []
+            for quoted, name in self.directives(path):
+                dirs = ((os.path.dirname(path),) if quoted else ()) + search_dirs
+                for d in dirs:
+                    candidate = os.path.normpath(os.path.join(d, name))
+                    if os.path.isfile(candidate):
+                        found.append(candidate)
+                        break
+            self._resolved[key] = found
+        return self._resolved[key]
 
+def expand_includes(seeds, repo_root, depth=DEFAULT_INCLUDE_DEPTH, resolver=None):
+    """
+    Worklist expansion of #include directives.
+
+    seeds: [(file path, [include search dirs])]. Every file reached (headers or
+    included sources) is expanded in turn, up to `depth` levels from its seed, with
+    the search path of the TU that reached it. Returns the concrete files found
+    under repo_root, relative to it.
+    """
+    resolver = resolver or IncludeResolver()
+    root = os.path.abspath(repo_root)
+    found = set()
+    visited = set()
+    worklist = deque()
+    for path, search_dirs in seeds:
+        worklist.append((os.path.abspath(os.path.join(root, path)), tuple(search_dirs), 0))
+
+    while worklist:
+        path, search_dirs, level = worklist.popleft()
+        if level >= depth or (path, search_dirs) in visited:
+            continue
+        visited.add((path, search_dirs))
+        for inc in resolver.includes_of(path, search_dirs):
+            if not inc.startswith(root + os.sep):
+                continue # System / out-of-tree header
+            found.add(os.path.relpath(inc, root))
+            worklist.append((inc, search_dirs, level + 1))
+    return found
+
+def expand_c_context(file_list, repo_root, manual_macros=None, depth=DEFAULT_INCLUDE_DEPTH):
     expanded_files = set(file_list)
-    processed_files = set()
     collected_macros = set()
     
     # 0. Inject Manual Macros
@@ -70,41 +132,38 @@ def expand_c_context(file_list, repo_root, manual_macros=None):
         for m in manual_macros:
             collected_macros.add(m)
 
-    for file_path in list(expanded_files):
-        if file_path in processed_files: continue
-        if not file_path.endswith(('.c', '.cpp', '.cc', '.cxx')): continue
+    # Same selectors the c_context CLI would apply
+    config = c_context.load_config(repo_root)
+    required_flags = config.get("context_selector", {}).get("required_flags", [])
 
+    jobs = []
+    for file_path in sorted(set(file_list)):
+        if not file_path.endswith(('.c', '.cpp', '.cc', '.cxx')): continue
         db_path = find_db(file_path, repo_root)
         if not db_path: continue
+        jobs.append((file_path, str(db_path)))
 
-        try:
-            cmd = [
-                str(c_context_bin),
-                file_path,
-                "--db", str(db_path),
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            
-            # 1. Collect Includes
-            for inc in data.get("includes", []):
-                try:
-                    p = Path(inc).relative_to(repo_root)
-                    expanded_files.add(str(p))
-                except ValueError:
-                    expanded_files.add(inc)
-            
-            # 2. Collect Macros
-            for m in data.get("macros", []):
-                collected_macros.add(m)
-
-        except subprocess.CalledProcessError:
-            pass
-        except json.JSONDecodeError:
-            pass
-            
-        processed_files.add(file_path)
+    # In-process: every distinct DB is parsed and indexed once, then all files are
+    # looked up in memory (threads: DB loads are I/O-bound, lookups are cheap)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4)) as pool:
+        list(pool.map(c_context.load_db_index, sorted({db for _, db in jobs})))
+        results = list(pool.map(
+            lambda job: c_context.get_context(job[0], [job[1]], required_flags, repo_root), jobs))
+
+    seeds = []
+    for (file_path, _), data in zip(jobs, results):
+        # 1. Collect Include Search Paths (the headers themselves are resolved below)
+        if data.get("found"):
+            seeds.append((file_path, data.get("includes", [])))
+        
+        # 2. Collect Macros
+        for m in data.get("macros", []):
+            collected_macros.add(m)
+
+    # 3. Concrete headers actually #included (transitively, up to depth)
+    headers = expand_includes(seeds, repo_root, depth)
+    expanded_files.update(headers)
+    print(f"📎 Include expansion: {len(headers)} files (depth {depth})", file=sys.stderr)
     
     # Generate the Card
     card = generate_context_card(collected_macros, repo_root)
@@ -119,63 +178,80 @@ def main():
     subparsers = parser.add_subparsers(dest='command')
 
     subparsers.add_parser('hello', help='Prints a success message in JSON format.')
-    subparsers.add_parser('list', help='List all available views.')
+    parser_list = subparsers.add_parser('list', help='List all available views.')
+    parser_list.add_argument('--count', action='store_true', help='Show the number of files in each view (one walk for all views).')
 
-    parser_get = subparsers.add_parser('get', help='Get all files for a specific view.')
+    parser_get = subparsers.add_parser('get', help='Get all files for one or more views.')
     parser_get.add_argument('view_name', help='The name of the view to get.')
+    parser_get.add_argument('more_views', nargs='*', help='Additional views (resolved in the same walk).')
     parser_get.add_argument('--expand', action='store_true', help='Expand context using C-Context analysis.')
+    parser_get.add_argument('--depth', type=int, default=DEFAULT_INCLUDE_DEPTH, help='Levels of #include to follow with --expand.')
     parser_get.add_argument('--json', action='store_true', help='Output in JSON format.')
 
+    parser_refresh = subparsers.add_parser('refresh', help='Rebuild the cached file manifests of views.')
+    parser_refresh.add_argument('view_names', nargs='*', help='Views to rebuild (default: all).')
+
     args = parser.parse_args()
 
     if args.command == 'hello':
         print(json.dumps({"status": "success", "message": "Hello Weave"}))
         return
 
-    config_paths = ['.weaves/weave.yaml', '.mission/weave.yaml', 'weave.yaml']
-    found_config_path = None
-    for path in config_paths:
-        if os.path.exists(path):
-            found_config_path = path
-            break
-
+    found_config_path = weave_config.find_config()
     if not found_config_path:
         print(f"Error: Configuration file not found.", file=sys.stderr)
         sys.exit(1)
 
-    with open(found_config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = weave_config.parse_config(found_config_path)
 
     if args.command == 'list':
-        for view_name in config.get('views', {}):
-            print(view_name)
+        views = config.get('views', {})
+        if args.count:
+            resolved = weave_glob.resolve_views(views)
+            for view_name in views:
+                print(f"{view_name} ({len(resolved[view_name])} files)")
+        else:
+            for view_name in views:
+                print(view_name)
     elif args.command == 'get':
         views = config.get('views', {})
-        view_patterns = views.get(args.view_name)
-        if view_patterns is None:
-            print(f"Error: View '{args.view_name}' not found.", file=sys.stderr)
-            sys.exit(1)
+        names = [args.view_name] + [v for v in args.more_views if v != args.view_name]
+        for name in names:
+            if views.get(name) is None:
+                print(f"Error: View '{name}' not found.", file=sys.stderr)
+                sys.exit(1)
 
+        # Cached manifests: only directories changed since the last call are re-scanned
+        resolved = weave_glob.resolve_views({name: views[name] for name in names})
         initial_files = set()
-        for pattern in view_patterns:
-            for f in glob.glob(pattern, recursive=True):
-                initial_files.add(f)
+        for name in names:
+            initial_files.update(resolved[name])
         
         # --- NEW: Extract Extra Defines ---
         extra_defines = []
         if "context_selector" in config:
             extra_defines = config["context_selector"].get("extra_defines", [])
 
-        final_files = sorted(list(initial_files))
+        final_files = sorted(initial_files)
         if args.expand:
             repo_root = os.getcwd()
             # Pass manual macros to the expander
-            final_files = expand_c_context(final_files, repo_root, manual_macros=extra_defines)
+            final_files = expand_c_context(final_files, repo_root, manual_macros=extra_defines, depth=args.depth)
 
         if args.json:
             print(json.dumps(final_files))
         else:
             print(" ".join(final_files))
+    elif args.command == 'refresh':
+        views = config.get('views', {})
+        names = args.view_names or list(views)
+        for name in names:
+            if name not in views:
+                print(f"Error: View '{name}' not found.", file=sys.stderr)
+                sys.exit(1)
+        resolved = weave_glob.resolve_views({name: views[name] for name in names}, refresh=True)
+        for name in names:
+            print(f"🔄 {name}: {len(resolved[name])} files")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+import os
+import marshal
+import threading
+
+import yaml
+
+try:
+    # libyaml bindings: an order of magnitude faster on large view lists
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Search order shared by weave, c_context and sync_ignore
+CONFIG_PATHS = [
+    os.path.join(".weaves", "weave.yaml"),
+    os.path.join(".mission", "weave.yaml"),
+    "weave.yaml",
+]
+
+# Parsed config sidecar (marshal: fast to load and cannot execute code, unlike pickle)
+SIDECAR_PATH = os.path.join(".weaves", "cache", "weave_config.marshal")
+SIDECAR_VERSION = 1
+
+# Parsed configs, memoized per process: abs path -> ((mtime_ns, size), config)
+_MEMO = {}
+_LOCK = threading.Lock()
+
+def find_config(repo_root=None):
+    """Returns the first existing weave.yaml (in search order, relative to cwd by default) or None."""
+    for rel in CONFIG_PATHS:
+        path = rel if repo_root is None else os.path.join(repo_root, rel)
+        if os.path.exists(path):
+            return path
+    return None
+
+def _stamp(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def _read_sidecar(sidecar, key, stamp):
+    try:
+        with open(sidecar, "rb") as f:
+            data = marshal.load(f)
+        if data[0] == SIDECAR_VERSION and data[1] == key and tuple(data[2]) == stamp:
+            return True, data[3]
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        pass
+    return False, None
+
+def _write_sidecar(sidecar, key, stamp, config):
+    try:
+        payload = marshal.dumps((SIDECAR_VERSION, key, stamp, config))
+    except ValueError:
+        return # Not marshalable (e.g. YAML timestamps): just skip the cache
+    try:
+        cache_dir = os.path.dirname(sidecar)
+        os.makedirs(cache_dir, exist_ok=True)
+        ignore = os.path.join(cache_dir, ".gitignore")
+        if not os.path.exists(ignore):
+            with open(ignore, "w") as f:
+                f.write("*\n")
+        tmp = f"{sidecar}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass # Cache is best-effort
+
+def parse_config(path, repo_root=None):
+    """
+    Parses a weave.yaml, reusing (in order) the in-process memo, the on-disk sidecar
+    and finally the YAML parser. Both caches are keyed by the file's (mtime_ns, size).
+    YAML errors propagate.
+    """
+    key = os.path.abspath(path)
+    stamp = _stamp(path)
+    with _LOCK:
+        cached = _MEMO.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+    sidecar = SIDECAR_PATH if repo_root is None else os.path.join(repo_root, SIDECAR_PATH)
+    hit, config = _read_sidecar(sidecar, key, stamp)
+    if not hit:
+        with open(path, "r") as f:
+            config = yaml.load(f, Loader=SafeLoader)
+        _write_sidecar(sidecar, key, stamp, config)
+
+    with _LOCK:
+        _MEMO[key] = (stamp, config)
+    return config
+
+def load_config(repo_root=None):
+    """Parsed weave config of repo_root; {} if missing or invalid."""
+    path = find_config(repo_root)
+    if not path:
+        return {}
+    try:
+        return parse_config(path, repo_root) or {}
+    except Exception:
+        return {}
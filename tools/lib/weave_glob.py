@@ -0,0 +1,314 @@
+import os
+import re
+import json
+import fnmatch
+import hashlib
+
+# Resolved view manifests (one JSON per view), validated by directory mtimes
+CACHE_DIR = os.path.join(".weaves", "cache")
+CACHE_VERSION = 1
+
+MAGIC_RE = re.compile(r"[*?[]")
+RECURSIVE = "**"
+
+def has_magic(s):
+    return MAGIC_RE.search(s) is not None
+
+class TreeCache:
+    """
+    Directory listings keyed by path: {dir: [mtime_ns, [[name, is_dir], ...]]}.
+    A listing is reused while the directory's mtime is unchanged (entries were
+    neither added, removed nor renamed); otherwise the directory is re-scanned.
+    `used` collects every directory consulted, so a result can be re-validated later.
+    """
+    def __init__(self, dirs=None):
+        self.dirs = dirs or {}
+        self.used = {}
+        self.rescanned = 0
+
+    def listdir(self, path):
+        if path in self.used:
+            return self.used[path][1] if self.used[path] else []
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.used[path] = None
+            return []
+        cached = self.dirs.get(path)
+        if cached and cached[0] == mtime:
+            entries = cached[1]
+        else:
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir() # Follows symlinks, like glob
+                        except OSError:
+                            is_dir = False
+                        entries.append([entry.name, is_dir])
+            except OSError:
+                pass
+            self.rescanned += 1
+        self.used[path] = [mtime, entries]
+        return entries
+
+def dirs_unchanged(dirs):
+    """True if every recorded directory still has the recorded mtime (or is still missing)."""
+    for path, record in dirs.items():
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if (record[0] if record else None) != mtime:
+            return False
+    return True
+
+def _compile_segment(seg):
+    if seg == RECURSIVE:
+        return RECURSIVE
+    if not has_magic(seg):
+        return seg
+    # Wildcards never match a leading '.' unless the segment itself starts with one (glob semantics)
+    return (re.compile(fnmatch.translate(seg)), seg.startswith("."))
+
+def _segment_matches(cseg, name):
+    if isinstance(cseg, str):
+        return name == cseg
+    rx, hidden_ok = cseg
+    if name.startswith(".") and not hidden_ok:
+        return False
+    return rx.match(name) is not None
+
+def _join(prefix, name):
+    if not prefix:
+        return name
+    if prefix.endswith("/"):
+        return prefix + name
+    return f"{prefix}/{name}"
+
+def split_pattern(pattern):
+    """Splits a pattern into (literal base parts, wildcard parts, dirs_only)."""
+    dirs_only = pattern.endswith("/") and len(pattern) > 1
+    parts = pattern.rstrip("/").split("/") if dirs_only else pattern.split("/")
+    i = 0
+    while i < len(parts) and not has_magic(parts[i]):
+        i += 1
+    return parts[:i], parts[i:], dirs_only
+
+def _base_str(base_parts):
+    s = "/".join(base_parts)
+    if s == "" and base_parts:
+        return "/" # Absolute pattern with a wildcard right after the root
+    return s
+
+def _foldable(extra):
+    # Literal parts that can be matched against directory listings
+    return all(p not in ("", ".", "..") for p in extra)
+
+# NFA state flags: a trailing '**' entered by advancing (FRESH) yields 'dir/' itself, like glob
+FRESH = 1
+LOOPED = 2
+
+class MultiMatcher:
+    """
+    All patterns of all views compiled into one matcher.
+
+    Patterns are grouped under a minimal set of literal base directories (a pattern
+    whose base lies below another root is folded into it as literal segments), and
+    each root is walked once. Every directory carries the set of NFA states
+    (pattern, segment index) still alive there; directories with no live state are
+    pruned, and matches are assigned to their views during the same pass.
+    """
+    def __init__(self, views):
+        self.pats = [] # (view, [compiled segments], dirs_only)
+        self.literals = [] # (view, pattern, dirs_only)
+        self.roots = {} # base parts tuple -> [(pattern index)]
+        wild = []
+        for view, patterns in views.items():
+            for pattern in patterns:
+                base, rest, dirs_only = split_pattern(pattern)
+                if not rest:
+                    self.literals.append((view, pattern, dirs_only))
+                else:
+                    wild.append((view, tuple(base), rest, dirs_only))
+
+        for base in sorted({w[1] for w in wild}, key=len):
+            if not any(len(r) <= len(base) and base[:len(r)] == r and _foldable(base[len(r):])
+                       for r in self.roots):
+                self.roots[base] = []
+        for view, base, rest, dirs_only in wild:
+            root = max((r for r in self.roots if base[:len(r)] == r and _foldable(base[len(r):])), key=len)
+            segs = [_compile_segment(p) for p in list(base[len(root):]) + rest]
+            self.roots[root].append(len(self.pats))
+            self.pats.append((view, segs, dirs_only))
+
+    def _closure(self, states):
+        stack = list(states.items())
+        while stack:
+            (p, i), flags = stack.pop()
+            segs = self.pats[p][1]
+            if i + 1 < len(segs) and segs[i] is RECURSIVE and not states.get((p, i + 1), 0) & FRESH:
+                # '**' matching zero directories
+                states[(p, i + 1)] = states.get((p, i + 1), 0) | FRESH
+                stack.append(((p, i + 1), FRESH))
+        return states
+
+    def _step(self, states, name):
+        new = {}
+        hidden = name.startswith(".")
+        for (p, i), flags in states.items():
+            seg = self.pats[p][1][i]
+            if seg is RECURSIVE:
+                if not hidden:
+                    new[(p, i)] = new.get((p, i), 0) | LOOPED
+            elif _segment_matches(seg, name):
+                new[(p, i + 1)] = new.get((p, i + 1), 0) | FRESH
+        return self._closure(new)
+
+    def _emit(self, states, path, is_dir, out):
+        for (p, i), flags in states.items():
+            view, segs, dirs_only = self.pats[p]
+            n = len(segs)
+            trailing = i == n - 1 and segs[i] is RECURSIVE
+            if i == n or (trailing and flags & LOOPED):
+                if is_dir:
+                    out[view].add(path + "/" if dirs_only else path)
+                elif not dirs_only:
+                    out[view].add(path)
+            if trailing and flags & FRESH and is_dir and path:
+                out[view].add(path if path.endswith("/") else path + "/")
+
+    def walk(self, tree):
+        """Returns ({view: matches}, {view: {dir: listing record}}) for the wildcard patterns."""
+        out = {view: set() for view, _, _ in self.pats}
+        used = {view: {} for view in out}
+        for root, indices in self.roots.items():
+            out_root = _base_str(list(root))
+            fs_root = out_root or "."
+            states = self._closure({(p, 0): FRESH for p in indices})
+            if os.path.isdir(fs_root):
+                self._emit({k: v for k, v in states.items() if k[1] == len(self.pats[k[0]][1]) - 1},
+                           out_root, True, out)
+            stack = [(fs_root, out_root, states)]
+            while stack:
+                fs_dir, out_dir, states = stack.pop()
+                live = {k: v for k, v in states.items() if k[1] < len(self.pats[k[0]][1])}
+                if not live:
+                    continue
+                entries = tree.listdir(fs_dir)
+                for p, _ in live:
+                    used[self.pats[p][0]][fs_dir] = tree.used[fs_dir]
+                for name, is_dir in entries:
+                    new = self._step(live, name)
+                    if not new:
+                        continue
+                    child = _join(out_dir, name)
+                    self._emit(new, child, is_dir, out)
+                    if is_dir:
+                        fs_child = name if fs_dir == "." else os.path.join(fs_dir, name)
+                        stack.append((fs_child, child, new))
+        return out, used
+
+    def literal_matches(self):
+        """Wildcard-free patterns: a plain existence check each time (never cached)."""
+        out = {}
+        for view, pattern, dirs_only in self.literals:
+            if os.path.isdir(pattern) if dirs_only else os.path.lexists(pattern):
+                out.setdefault(view, set()).add(pattern)
+        return out
+
+def resolve_patterns(patterns, tree=None):
+    """
+    Expands glob patterns (recursive '**', hidden-file rules and output format of
+    glob.glob(..., recursive=True)) in a single pass over scandir listings.
+    Returns the set of matches.
+    """
+    matcher = MultiMatcher({None: patterns})
+    walked, _ = matcher.walk(tree if tree is not None else TreeCache())
+    return walked.get(None, set()) | matcher.literal_matches().get(None, set())
+
+def _manifest_path(cache_dir, view_name):
+    safe = re.sub(r"[^\w.-]", "_", view_name)
+    return os.path.join(cache_dir, f"{safe}.json")
+
+def patterns_key(patterns):
+    return hashlib.sha1(json.dumps(list(patterns)).encode("utf-8")).hexdigest()
+
+def _read_manifest(path):
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == CACHE_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _write_manifest(path, manifest):
+    try:
+        cache_dir = os.path.dirname(path)
+        os.makedirs(cache_dir, exist_ok=True)
+        ignore = os.path.join(cache_dir, ".gitignore")
+        if not os.path.exists(ignore):
+            with open(ignore, "w") as f:
+                f.write("*\n")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass # Cache is best-effort
+
+def manifest_stamps(views, cache_dir=CACHE_DIR):
+    """mtime of each view's manifest ({name: mtime_ns or None}); changes whenever a view is re-resolved."""
+    stamps = {}
+    for name in views:
+        try:
+            stamps[name] = os.stat(_manifest_path(cache_dir, name)).st_mtime_ns
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+def resolve_views(views, cache_dir=CACHE_DIR, refresh=False):
+    """
+    Resolves several views ({name: patterns}) to sorted file lists in one walk.
+
+    Each view has a manifest storing its matches plus the listing and mtime of every
+    directory its patterns consulted. Views whose patterns and directories are
+    unchanged are served from the manifest. All other views are matched together in
+    a single pass, reusing every cached listing whose directory mtime is unchanged.
+    refresh=True ignores the manifests and re-scans everything.
+    """
+    results = {}
+    pending = {}
+    listings = {}
+    for name, patterns in views.items():
+        key = patterns_key(patterns)
+        manifest = None if refresh else _read_manifest(_manifest_path(cache_dir, name))
+        if manifest:
+            listings.update(manifest.get("dirs", {}))
+        if manifest and manifest.get("key") == key and dirs_unchanged(manifest.get("dirs", {})):
+            results[name] = set(manifest.get("files", []))
+        else:
+            pending[name] = (patterns, key)
+
+    if pending:
+        tree = TreeCache(listings)
+        walked, used = MultiMatcher({n: p for n, (p, _) in pending.items()}).walk(tree)
+        for name, (_, key) in pending.items():
+            results[name] = walked.get(name, set())
+            _write_manifest(_manifest_path(cache_dir, name), {
+                "version": CACHE_VERSION,
+                "view": name,
+                "key": key,
+                "dirs": used.get(name, {}),
+                "files": sorted(results[name])
+            })
+
+    literal = MultiMatcher(views).literal_matches()
+    return {name: sorted(results[name] | literal.get(name, set())) for name in views}
+
+def resolve_view(view_name, patterns, cache_dir=CACHE_DIR, refresh=False):
+    """Resolves one view through its manifest (see resolve_views)."""
+    return resolve_views({view_name: patterns}, cache_dir, refresh)[view_name]
@@ -0,0 +1,262 @@
+import io
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import importlib
+import threading
+import subprocess
+import socketserver
+
+# Resident worker: serves CLI tools in-process, keeping imports, parsed configs and
+# compile DB indexes warm. One worker per workspace, listening on a Unix socket.
+RUN_DIR = os.path.join(".weaves", "run")
+SOCKET_PATH = os.path.join(RUN_DIR, "worker.sock")
+PID_PATH = os.path.join(RUN_DIR, "worker.pid")
+
+# Tools the worker may run (tool name -> module exposing main())
+TOOLS = {"c_context": "c_context", "map": "map", "weave": "weave"}
+
+DEFAULT_IDLE_TIMEOUT = 1800 # Seconds without a request before the worker exits
+EX_TEMPFAIL = 75 # "Run it yourself": the client falls back to the cold path
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class _FrameWriter(io.TextIOBase):
+    """File-like object that forwards every write to the client as a JSON frame."""
+    def __init__(self, wfile, stream, lock):
+        self.wfile = wfile
+        self.stream = stream
+        self.lock = lock
+
+    def writable(self):
+        return True
+
+    def write(self, s):
+        if s:
+            send_frame(self.wfile, {self.stream: s}, self.lock)
+        return len(s)
+
+def send_frame(wfile, frame, lock=None):
+    data = (json.dumps(frame) + "\n").encode("utf-8")
+    if lock:
+        with lock:
+            wfile.write(data)
+            wfile.flush()
+    else:
+        wfile.write(data)
+        wfile.flush()
+
+def _lib_mtimes():
+    """mtimes of every loaded module from tools/lib (the worker goes stale when one changes)."""
+    mtimes = {}
+    for mod in list(sys.modules.values()):
+        path = getattr(mod, "__file__", None)
+        if path and os.path.dirname(os.path.abspath(path)) == LIB_DIR:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+    return mtimes
+
+class Worker:
+    def __init__(self, root, tools=None):
+        self.root = os.path.abspath(root)
+        self.tools = dict(tools or TOOLS)
+        # Import once: this is the startup cost every cold invocation pays
+        self.modules = {name: importlib.import_module(mod) for name, mod in self.tools.items()}
+        self.mtimes = _lib_mtimes()
+        self.lock = threading.Lock() # argv, cwd, env and stdout are process-global
+        self.stale = False
+        self.last_request = time.time()
+
+    def is_stale(self):
+        if not self.stale:
+            for path, mtime in self.mtimes.items():
+                try:
+                    current = os.stat(path).st_mtime_ns
+                except OSError:
+                    current = None
+                if current != mtime:
+                    self.stale = True
+                    break
+        return self.stale
+
+    def run(self, request, out, err):
+        """Runs one tool invocation with the client's argv/cwd/env. Returns the exit code."""
+        module = self.modules.get(request.get("tool"))
+        if module is None:
+            return EX_TEMPFAIL
+        with self.lock:
+            saved = (sys.argv, os.getcwd(), dict(os.environ), sys.stdout, sys.stderr)
+            code = 0
+            try:
+                os.chdir(request.get("cwd") or self.root)
+                if request.get("env") is not None:
+                    os.environ.clear()
+                    os.environ.update(request["env"])
+                sys.argv = [request["tool"]] + list(request.get("argv", []))
+                sys.stdout, sys.stderr = out, err
+                module.main()
+            except SystemExit as e:
+                if e.code is None:
+                    code = 0
+                elif isinstance(e.code, int):
+                    code = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    code = 1
+            except Exception as e:
+                print(f"❌ {request.get('tool')}: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.argv, cwd, env, sys.stdout, sys.stderr = saved
+                os.chdir(cwd)
+                os.environ.clear()
+                os.environ.update(env)
+            self.last_request = time.time()
+            return code
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        worker = self.server.worker
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+        except ValueError:
+            return
+        op = request.get("op", "run")
+        if op == "stop":
+            send_frame(self.wfile, {"exit": 0})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if op == "ping":
+            send_frame(self.wfile, {"exit": 0, "pid": os.getpid(), "root": worker.root})
+            return
+        if worker.is_stale():
+            # Tool sources changed: let the client run cold and retire this worker
+            send_frame(self.wfile, {"exit": EX_TEMPFAIL})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        lock = threading.Lock()
+        out = _FrameWriter(self.wfile, "out", lock)
+        err = _FrameWriter(self.wfile, "err", lock)
+        try:
+            code = worker.run(request, out, err)
+            send_frame(self.wfile, {"exit": code}, lock)
+        except OSError:
+            pass # Client went away
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def _cleanup(sock_path, pid_path):
+    for path in (sock_path, pid_path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+def serve(root=".", sock_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT, ready=None):
+    """Serves requests until stopped, stale or idle for idle_timeout seconds."""
+    sock_path = sock_path or os.path.join(root, SOCKET_PATH)
+    pid_path = os.path.join(os.path.dirname(sock_path), os.path.basename(PID_PATH))
+    os.makedirs(os.path.dirname(sock_path), exist_ok=True)
+    if os.path.exists(sock_path):
+        if ping(sock_path):
+            print(f"⚠️  Worker already running on {sock_path}", file=sys.stderr)
+            return 1
+        os.unlink(sock_path) # Leftover from a crashed worker
+
+    worker = Worker(root)
+    server = _Server(sock_path, _Handler)
+    server.worker = worker
+    with open(pid_path, "w") as f:
+        f.write(str(os.getpid()))
+
+    def reaper():
+        while True:
+            time.sleep(min(5, idle_timeout))
+            if time.time() - worker.last_request > idle_timeout and not worker.lock.locked():
+                server.shutdown()
+                return
+    threading.Thread(target=reaper, daemon=True).start()
+
+    if ready:
+        ready.set()
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        server.server_close()
+        _cleanup(sock_path, pid_path)
+    return 0
+
+def _call(sock_path, request, timeout=2):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect(sock_path)
+            s.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            return json.loads(s.makefile("rb").readline().decode("utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def ping(sock_path=SOCKET_PATH):
+    return _call(sock_path, {"op": "ping"})
+
+def stop(sock_path=SOCKET_PATH, wait=2):
+    if _call(sock_path, {"op": "stop"}) is None:
+        return False
+    deadline = time.time() + wait
+    while os.path.exists(sock_path) and time.time() < deadline:
+        time.sleep(0.05)
+    return True
+
+def start(sock_path=SOCKET_PATH, idle_timeout=DEFAULT_IDLE_TIMEOUT, wait=10):
+    """Spawns a detached worker for the current directory and waits for its socket."""
+    if ping(sock_path):
+        return True
+    os.makedirs(os.path.dirname(sock_path), exist_ok=True)
+    log = open(os.path.join(os.path.dirname(sock_path), "worker.log"), "a")
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--socket", sock_path,
+                      "--idle-timeout", str(idle_timeout)],
+                     stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if ping(sock_path):
+            return True
+        time.sleep(0.1)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident worker for c_context/map/weave")
+    parser.add_argument("action", choices=["start", "stop", "status", "serve"])
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--idle-timeout", type=int, default=DEFAULT_IDLE_TIMEOUT, help="Exit after this many idle seconds")
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        sys.exit(serve(".", args.socket, args.idle_timeout))
+    elif args.action == "start":
+        if start(args.socket, args.idle_timeout):
+            print(f"🔥 Worker ready on {args.socket}")
+        else:
+            print(f"❌ Worker failed to start (see {os.path.join(os.path.dirname(args.socket), 'worker.log')})", file=sys.stderr)
+            sys.exit(1)
+    elif args.action == "stop":
+        if stop(args.socket):
+            print("🛑 Worker stopped")
+        else:
+            print("Worker not running.")
+    else:
+        info = ping(args.socket)
+        if info:
+            print(f"🔥 Worker running (pid {info.get('pid')}, root {info.get('root')})")
+        else:
+            print("Worker not running.")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import socket
+
+# Thin client for the resident worker (worker.py). Deliberately stdlib-only and free of
+# tool imports: it runs under the system python3, without the bootstrap/venv step.
+EX_TEMPFAIL = 75 # Worker unavailable or stale: the wrapper falls back to the cold path
+
+def request(sock_path, tool, argv, out=None, err=None):
+    """Runs `tool argv` in the worker, streaming its output. Returns the exit code."""
+    out = out or sys.stdout
+    err = err or sys.stderr
+    try:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.connect(sock_path)
+    except OSError:
+        return EX_TEMPFAIL
+
+    wrote = False
+    try:
+        with s:
+            s.sendall((json.dumps({
+                "tool": tool,
+                "argv": list(argv),
+                "cwd": os.getcwd(),
+                "env": dict(os.environ),
+            }) + "\n").encode("utf-8"))
+            for line in s.makefile("rb"):
+                try:
+                    frame = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                if "out" in frame:
+                    out.write(frame["out"])
+                    out.flush()
+                    wrote = True
+                elif "err" in frame:
+                    err.write(frame["err"])
+                    err.flush()
+                    wrote = True
+                elif "exit" in frame:
+                    return frame["exit"]
+    except OSError:
+        pass
+    # Connection dropped mid-request: only safe to retry cold if nothing was printed
+    return 1 if wrote else EX_TEMPFAIL
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: worker_client.py <socket> <tool> [args...]", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(request(sys.argv[1], sys.argv[2], sys.argv[3:]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+#!/bin/bash
+# Sourced by tools/bin wrappers: `. worker_try.sh <tool> "$@"`
+# Serves the call from the resident worker when one is running (see worker.py).
+# Returns only if the cold path must run (no worker, or it answered 75).
+WORKER_SOCK="${MISSION_WORKER_SOCK:-.weaves/run/worker.sock}"
+if [ -S "$WORKER_SOCK" ] && command -v python3 >/dev/null 2>&1; then
+    set +e
+    python3 "$(dirname "${BASH_SOURCE[0]}")/worker_client.py" "$WORKER_SOCK" "$@"
+    WORKER_RC=$?
+    set -e
+    if [ "$WORKER_RC" -ne 75 ]; then exit "$WORKER_RC"; fi
+fi
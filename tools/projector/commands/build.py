@@ -1,4 +1,5 @@
 import os
+import re
 import sys
 import json
 import time
@@ -8,6 +9,8 @@ import threading
 from ..core.config import load_config, HOLOGRAM_DIR, find_project_root, save_config
 from ..core.transport import run_command
 from ..internal.monitor import monitor_build
+from ..internal.context_cache import load_contexts, CACHE_DIR as CONTEXT_CACHE_DIR
+from ..internal.context_pack import pack_context, parse_region
 
 def find_build_context(hologram_root, start_path):
     """
@@ -288,6 +291,7 @@ def do_live(args):
     
     if os.path.exists(HOLOGRAM_DIR):
         for root, dirs, files in os.walk(HOLOGRAM_DIR):
+            dirs[:] = [d for d in dirs if d != ".cache"] # clangd index shards
             for f in files:
                 path = os.path.join(root, f)
                 try:
@@ -306,6 +310,7 @@ def do_live(args):
             current_changes = set()
             if os.path.exists(HOLOGRAM_DIR):
                 for root, dirs, files in os.walk(HOLOGRAM_DIR):
+                    dirs[:] = [d for d in dirs if d != ".cache"] # clangd index shards
                     for f in files:
                         path = os.path.join(root, f)
                         try:
@@ -356,10 +361,60 @@ def do_live(args):
         print("\n🔌 Disconnecting Synapse.")
         sys.exit(0)
 
+def _print_file_context(target_path, context, project_root):
+    """Prints the Compilation Context + Source Code sections for one file."""
+    macros = context["macros"]
+    includes = context["includes"]
+    standard = context["standard"]
+
+    print("# Compilation Context")
+    print(f"**Target File**: `{os.path.relpath(target_path, project_root)}`")
+    if standard:
+        print(f"**Standard**: `{standard}`")
+    
+    print("\n## Macros")
+    if macros:
+        for m in sorted(macros):
+            print(f"- `{m}`")
+    else:
+        print("(None)")
+        
+    print("\n## Includes")
+    if includes:
+        for inc in includes:
+            if inc.startswith(project_root):
+                rel = os.path.relpath(inc, project_root)
+                print(f"- `{rel}`")
+            else:
+                print(f"- `{inc}`")
+    else:
+        print("(None)")
+        
+    print("\n# Source Code")
+    try:
+        ext = os.path.splitext(target_path)[1].lower()
+        if ext in ['.c', '.h']:
+            lang = "c"
+        elif ext in ['.cpp', '.hpp', '.cc', '.hh', '.cxx']:
+            lang = "cpp"
+        else:
+            lang = ""
+            
+        with open(target_path, 'r') as f:
+            content = f.read()
+            
+        print(f"```{lang}")
+        print(content)
+        print("```")
+    except Exception as e:
+        print(f"Error reading source file: {e}")
+
 def do_context(args):
     """
     Displays the compilation context for a file in a structured format for AI agents.
-    Read from local compile_commands.json.
+    Read from local compile_commands.json (via the per-file context cache).
+    Extra files (--files) are resolved with the same single DB load.
+    With --max-tokens/--region the output is packed to fit a token budget.
     """
     config = load_config()
     
@@ -367,7 +422,7 @@ def do_context(args):
         print(f"🔮 Projector: Hologram Mode active.", file=sys.stderr)
         
         if not args.file:
-             print("Usage: projector context <file> [task]")
+             print("Usage: projector context <file> [task] [--files <file> ...]")
              sys.exit(1)
 
         project_root = find_project_root() 
@@ -390,24 +445,62 @@ def do_context(args):
         if config: print("Tip: Run 'projector pull' to sync context.")
         sys.exit(1)
         
-    target_path = os.path.abspath(args.file) 
+    requested = [args.file] + list(getattr(args, 'files', None) or [])
+    target_paths = []
+    for f in requested:
+        p = os.path.abspath(f)
+        if p not in target_paths:
+            target_paths.append(p)
     
     try:
-        print(f"📄 Loading compilation database: {compile_commands_path} ...", file=sys.stderr)
-        with open(compile_commands_path, 'r') as f:
-            db = json.load(f)
-        print(f"   Loaded {len(db)} compilation entries.", file=sys.stderr)
+        cache_dir = os.path.join(project_root, CONTEXT_CACHE_DIR)
+        contexts = load_contexts(compile_commands_path, target_paths, cache_dir)
     except Exception as e:
         print(f"Error parsing compile_commands.json: {e}")
         sys.exit(1)
         
-    entry = next((e for e in db if e.get("file") == target_path), None)
-    
-    if not entry:
-        print(f"Error: No compilation context found for {args.file}")
+    missing = [p for p in target_paths if not contexts.get(p)]
+    for p in missing:
+        print(f"Error: No compilation context found for {os.path.relpath(p)}")
+    if missing:
         print("Tip: Run 'projector pull' to sync context.")
+        if len(missing) == len(target_paths):
+            sys.exit(1)
+        
+    max_tokens = getattr(args, 'max_tokens', None)
+    try:
+        region = parse_region(getattr(args, 'region', None))
+    except ValueError as e:
+        print(f"Error: {e}")
         sys.exit(1)
+
+    print(f"# Mission Request")
+    if hasattr(args, 'task') and args.task:
+        print(f"{args.task}\n")
+    else:
+        print("No specific task description provided.\n")
         
+    found = [p for p in target_paths if contexts.get(p)]
+    remaining_budget = max_tokens
+    for idx, target_path in enumerate(found):
+        if idx:
+            print("\n---\n")
+        context = contexts[target_path]
+        if max_tokens or region:
+            # Budget is shared: each file gets an even split of what is left
+            file_budget = remaining_budget // (len(found) - idx) if max_tokens else None
+            text, tokens = pack_context(target_path, context, project_root,
+                                        max_tokens=file_budget, region=region)
+            print(text)
+            if max_tokens:
+                remaining_budget = max(0, remaining_budget - tokens)
+        else:
+            _print_file_context(target_path, context, project_root)
+
+HEADER_PATH_REGEX = r'.*\.(h|hh|hpp|hxx|inl|inc)'
+
+def _clangd_flags(entry):
+    """Compile flags of a DB entry minus compiler, -c, -o <out> and the source itself."""
     import shlex
     cmd_args = []
     if "arguments" in entry:
@@ -415,82 +508,82 @@ def do_context(args):
     elif "command" in entry:
         cmd_args = shlex.split(entry["command"])
         
-    macros = []
-    includes = []
-    standard = None
+    compile_flags = []
     
     i = 0
     while i < len(cmd_args):
         arg = cmd_args[i]
         
-        if arg.startswith("-D"):
-            macros.append(arg[2:])
+        if i == 0 and not arg.startswith("-"):
+             i += 1
+             continue
+             
+        if arg == "-o":
+            i += 2 
+            continue
             
-        elif arg.startswith("-std="):
-            standard = arg[5:]
+        if arg == "-c":
+            i += 1
+            continue
             
-        elif arg.startswith("-I"):
-            val = arg[2:]
-            if not val and i + 1 < len(cmd_args):
-                val = cmd_args[i+1]
-            if val: includes.append(val)
-        elif arg == "-isystem":
-            if i + 1 < len(cmd_args):
-                includes.append(cmd_args[i+1])
-        
+        compile_flags.append(arg)
         i += 1
         
-    print(f"# Mission Request")
-    if hasattr(args, 'task') and args.task:
-        print(f"{args.task}\n")
-    else:
-        print("No specific task description provided.\n")
-        
-    print("# Compilation Context")
-    print(f"**Target File**: `{os.path.relpath(target_path, project_root)}`")
-    if standard:
-        print(f"**Standard**: `{standard}`")
-    
-    print("\n## Macros")
-    if macros:
-        for m in sorted(macros):
-            print(f"- `{m}`")
-    else:
-        print("(None)")
-        
-    print("\n## Includes")
-    if includes:
-        for inc in includes:
-            if inc.startswith(project_root):
-                rel = os.path.relpath(inc, project_root)
-                print(f"- `{rel}`")
-            else:
-                print(f"- `{inc}`")
-    else:
-        print("(None)")
-        
-    print("\n# Source Code")
-    try:
-        ext = os.path.splitext(target_path)[1].lower()
-        if ext in ['.c', '.h']:
-            lang = "c"
-        elif ext in ['.cpp', '.hpp', '.cc', '.hh', '.cxx']:
-            lang = "cpp"
-        else:
-            lang = ""
-            
-        with open(target_path, 'r') as f:
-            content = f.read()
-            
-        print(f"```{lang}")
-        print(content)
-        print("```")
-    except Exception as e:
-        print(f"Error reading source file: {e}")
+    return [f for f in compile_flags if not f.endswith(".c") and not f.endswith(".cpp") and not f.endswith(".cc")]
+
+def _clangd_fragment(condition_key, path_regexes, flags):
+    lines = ["If:", f"  {condition_key}:"]
+    for regex in path_regexes:
+        lines.append(f"    - '{regex}'")
+    lines.append("CompileFlags:")
+    lines.append("  Add:")
+    for flag in flags:
+        safe_flag = flag.replace('\\', '\\\\').replace('"', '\\"')
+        lines.append(f'    - "{safe_flag}"')
+    return "\n".join(lines) + "\n"
+
+def build_clangd_config(db, hologram_dir, focus_flags):
+    """
+    Renders a multi-fragment .clangd covering every DB entry under the hologram.
+
+    Entries sharing an identical flag set are grouped into ONE 'If: PathMatch'
+    fragment. A file with several entries keeps only its first one (as 'focus'
+    does), so no file gets conflicting flags. The focused file's flags only apply
+    to headers (which have no DB entry); nothing else about the focus is written,
+    so focusing a file with the same flags leaves the content unchanged and
+    clangd's index stays warm.
+    Returns (content, number_of_flag_sets).
+    """
+    groups = {}
+    seen = set()
+    for entry in db:
+        f = entry.get("file")
+        if not f:
+            continue
+        abs_f = f if os.path.isabs(f) else os.path.join(entry.get("directory", hologram_dir), f)
+        rel = os.path.relpath(abs_f, hologram_dir)
+        if rel.startswith(".."):
+            continue # clangd matches paths relative to the .clangd directory
+        if rel in seen:
+            continue
+        seen.add(rel)
+        key = tuple(_clangd_flags(entry))
+        groups.setdefault(key, []).append(re.escape(rel.replace(os.path.sep, "/")))
+
+    fragments = []
+    for flags, regexes in sorted(groups.items(), key=lambda kv: kv[1][0]):
+        fragments.append(_clangd_fragment("PathMatch", sorted(regexes), list(flags)))
+    # Focus fallback: headers inherit the flags of the focused source
+    fragments.append(_clangd_fragment("PathMatch", [HEADER_PATH_REGEX], focus_flags))
+
+    header = "# Auto-generated by 'projector focus'. Do not edit.\n"
+    return header + "---\n".join(fragments), len(groups)
 
 def do_focus(args):
     """
-    Generates a dynamic .clangd configuration derived from a source file's compilation flags.
+    Generates a merged .clangd configuration from ALL compile DB entries
+    (one 'If: PathMatch' fragment per distinct flag set). The focused file
+    decides the flags used for headers.
     """
     project_root = find_project_root()
     if not project_root:
@@ -522,48 +615,26 @@ def do_focus(args):
         
     print(f"Found context for {args.file}")
     
-    import shlex
-    cmd_args = []
-    if "arguments" in entry:
-        cmd_args = entry["arguments"]
-    elif "command" in entry:
-        cmd_args = shlex.split(entry["command"])
-        
-    compile_flags = []
-    
-    i = 0
-    while i < len(cmd_args):
-        arg = cmd_args[i]
-        
-        if i == 0 and not arg.startswith("-"):
-             i += 1
-             continue
-             
-        if arg == "-o":
-            i += 2 
-            continue
-            
-        if arg == "-c":
-            i += 1
-            continue
-            
-        compile_flags.append(arg)
-        i += 1
-        
-    compile_flags = [f for f in compile_flags if not f.endswith(".c") and not f.endswith(".cpp") and not f.endswith(".cc")]
-    
-    clangd_content = "CompileFlags:\n  Add:\n"
-    for flag in compile_flags:
-        safe_flag = flag.replace('"', '\\"')
-        clangd_content += f'    - "{safe_flag}"\n'
+    compile_flags = _clangd_flags(entry)
+    clangd_content, flag_sets = build_clangd_config(db, hologram_dir, compile_flags)
         
     clangd_path = os.path.join(hologram_dir, ".clangd")
     
+    # Unchanged config => do not touch the file (clangd reloads on mtime change)
+    if os.path.exists(clangd_path):
+        try:
+            with open(clangd_path, 'r') as f:
+                if f.read() == clangd_content:
+                    print(f"✅ .clangd already up to date ({flag_sets} flag sets for {len(db)} entries; headers use the flags of {os.path.basename(target_path)})")
+                    return
+        except OSError:
+            pass
+    
     try:
         with open(clangd_path, 'w') as f:
             f.write(clangd_content)
         print(f"✅ Generated .clangd configuration at {clangd_path}")
-        print(f"   (Derived {len(compile_flags)} flags from {os.path.basename(target_path)})")
+        print(f"   ({flag_sets} flag sets for {len(db)} entries; headers use {len(compile_flags)} flags from {os.path.basename(target_path)})")
     except Exception as e:
         print(f"Error writing .clangd: {e}")
         sys.exit(1)
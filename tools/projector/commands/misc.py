@@ -1,8 +1,10 @@
 import os
 import sys
+import json
 import subprocess
 from ..core.config import load_config, HOLOGRAM_DIR, OUTSIDE_WALL_DIR, find_project_root, save_config
 from ..internal.compile_db import update_local_compile_db
+from ..internal import indexer
 
 def do_grep(args):
     """Executes remote ripgrep and maps paths to local hologram."""
@@ -128,3 +130,72 @@ def do_repair_headers(args):
     except Exception as e:
         print(f"Repair failed: {e}")
         sys.exit(1)
+
+def do_index(args):
+    """
+    Pre-warms the clangd index for the hologram (and the outside_wall headers its TUs include).
+
+    Default: drive clangd headlessly until its background index is complete. Shards are
+    persisted in hologram/.cache/clangd/index and reused by every later clangd session.
+    --static: build a standalone clangd-indexer index in .projector/index/ (skipped if fresh).
+    --detach: run out of band; output goes to .projector/index/index.log.
+    """
+    project_root = find_project_root()
+    if not project_root:
+        print("Error: Hologram not initialized.")
+        sys.exit(1)
+
+    hologram_dir = os.path.join(project_root, HOLOGRAM_DIR)
+    db_path = os.path.join(hologram_dir, "compile_commands.json")
+    index_dir = os.path.join(project_root, indexer.INDEX_DIR)
+
+    if not os.path.exists(db_path):
+        print(f"Error: {db_path} not found. Run 'projector pull' first.")
+        sys.exit(1)
+
+    if getattr(args, 'detach', False):
+        argv = indexer.projector_argv("index")
+        if args.static:
+            argv.append("--static")
+        pid, log_path = indexer.spawn_detached(argv, index_dir)
+        print(f"🗂️  Indexing in background (pid {pid}). Log: {log_path}")
+        return
+
+    if not indexer.acquire_lock(index_dir):
+        print("🗂️  Another index run is already in progress. Skipping.")
+        return
+
+    try:
+        with open(db_path, 'r') as f:
+            db = json.load(f)
+
+        if args.static:
+            tool = indexer.find_tool("clangd-indexer")
+            if not tool:
+                print("Error: 'clangd-indexer' not found (install clang-tools or set $CLANGD_INDEXER).")
+                sys.exit(1)
+            index_path = os.path.join(index_dir, indexer.STATIC_INDEX_NAME)
+            if indexer.static_index_is_fresh(index_path, db_path, db):
+                print(f"✅ Static index is up to date: {index_path}")
+                return
+            print(f"🗂️  Building static index for {len(db)} entries...")
+            try:
+                indexer.build_static_index(tool, db_path, index_path)
+            except RuntimeError as e:
+                print(f"Error building static index: {e}")
+                sys.exit(1)
+            print(f"✅ Static index written to {index_path}")
+            print(f"   (Use with: clangd --index-file={index_path})")
+        else:
+            tool = indexer.find_tool("clangd")
+            if not tool:
+                print("Error: 'clangd' not found (install clangd or set $CLANGD).")
+                sys.exit(1)
+            print(f"🗂️  Warming clangd background index for {len(db)} entries...")
+            if indexer.warm_background_index(tool, hologram_dir, db, timeout=args.timeout):
+                print(f"✅ Background index ready ({os.path.join(HOLOGRAM_DIR, '.cache', 'clangd', 'index')})")
+            else:
+                print("⚠️  Background indexing did not finish (timeout or clangd error).")
+                sys.exit(1)
+    finally:
+        indexer.release_lock(index_dir)
@@ -9,6 +9,7 @@ import time
 from ..core.config import load_config, HOLOGRAM_DIR, OUTSIDE_WALL_DIR, find_project_root, save_config
 from ..core.transport import run_command
 from ..internal.compile_db import update_local_compile_db
+from ..internal import indexer
 
 def compute_candidate_diff(candidates):
     """
@@ -243,6 +244,10 @@ def do_pull(args):
         compile_context['file'] = remote_path
         print(f"Updating compile_commands.json for {args.file}")
         update_local_compile_db(compile_context, dependencies)
+        if config.get('auto_index'):
+            index_dir = os.path.join(find_project_root() or ".", indexer.INDEX_DIR)
+            pid, log_path = indexer.spawn_detached(indexer.projector_argv("index"), index_dir)
+            print(f"🗂️  Re-indexing in background (pid {pid}). Log: {log_path}")
     elif is_header:
         print(f"Skipping compile_commands.json update for header: {args.file}")
         print("💡 Use 'projector focus <source_file>' to configure Clangd for this header.")
@@ -388,6 +393,104 @@ def retract_file(abs_path, config, project_root):
         
     return True
 
+def _remote_location(rel_path, remote_root):
+    """Splits a hologram-relative path into (remote base, path below it), as retract_file maps it."""
+    remote_root_stripped = remote_root.lstrip(os.path.sep)
+    rel_path = rel_path.replace(os.path.sep, "/")
+    if rel_path.startswith(remote_root_stripped):
+        return "/", rel_path
+    return remote_root.rstrip("/") or "/", rel_path
+
+def retract_files(abs_paths, config, project_root):
+    """
+    Retracts many files at once: removes them from the hologram, checks which exist
+    remotely with one ssh call and restores those with one rsync --files-from per
+    remote base. Returns the number of files restored to outside_wall.
+    """
+    hologram_abs = os.path.join(project_root, HOLOGRAM_DIR)
+    wall_abs = os.path.join(project_root, OUTSIDE_WALL_DIR)
+    host = config['host_target']
+    remote_root = config.get('remote_root', '.')
+    ssh_opts = ["-o", "StrictHostKeyChecking=no", "-o", "UserKnownHostsFile=/dev/null"]
+
+    # 1. Validate & Remove (local, bulk)
+    locations = {} # remote path -> (base, rel)
+    removed = 0
+    for abs_path in abs_paths:
+        try:
+            if os.path.commonpath([hologram_abs, abs_path]) != hologram_abs:
+                print(f"Error: File {os.path.relpath(abs_path, os.getcwd())} is not in the hologram directory.")
+                continue
+        except ValueError:
+            print(f"Error: Paths on different drives or invalid.")
+            continue
+        if os.path.exists(abs_path):
+            os.remove(abs_path)
+            removed += 1
+        base, rel = _remote_location(os.path.relpath(abs_path, hologram_abs), remote_root)
+        locations[f"{base.rstrip('/')}/{rel}"] = (base, rel)
+    print(f"🗑️  Retracted {removed} files from hologram.")
+    if not locations:
+        return 0
+
+    # 2. Check Remote Existence (one connection; paths go over stdin, no quoting limits)
+    check_script = 'unset HISTFILE; while IFS= read -r p; do [ -f "$p" ] && printf "%s\\n" "$p"; done; true'
+    try:
+        res = subprocess.run(["ssh"] + ssh_opts + [host, check_script], input="\n".join(locations) + "\n",
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True)
+        existing = [p for p in res.stdout.splitlines() if p in locations]
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"Warning: Failed to restore to outside_wall: {e}")
+        return 0
+
+    # 3. Batch Rsync, grouped by remote base
+    by_base = {}
+    for remote_path in existing:
+        base, rel = locations[remote_path]
+        by_base.setdefault(base, []).append(rel)
+
+    import tempfile
+    restored = []
+    for base, rels in by_base.items():
+        # Prepare Permissions (Write Access) on files being replaced
+        for rel in rels:
+            local = os.path.join(wall_abs, rel)
+            if os.path.exists(local):
+                try:
+                    os.chmod(local, 0o644)
+                except OSError: pass
+        with tempfile.NamedTemporaryFile(mode='w', delete=False) as tmp:
+            tmp_path = tmp.name
+            for rel in rels:
+                tmp.write(rel + "\n")
+        os.makedirs(wall_abs, exist_ok=True)
+        rsync_cmd = [
+            "rsync", "-az",
+            "--files-from", tmp_path,
+            "-e", "ssh -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null",
+            f"{host}:{base}",
+            wall_abs + os.path.sep
+        ]
+        try:
+            run_command(rsync_cmd)
+            restored.extend(rels)
+        except Exception as e:
+            print(f"Warning: Failed to restore to outside_wall: {e}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # 4. Enforce Read-Only
+    for rel in restored:
+        local = os.path.join(wall_abs, rel)
+        if os.path.exists(local):
+            try:
+                os.chmod(local, 0o444)
+            except OSError: pass
+    if restored:
+        print(f"🧱 Restored {len(restored)} files to Outside Wall.")
+    return len(restored)
+
 def do_retract(args):
     """Retracts a file from the hologram (stops projecting it)."""
     config = load_config()
@@ -400,6 +503,7 @@ def do_retract(args):
         print("💥 Retracting ALL files from Hologram...")
         if os.path.exists(hologram_abs):
             for root, dirs, files in os.walk(hologram_abs):
+                dirs[:] = [d for d in dirs if d != ".cache"] # clangd index shards are not synced files
                 for f in files:
                     full_path = os.path.join(root, f)
                     if f == "compile_commands.json" or f == ".hologram_config":
@@ -428,8 +532,10 @@ def do_retract(args):
         print("Nothing to retract.")
         return
 
-    for f_path in files_to_retract:
-        retract_file(f_path, config, project_root)
+    if len(files_to_retract) == 1:
+        retract_file(files_to_retract[0], config, project_root)
+    else:
+        retract_files(files_to_retract, config, project_root)
         
     # 3. Clean up compile_commands.json
     db_path = os.path.join(hologram_abs, "compile_commands.json")
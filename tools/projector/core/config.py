@@ -42,7 +42,7 @@ def save_config(config):
 
 def update_gitignore():
     """Ensures critical directories are ignored by git."""
-    ignores = [".mission", ".mission-context", ".weaves", ".ddd", ".hologram_config", "outside_wall"]
+    ignores = [".mission", ".mission-context", ".weaves", ".ddd", ".hologram_config", ".projector", "outside_wall"]
     
     # Check .gitignore
     gitignore_path = ".gitignore"
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import shlex
+import hashlib
+
+# Lives next to .hologram_config (NOT inside hologram/, which 'live' mirrors to the host)
+CACHE_DIR = os.path.join(".projector", "cache", "context")
+# Bump when the shape of the cached context changes
+CACHE_VERSION = 2
+
+def parse_compile_flags(entry):
+    """
+    Extracts macros, include paths and the language standard from a compile DB entry.
+    """
+    cmd_args = []
+    if "arguments" in entry:
+        cmd_args = entry["arguments"]
+    elif "command" in entry:
+        cmd_args = shlex.split(entry["command"])
+
+    macros = []
+    includes = []
+    system_includes = []
+    standard = None
+
+    i = 0
+    while i < len(cmd_args):
+        arg = cmd_args[i]
+
+        if arg.startswith("-D"):
+            macros.append(arg[2:])
+
+        elif arg.startswith("-std="):
+            standard = arg[5:]
+
+        elif arg.startswith("-I"):
+            val = arg[2:]
+            if not val and i + 1 < len(cmd_args):
+                val = cmd_args[i+1]
+            if val: includes.append(val)
+        elif arg == "-isystem":
+            if i + 1 < len(cmd_args):
+                includes.append(cmd_args[i+1])
+                system_includes.append(cmd_args[i+1])
+
+        i += 1
+
+    return {"macros": macros, "includes": includes, "system_includes": system_includes, "standard": standard}
+
+def entry_hash(entry):
+    """Stable fingerprint of a compile DB entry (order-independent keys)."""
+    return hashlib.sha1(json.dumps(entry, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _stamp(path):
+    """(mtime_ns, size) of a path, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def _cache_file(cache_dir, target_path):
+    key = hashlib.sha1(target_path.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.json")
+
+def _read_cache(cache_file):
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(cache_file, record):
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        tmp = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass # Cache is best-effort
+
+def load_contexts(db_path, target_paths, cache_dir):
+    """
+    Resolves the compilation context of many files with at most ONE parse of the DB.
+
+    Each file has a small cache record keyed by (file, DB entry hash, source mtime).
+    While the DB itself is unchanged (mtime/size) the record is served without touching
+    the DB (an edited source only gets its mtime re-stamped). Otherwise the DB is loaded
+    once for all misses, and records whose entry hash is unchanged are re-stamped
+    instead of re-parsed.
+
+    Returns {target_path: context_dict or None}.
+    Raises ValueError/OSError if the DB has to be loaded and cannot be parsed.
+    """
+    db_stamp = _stamp(db_path)
+    results = {}
+    misses = []
+    cached_records = {}
+
+    for target in target_paths:
+        cache_file = _cache_file(cache_dir, target)
+        record = _read_cache(cache_file)
+        cached_records[target] = record
+        if record and record.get("version") == CACHE_VERSION and record.get("db_stamp") == db_stamp:
+            # DB untouched => entry (and its hash) untouched; only re-stamp edited sources
+            source_mtime = _stamp(target)
+            if record.get("source_mtime") != source_mtime:
+                record["source_mtime"] = source_mtime
+                _write_cache(cache_file, record)
+            results[target] = record["context"]
+        else:
+            misses.append(target)
+
+    if not misses:
+        print(f"⚡ Context cache hit ({len(results)} files).", file=sys.stderr)
+        return results
+
+    print(f"📄 Loading compilation database: {db_path} ...", file=sys.stderr)
+    with open(db_path, 'r') as f:
+        db = json.load(f)
+    print(f"   Loaded {len(db)} compilation entries.", file=sys.stderr)
+
+    # First entry wins (same semantics as the old linear next(...) scan)
+    index = {}
+    for e in db:
+        index.setdefault(e.get("file"), e)
+
+    for target in misses:
+        cache_file = _cache_file(cache_dir, target)
+        entry = index.get(target)
+        if not entry:
+            results[target] = None
+            if cached_records[target] is not None:
+                try:
+                    os.remove(cache_file)
+                except OSError:
+                    pass
+            continue
+
+        h = entry_hash(entry)
+        record = cached_records[target]
+        if record and record.get("version") == CACHE_VERSION and record.get("entry_hash") == h:
+            context = record["context"]
+        else:
+            context = parse_compile_flags(entry)
+            context["directory"] = entry.get("directory")
+
+        results[target] = context
+        _write_cache(cache_file, {
+            "version": CACHE_VERSION,
+            "file": target,
+            "db_stamp": db_stamp,
+            "entry_hash": h,
+            "source_mtime": _stamp(target),
+            "context": context
+        })
+
+    return results
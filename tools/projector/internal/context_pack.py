@@ -0,0 +1,284 @@
+import os
+import re
+
+# Rough heuristic used across LLM tooling: ~4 characters per token for source code.
+CHARS_PER_TOKEN = 4
+
+INCLUDE_RE = re.compile(r'^\s*#\s*include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+TRANSPARENT_BLOCK_RE = re.compile(r'^(extern\s*"C(\+\+)?"|namespace\b)')
+AGGREGATE_RE = re.compile(r'^(typedef\s+)?(struct|enum|union|class)\b')
+SIG_HEADING = "## Project Header Signatures"
+
+def estimate_tokens(text):
+    """Cheap token estimate (no tokenizer dependency)."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def parse_region(region):
+    """Parses 'START:END' (1-based, inclusive; either side optional) into a tuple."""
+    if not region:
+        return None
+    start, _, end = region.partition(":")
+    try:
+        return (int(start) if start else 1, int(end) if end else None)
+    except ValueError:
+        raise ValueError(f"Invalid region '{region}' (expected START:END)")
+
+def scan_includes(source_text):
+    """Returns [(kind, name)] for each #include directive, kind is 'quote' or 'angle'."""
+    return [("quote" if m.group(1) == '"' else "angle", m.group(2).strip())
+            for m in INCLUDE_RE.finditer(source_text)]
+
+def resolve_include(name, kind, source_dir, include_dirs):
+    """Resolves an include like the preprocessor would (quote: own dir first)."""
+    search = ([source_dir] if kind == "quote" else []) + list(include_dirs)
+    for d in search:
+        candidate = os.path.normpath(os.path.join(d, name))
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def extract_signatures(header_text):
+    """
+    Reduces a header to its declaration signatures:
+    macros (first line), prototypes/typedefs/externs, and the heads of
+    struct/enum/union/inline-function blocks with their bodies elided.
+    """
+    text = COMMENT_RE.sub("", header_text)
+    signatures = []
+
+    # Macros (skip include guards)
+    for line in text.splitlines():
+        m = re.match(r'\s*#\s*define\s+(\w+)(.*)', line)
+        if m and m.group(2).strip():
+            signatures.append(f"#define {m.group(1)}{m.group(2).rstrip()}".rstrip("\\").rstrip())
+
+    # Statements at brace depth 0 (preprocessor lines removed)
+    code = "\n".join(l for l in text.splitlines() if not l.lstrip().startswith("#"))
+    depth = 0
+    stmt = []
+    head = None
+    for ch in code:
+        if depth == 0:
+            if ch == "{":
+                head = " ".join("".join(stmt).split())
+                stmt = []
+                if TRANSPARENT_BLOCK_RE.match(head):
+                    # extern "C" { ... } / namespace x { ... }: declarations inside stay top-level
+                    head = None
+                else:
+                    depth = 1
+            elif ch == "}":
+                stmt = [] # Closing a transparent block
+            elif ch == ";":
+                decl = " ".join("".join(stmt).split())
+                stmt = []
+                if decl:
+                    signatures.append(f"{decl};")
+            else:
+                stmt.append(ch)
+        else:
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    if head and "(" in head and not AGGREGATE_RE.match(head):
+                        # Inline function definition: keep the prototype only
+                        signatures.append(f"{head};")
+                        head = None
+                    else:
+                        # Aggregate: keep the head, the tail (e.g. typedef name) follows up to ';'
+                        stmt = list(f"{head} {{ ... }}")
+                        head = None
+    return signatures
+
+def _fence_lang(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ['.c', '.h']:
+        return "c"
+    if ext in ['.cpp', '.hpp', '.cc', '.hh', '.cxx']:
+        return "cpp"
+    return ""
+
+def _fit_lines(lines, budget_tokens):
+    """Returns the longest prefix of lines fitting budget_tokens."""
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line + "\n")
+        if used + cost > budget_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+def _size_line(tokens, max_tokens):
+    budget_note = f" (budget {max_tokens})" if max_tokens else ""
+    return f"**Size Estimate**: ~{tokens} tokens{budget_note}"
+
+def pack_context(target_path, context, project_root, max_tokens=None, region=None):
+    """
+    Builds a budget-aware Markdown context for one file.
+
+    Sections, in rank order (lower ranks are trimmed first):
+      1. Target region (full text; truncated only if it alone exceeds the budget)
+      2. Active macros
+      3. Signatures of declarations from included project headers
+         (resolved through the entry's -I paths, in include order)
+      4. Include search paths
+    System includes (angle brackets, -isystem) are elided to a name list; quoted
+    includes that resolve nowhere are listed separately as unresolved.
+
+    Returns (markdown_text, estimated_tokens).
+    """
+    budget = max_tokens if max_tokens else float("inf")
+    rel_target = os.path.relpath(target_path, project_root)
+
+    try:
+        with open(target_path, 'r', errors='replace') as f:
+            source = f.read()
+    except OSError as e:
+        source = ""
+        read_error = str(e)
+    else:
+        read_error = None
+
+    lines = source.splitlines()
+    start, end = (region or (1, None))
+    end = min(end or len(lines), len(lines))
+    start = max(1, start)
+    region_lines = lines[start-1:end]
+
+    # --- Rank 1: Target region ---
+    header = [
+        "# Compilation Context",
+        f"**Target File**: `{rel_target}`",
+    ]
+    if context.get("standard"):
+        header.append(f"**Standard**: `{context['standard']}`")
+    # The size line is part of the output: reserve it (one digit of slack)
+    used = estimate_tokens("\n".join(header + [_size_line(max_tokens * 10 if max_tokens else 0, max_tokens)]))
+
+    # Reserved around the region: its title, fence and notes, the placeholders of the
+    # lower ranks when they do not fit, and the blank lines between sections
+    lang = _fence_lang(target_path)
+    overhead = [f"# Source Code (lines {start}-{end})", f"```{lang}", "```",
+                f"(lines 1-{start-1} elided)", f"({len(region_lines)} lines truncated to fit the token budget)",
+                f"(lines {end+1}-{len(lines)} elided)"]
+    if context.get("macros"):
+        overhead.append(f"## Macros\n({len(context['macros'])} macros elided for budget)")
+    # Kept free by ranks 2-3 too: the include paths fall back to a count at worst
+    includes_reserve = 0
+    if context.get("includes"):
+        includes_reserve = estimate_tokens(f"## Includes\n({len(context['includes'])} include paths elided for budget)\n\n")
+    region_budget = budget - used - includes_reserve - estimate_tokens("\n\n".join(overhead) + "\n" * 10)
+    kept = _fit_lines(region_lines, region_budget) if region_budget != float("inf") else region_lines
+    notes = []
+    if start > 1:
+        notes.append(f"(lines 1-{start-1} elided)")
+    truncated = len(region_lines) - len(kept)
+    if truncated:
+        notes.append(f"({truncated} lines truncated to fit the token budget)")
+    if end < len(lines):
+        notes.append(f"(lines {end+1}-{len(lines)} elided)")
+
+    region_title = f"# Source Code (lines {start}-{start + len(kept) - 1})" if region else "# Source Code"
+    region_md = [region_title]
+    if read_error:
+        region_md.append(f"Error reading source file: {read_error}")
+    else:
+        region_md += [f"```{lang}"] + kept + ["```"] + notes
+    region_text = "\n".join(region_md)
+    used += estimate_tokens(region_text)
+
+    # --- Rank 2: Macros ---
+    macros_text = ""
+    macros = sorted(context.get("macros", []))
+    if macros:
+        block = "\n".join(["## Macros"] + [f"- `{m}`" for m in macros])
+        if used + estimate_tokens(block) <= budget - includes_reserve:
+            macros_text = block
+            used += estimate_tokens(block)
+        else:
+            macros_text = f"## Macros\n({len(macros)} macros elided for budget)"
+            used += estimate_tokens(macros_text)
+
+    # --- Rank 3: Project header signatures ---
+    directory = context.get("directory") or os.path.dirname(target_path)
+    system_dirs = set(os.path.normpath(os.path.join(directory, d)) for d in context.get("system_includes", []))
+    project_dirs = []
+    for d in context.get("includes", []):
+        full = os.path.normpath(os.path.join(directory, d))
+        if full not in system_dirs and full not in project_dirs:
+            project_dirs.append(full)
+
+    elided_system = []
+    unresolved = []
+    sig_blocks = []
+    sig_elided = 0
+    for kind, name in scan_includes(source):
+        path = resolve_include(name, kind, os.path.dirname(target_path), project_dirs)
+        if kind == "angle" and not path:
+            elided_system.append(f"<{name}>")
+            continue
+        if not path:
+            unresolved.append(f'"{name}"')
+            continue
+        try:
+            with open(path, 'r', errors='replace') as f:
+                sigs = extract_signatures(f.read())
+        except OSError:
+            continue
+        if not sigs:
+            continue
+        title = f"### `{name}`"
+        # The first block also pays for the section heading; fence + notes are reserved
+        heading = 0 if sig_blocks else estimate_tokens(SIG_HEADING + "\n\n")
+        remaining = budget - used - includes_reserve - estimate_tokens(title) - heading - 20
+        fitted = _fit_lines(sigs, remaining) if remaining != float("inf") else sigs
+        if not fitted:
+            sig_elided += 1
+            continue
+        block = "\n".join([title, f"```{lang}"] + fitted + ["```"])
+        if len(fitted) < len(sigs):
+            block += f"\n({len(sigs) - len(fitted)} declarations elided for budget)"
+        sig_blocks.append(block)
+        used += heading + estimate_tokens(block + "\n\n")
+
+    sig_text = ""
+    if sig_blocks or sig_elided:
+        sig_text = "\n\n".join([SIG_HEADING] + sig_blocks)
+        if sig_elided:
+            sig_text += f"\n({sig_elided} headers elided for budget)"
+
+    # --- Rank 4: Include paths + elided system headers ---
+    inc_text = ""
+    includes = context.get("includes", [])
+    if includes:
+        rel = [os.path.relpath(i, project_root) if i.startswith(project_root) else i for i in includes]
+        block = "\n".join(["## Includes"] + [f"- `{i}`" for i in rel])
+        if used + estimate_tokens(block) <= budget:
+            inc_text = block
+        else:
+            inc_text = f"## Includes\n({len(includes)} include paths elided for budget)"
+        used += estimate_tokens(inc_text)
+    for label, names in (("System includes (elided)", elided_system), ("Unresolved includes", unresolved)):
+        if not names:
+            continue
+        block = f"{label}: " + ", ".join(f"`{s}`" for s in names)
+        if used + estimate_tokens(block) <= budget:
+            inc_text = f"{inc_text}\n\n{block}" if inc_text else block
+            used += estimate_tokens(block)
+
+    body = "\n\n".join(s for s in [macros_text, sig_text, inc_text, region_text] if s)
+    # The estimate counts its own line: settle on a number that holds once printed
+    tokens = estimate_tokens("\n".join(header) + "\n\n" + body)
+    for _ in range(3):
+        text = "\n".join(header + [_size_line(tokens, max_tokens)]) + "\n\n" + body
+        if estimate_tokens(text) == tokens:
+            break
+        tokens = estimate_tokens(text)
+    return text, estimate_tokens(text)
@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import threading
+import subprocess
+
+# Lives next to .hologram_config (NOT inside hologram/, which 'live' mirrors to the host)
+INDEX_DIR = os.path.join(".projector", "index")
+STATIC_INDEX_NAME = "hologram.idx"
+LOCK_NAME = "index.pid"
+LOG_NAME = "index.log"
+# An empty lock file younger than this is being written by its owner
+LOCK_GRACE_SECS = 10
+
+def find_tool(name):
+    """Finds a clangd tool, honouring e.g. $CLANGD / $CLANGD_INDEXER overrides."""
+    override = os.environ.get(name.upper().replace("-", "_"))
+    if override:
+        return override
+    return shutil.which(name)
+
+def _source_files(db):
+    files = []
+    for entry in db:
+        f = entry.get("file")
+        if not f:
+            continue
+        if not os.path.isabs(f):
+            f = os.path.join(entry.get("directory", ""), f)
+        files.append(f)
+    return files
+
+def static_index_is_fresh(index_path, db_path, db):
+    """The static index is reusable if newer than the DB and every TU."""
+    try:
+        index_mtime = os.path.getmtime(index_path)
+        if os.path.getmtime(db_path) > index_mtime:
+            return False
+    except OSError:
+        return False
+    for f in _source_files(db):
+        try:
+            if os.path.getmtime(f) > index_mtime:
+                return False
+        except OSError:
+            continue # Missing TU: indexer skips it too
+    return True
+
+def build_static_index(indexer, db_path, index_path):
+    """Runs clangd-indexer over all TUs into index_path (atomic replace)."""
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp = f"{index_path}.tmp"
+    with open(tmp, 'wb') as out:
+        result = subprocess.run([indexer, "--executor=all-TUs", db_path],
+                                stdout=out, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        os.remove(tmp)
+        err = result.stderr.decode(errors='replace').strip().splitlines()
+        raise RuntimeError(err[-1] if err else f"clangd-indexer exited with {result.returncode}")
+    os.replace(tmp, index_path)
+
+# --- Minimal LSP client (JSON-RPC over stdio) ---
+
+def _lsp_send(proc, payload):
+    body = json.dumps(payload).encode("utf-8")
+    proc.stdin.write(f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+    proc.stdin.flush()
+
+def _lsp_read(proc):
+    length = None
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            return None # clangd exited
+        line = line.strip()
+        if not line:
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    if length is None:
+        return None
+    return json.loads(proc.stdout.read(length))
+
+def warm_background_index(clangd, db_dir, db, timeout=900, idle_timeout=15, log=print):
+    """
+    Drives clangd headlessly until its background index is complete.
+
+    clangd persists index shards in <db_dir>/.cache/clangd/index, so later sessions
+    (editor or agent) only re-index TUs that changed. Returns True when clangd
+    reported the end of background indexing (or had nothing to do).
+    """
+    files = [f for f in _source_files(db) if os.path.exists(f)]
+    if not files:
+        log("   No existing translation units to index.")
+        return True
+
+    cmd = [clangd, "--background-index", f"--compile-commands-dir={db_dir}", "--log=error"]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    inbox = queue.Queue()
+
+    def pump():
+        while True:
+            msg = _lsp_read(proc)
+            inbox.put(msg)
+            if msg is None:
+                return
+    threading.Thread(target=pump, daemon=True).start()
+
+    root_uri = f"file://{os.path.abspath(db_dir)}"
+    _lsp_send(proc, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+        "processId": os.getpid(),
+        "rootUri": root_uri,
+        "capabilities": {"window": {"workDoneProgress": True}}
+    }})
+
+    done = False
+    started = False
+    deadline = time.time() + timeout
+    idle_deadline = None
+    last_pct = -1
+    try:
+        while time.time() < deadline:
+            try:
+                msg = inbox.get(timeout=1)
+            except queue.Empty:
+                if idle_deadline and not started and time.time() > idle_deadline:
+                    # Shards already up to date: clangd never started a progress report
+                    done = True
+                    break
+                continue
+            if msg is None:
+                log("   clangd exited unexpectedly.")
+                break
+
+            if msg.get("id") == 1 and "result" in msg:
+                _lsp_send(proc, {"jsonrpc": "2.0", "method": "initialized", "params": {}})
+                # Opening one TU makes clangd load the CDB and enqueue ALL TUs
+                with open(files[0], 'r', errors='replace') as f:
+                    text = f.read()
+                _lsp_send(proc, {"jsonrpc": "2.0", "method": "textDocument/didOpen", "params": {
+                    "textDocument": {"uri": f"file://{files[0]}", "languageId": "cpp", "version": 1, "text": text}
+                }})
+                idle_deadline = time.time() + idle_timeout
+            elif msg.get("method") == "window/workDoneProgress/create":
+                _lsp_send(proc, {"jsonrpc": "2.0", "id": msg.get("id"), "result": None})
+            elif msg.get("method") == "$/progress":
+                params = msg.get("params", {})
+                if params.get("token") != "backgroundIndexProgress":
+                    continue
+                value = params.get("value", {})
+                kind = value.get("kind")
+                if kind == "begin":
+                    started = True
+                    log("   Background indexing started...")
+                elif kind == "report":
+                    pct = value.get("percentage")
+                    if pct is not None and pct // 10 != last_pct // 10:
+                        last_pct = pct
+                        log(f"   ... {pct}% ({value.get('message', '')})")
+                elif kind == "end":
+                    done = True
+                    break
+            elif "id" in msg and "method" in msg:
+                # Any other server->client request: acknowledge so clangd never blocks
+                _lsp_send(proc, {"jsonrpc": "2.0", "id": msg["id"], "result": None})
+    finally:
+        try:
+            _lsp_send(proc, {"jsonrpc": "2.0", "id": 2, "method": "shutdown", "params": None})
+            _lsp_send(proc, {"jsonrpc": "2.0", "method": "exit", "params": None})
+            proc.wait(timeout=10)
+        except Exception:
+            proc.kill()
+    return done
+
+# --- Detached execution ---
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except (OSError, ValueError):
+        return False
+
+def _lock_owner(lock):
+    """(pid, inode) recorded in the lock file; pid is 0 if empty or unreadable."""
+    try:
+        with open(lock, 'r') as f:
+            ino = os.fstat(f.fileno()).st_ino
+            try:
+                return int(f.read().strip() or 0), ino
+            except ValueError:
+                return 0, ino
+    except OSError:
+        return None, None
+
+def acquire_lock(index_dir):
+    """
+    Returns False if another indexer run (live pid) holds the lock. The lock file is
+    created with O_EXCL, so of two concurrent runs only one gets it. A lock left by a
+    dead pid is removed and taken over.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    lock = os.path.join(index_dir, LOCK_NAME)
+    for _ in range(3):
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            pid, ino = _lock_owner(lock)
+            if pid is None:
+                continue # Released meanwhile: retry
+            if pid == os.getpid():
+                return True
+            if pid and _pid_alive(pid):
+                return False
+            if not pid:
+                # Created but not yet written by its owner, unless it is old
+                try:
+                    if time.time() - os.stat(lock).st_mtime < LOCK_GRACE_SECS:
+                        return False
+                except OSError:
+                    continue
+            # Stale: remove it only if it is still the file we inspected
+            try:
+                if os.stat(lock).st_ino == ino:
+                    os.remove(lock)
+            except OSError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+def release_lock(index_dir):
+    try:
+        os.remove(os.path.join(index_dir, LOCK_NAME))
+    except OSError:
+        pass
+
+def spawn_detached(argv, index_dir):
+    """Starts argv in its own session with output in <index_dir>/index.log."""
+    os.makedirs(index_dir, exist_ok=True)
+    log_path = os.path.join(index_dir, LOG_NAME)
+    with open(log_path, 'a') as log_f:
+        proc = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=log_f, stderr=subprocess.STDOUT,
+                                start_new_session=True)
+    return proc.pid, log_path
+
+def projector_argv(*args):
+    """Command line re-invoking this projector entry point."""
+    return [sys.executable, os.path.abspath(sys.argv[0])] + list(args)
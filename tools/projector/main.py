@@ -4,7 +4,7 @@ from .commands.init import do_init
 from .commands.sync import do_pull, do_push, do_retract
 from .commands.build import do_build, do_log, do_listen, do_live, do_context, do_focus
 from .commands.run import do_run
-from .commands.misc import do_grep, do_repair_headers
+from .commands.misc import do_grep, do_repair_headers, do_index
 from .core.version import __version__
 
 def main():
@@ -74,10 +74,20 @@ def main():
     p_focus.add_argument("file", help="Source file (C/C++) to derive flags from")
     p_focus.set_defaults(func=do_focus)
     
+    # Index (Clangd)
+    p_index = subparsers.add_parser("index", help="Pre-warm the clangd index for the hologram")
+    p_index.add_argument("--static", action="store_true", help="Build a standalone clangd-indexer index instead of background shards")
+    p_index.add_argument("--detach", action="store_true", help="Run out of band (log: .projector/index/index.log)")
+    p_index.add_argument("--timeout", type=int, default=900, help="Seconds to wait for background indexing")
+    p_index.set_defaults(func=do_index)
+    
     # Context (AI)
     p_context = subparsers.add_parser("context", help="Show AI-friendly compilation context")
     p_context.add_argument("file", nargs="?", help="Local file path")
     p_context.add_argument("task", nargs="?", help="Optional task description for the AI agent")
+    p_context.add_argument("--files", nargs="+", default=[], help="Additional files to describe (shares one compile DB load)")
+    p_context.add_argument("--max-tokens", type=int, help="Pack the output to fit this token budget (ranks and trims sections)")
+    p_context.add_argument("--region", help="Only include source lines START:END of the target (1-based, inclusive)")
     p_context.set_defaults(func=do_context)
 
     # Run